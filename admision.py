@@ -0,0 +1,175 @@
+# admision.py
+"""
+Control de admisión: las rutas caras no pueden ocupar todos los hilos.
+
+Cada ruta pertenece a una clase (ADMISION_RUTAS en config.py; las demás, a
+ADMISION_CLASE_DEFECTO). Cada clase tiene una `Compuerta` con:
+
+- `limite`: peticiones de la clase atendiéndose a la vez en este proceso,
+- `cola`: cuántas más pueden esperar un lugar, y
+- `espera`: segundos máximos de espera en la cola.
+
+Si la cola está llena, la petición se rechaza al instante con 503 y
+`Retry-After`; si el plazo vence esperando, también. Así una ráfaga de
+listados completos o exportaciones espera (o se rechaza) en su propia clase,
+y los toggles y detalles siguen entrando por la suya.
+
+En las respuestas en streaming el lugar se libera cuando termina de
+generarse el cuerpo, no al salir de la función de la ruta.
+
+Los límites son por proceso (cada worker de gunicorn tiene los suyos); las
+métricas (en curso, en cola, rechazos) salen en GET /metrics.
+"""
+import math
+import os
+import threading
+from time import monotonic
+
+from flask import Response, g, jsonify, request
+
+# Rutas que nunca esperan: archivos estáticos y las propias métricas
+EXENTAS = ("static", "metrics")
+
+_compuertas = {}  # clase -> Compuerta (las de la última app configurada)
+
+
+class Compuerta:
+    """Semáforo con cola acotada y plazo de espera para una clase de rutas."""
+
+    def __init__(self, nombre, limite, cola, espera):
+        self.nombre = nombre
+        self.limite = limite
+        self.cola = cola
+        self.espera = espera
+        self._condicion = threading.Condition()
+        self.en_curso = 0
+        self.esperando = 0
+        self.admitidas = 0
+        self.rechazadas = {"cola_llena": 0, "plazo_vencido": 0}
+        self.segundos_espera = 0.0
+
+    def entrar(self):
+        """Ocupa un lugar (esperando si hace falta). Devuelve False si hay que rechazar."""
+        with self._condicion:
+            # Si ya hay alguien en la cola, las nuevas esperan detrás (no se adelantan)
+            if self.en_curso < self.limite and not self.esperando:
+                self.en_curso += 1
+                self.admitidas += 1
+                return True
+            if self.esperando >= self.cola:
+                self.rechazadas["cola_llena"] += 1
+                return False
+            self.esperando += 1
+            inicio = monotonic()
+            plazo = inicio + self.espera
+            try:
+                while self.en_curso >= self.limite:
+                    restante = plazo - monotonic()
+                    if restante <= 0:
+                        self.rechazadas["plazo_vencido"] += 1
+                        return False
+                    self._condicion.wait(restante)
+            finally:
+                self.esperando -= 1
+                self.segundos_espera += monotonic() - inicio
+            self.en_curso += 1
+            self.admitidas += 1
+            return True
+
+    def salir(self):
+        """Libera el lugar y despierta a la siguiente petición de la cola."""
+        with self._condicion:
+            self.en_curso -= 1
+            self._condicion.notify()
+
+    def reintentar_en(self):
+        """Segundos sugeridos en Retry-After (el plazo de espera, redondeado hacia arriba)."""
+        return max(1, math.ceil(self.espera))
+
+
+def compuertas():
+    """Las compuertas activas (clase -> Compuerta); las usa metricas.py."""
+    return _compuertas
+
+def _despues_de_fork():
+    """Cada worker empieza con compuertas vacías y locks nuevos."""
+    for nombre, compuerta in list(_compuertas.items()):
+        _compuertas[nombre] = Compuerta(nombre, compuerta.limite, compuerta.cola, compuerta.espera)
+
+if hasattr(os, "register_at_fork"):  # No existe en Windows
+    os.register_at_fork(after_in_child=_despues_de_fork)
+
+# -----------------------------------------------------------------------------
+# Integración con Flask
+# -----------------------------------------------------------------------------
+def _rechazar(compuerta):
+    segundos = compuerta.reintentar_en()
+    if request.path.startswith("/api/"):
+        respuesta = jsonify({"error": f"503: Servidor ocupado, intenta de nuevo en {segundos} s"})
+        respuesta.status_code = 503
+    else:
+        respuesta = Response("Servidor ocupado, intenta de nuevo en unos segundos", 503)
+    respuesta.headers["Retry-After"] = str(segundos)
+    return respuesta
+
+def init_admision(app):
+    """Activa el control de admisión en `app`.
+
+    Configuración (app.config, ver config.py):
+      - ADMISION_ACTIVA: False lo desactiva por completo
+      - ADMISION_CLASES: {clase: {"limite": n, "cola": n, "espera": segundos}}
+      - ADMISION_RUTAS: {endpoint: clase}
+      - ADMISION_CLASE_DEFECTO: clase de los endpoints que no están en ADMISION_RUTAS
+    """
+    app.config.setdefault("ADMISION_ACTIVA", True)
+    if not app.config["ADMISION_ACTIVA"]:
+        return
+    _compuertas.clear()
+    for nombre, opciones in app.config["ADMISION_CLASES"].items():
+        _compuertas[nombre] = Compuerta(nombre, opciones["limite"], opciones["cola"], opciones["espera"])
+    rutas = app.config.get("ADMISION_RUTAS", {})
+    defecto = app.config["ADMISION_CLASE_DEFECTO"]
+
+    @app.before_request
+    def _admitir():
+        if request.endpoint is None or request.endpoint in EXENTAS:
+            return None  # 404 y rutas exentas
+        compuerta = _compuertas[rutas.get(request.endpoint, defecto)]
+        if not compuerta.entrar():
+            return _rechazar(compuerta)
+        g._admision = compuerta
+        return None
+
+    @app.after_request
+    def _liberar_al_terminar(response):
+        # En streaming (listado, exportación) el trabajo sigue después de la ruta:
+        # el lugar se libera al terminar de generar el cuerpo o al cerrarse la
+        # respuesta (cliente desconectado), lo que pase primero
+        if response.is_streamed and not response.direct_passthrough:
+            compuerta = g.pop("_admision", None)
+            if compuerta is not None:
+                liberar = _una_vez(compuerta.salir)
+                response.response = _hasta_terminar(response.response, liberar)
+                response.call_on_close(liberar)
+        return response
+
+    @app.teardown_request
+    def _liberar(error=None):
+        # Respuestas ya armadas (HTML, JSON, archivos) o rutas que lanzaron una excepción
+        compuerta = g.pop("_admision", None)
+        if compuerta is not None:
+            compuerta.salir()
+
+def _una_vez(funcion):
+    hecho = []
+    def envoltura():
+        if not hecho:
+            hecho.append(True)
+            funcion()
+    return envoltura
+
+def _hasta_terminar(cuerpo, liberar):
+    try:
+        yield from cuerpo
+    finally:
+        liberar()
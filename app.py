@@ -10,14 +10,27 @@
 # En esta sección importamos dependencias, inicializamos la base
 # de datos y declaramos utilidades de apoyo.
 # Importamos las clases y funciones que necesitamos de Flask
+import json
 import os
-from flask import Flask, render_template, request, redirect, flash, abort, jsonify, Response
-from database import init_db
+from flask import Blueprint, Flask, render_template, request, redirect, flash, abort, jsonify, Response, send_file
+import graficos_web
+from admision import init_admision
+from assets import init_assets
+import database
+from database import init_esquema, init_presupuesto_consultas, usar_snapshot
+from metricas import init_metricas
+from respuestas import filas_a_columnas, init_respuestas
 from models.categoria import Categoria
+from models.plantilla import Plantilla
 from models.tarea import Tarea
-# Creamos una instancia de la aplicación Flask
-# __name__ es una variable especial de Python que contiene el nombre del módulo
-app = Flask(__name__)
+from models.validacion import (
+    ESQUEMA_ENTRADA, OPCIONALES_EDICION, datos_desde_formulario, validar,
+    MAX_ID, validar_estado, validar_fecha, validar_horas, validar_limite, validar_plantilla
+)
+# Las rutas se declaran en un Blueprint ("tareas") y la aplicación se arma en
+# create_app(): importar este módulo (por ejemplo, para usar un modelo) no abre
+# la base ni crea nada. Ver config.py para las opciones.
+rutas = Blueprint("tareas", __name__)
 
 def requires_auth(f):
     def decorated(*args, **kwargs):
@@ -32,7 +45,50 @@ def requires_auth(f):
     decorated.__name__ = f.__name__
     return decorated
 
-init_db()
+def create_app(config=None, **opciones):
+    """
+    Crea y configura la aplicación Flask.
+
+    - `config`: clase u objeto de configuración (o su ruta, "config.PruebasConfig");
+      por defecto la que corresponde a ENVIRONMENT (config.config_por_entorno()).
+    - `opciones`: valores sueltos que reemplazan a los de `config` (DATABASE=..., TESTING=True).
+
+    El esquema de la base NO se toca aquí: se revisa en la primera petición de
+    cada proceso con PRAGMA user_version (una lectura si ya está al día).
+    """
+    from config import config_por_entorno
+
+    # __name__ es una variable especial de Python que contiene el nombre del módulo
+    app = Flask(__name__)
+    app.config.from_object(config or config_por_entorno())
+    app.config.update(opciones)
+    if app.config.get("DATABASE"):
+        database.DATABASE_NAME = app.config["DATABASE"]
+
+    # Antes que los demás ganchos: la primera petición encuentra la base lista
+    init_esquema(app, al_iniciar=app.config["ESQUEMA_AL_INICIAR"])
+    # Latencia por ruta, consultas SQL y Server-Timing; expone GET /metrics
+    init_metricas(app, proteger=requires_auth)
+    # Límite de peticiones a la vez por clase de ruta; 503 + Retry-After si la cola
+    # se llena (después de las métricas: el tiempo en cola cuenta en la latencia)
+    init_admision(app)
+    # Compresión gzip/brotli de respuestas grandes y JSON rápido (orjson si está instalado)
+    init_respuestas(app)
+    # Archivos estáticos con huella (static/dist/, generados con `python assets.py`)
+    init_assets(app)
+    # Presupuesto de consultas por endpoint (PRESUPUESTO_CONSULTAS en config.py)
+    init_presupuesto_consultas(app)
+    app.register_blueprint(rutas)
+
+    # Mantenimiento de SQLite en segundo plano. Con `gunicorn --preload` el hilo
+    # vive solo en el proceso principal (los hilos no sobreviven al fork)
+    if app.config["DB_MANTENIMIENTO_HORAS"]:
+        from mantenimiento import iniciar_mantenimiento_periodico
+        iniciar_mantenimiento_periodico(app.config["DB_MANTENIMIENTO_HORAS"], app.config["DB_RESPALDOS"])
+    # Snapshot para estadísticas, exportaciones y pandas, renovado en segundo plano
+    if app.config["SNAPSHOT_PERIODICO"]:
+        database.iniciar_refresco_snapshot()
+    return app
 
 # =============================================================================
 # ESQUEMATIZA TUS RUTAS CRUD - Crear, Leer, Actualizar, Eliminar
@@ -48,25 +104,210 @@ init_db()
 #   - GET  /eliminar/<id>           -> Elimina una tarea desde la interfaz
 #   - GET  /filtrar/<filtro>        -> Listado filtrado por categoría o estado
 #   - GET  /acerca                  -> Página "Acerca de"
+#   - GET  /api/tareas/exportar     -> Exportación NDJSON en streaming
+#   - GET  /api/estadisticas        -> Resumen por estado/prioridad/categoría
+#   - GET  /api/graficos/<nombre>   -> Gráfico PNG/SVG (prioridad, estado, creadas-por-dia, categoria-estado)
+#   - GET  /api/tareas/vencidas     -> Tareas no completadas con la fecha límite pasada
+#   - GET  /api/tareas/proximas     -> Tareas que vencen en las próximas N horas
+#   - GET  /api/recordatorios       -> Vencidas + próximas fechas límite (para avisos)
+#   - GET/POST /api/plantillas      -> Plantillas de tareas recurrentes
+#   - DELETE /api/plantilla/<id>    -> Elimina una plantilla y sus repeticiones futuras
+#   - GET  /metrics                 -> Métricas en formato Prometheus (metricas.py)
 
 # =============================================================================
 # API JSON - 'Endpoints' para Tarea (CRUD)
 # =============================================================================
-@app.route('/api/tareas', methods=["GET"])
+def incluir_archivadas():
+    """?include_archived=true en las lecturas: incluye las tareas de `tareas_archivo`."""
+    return request.args.get("include_archived", "").lower() in ("1", "true", "si", "sí")
+
+def numeros_de_listado(*nombres):
+    """?limite, ?desde_id y ?categoria_id validados (enteros >= 0 y con tope; ValueError si no).
+
+    Devuelve un dict {nombre: valor o None} con los `nombres` pedidos.
+    """
+    return {nombre: validar_limite(request.args.get(nombre)) if nombre == "limite"
+            else validar_limite(request.args.get(nombre), MAX_ID, nombre)
+            for nombre in nombres}
+
+def materializar_recurrentes():
+    """Crea las repeticiones de las plantillas hasta ?hasta=YYYY-MM-DD (o hoy + 14 días)."""
+    try:
+        hasta = validar_fecha(request.args.get("hasta"))
+    except ValueError:
+        hasta = None  # Una fecha inválida no impide listar
+    Plantilla.materializar(hasta)
+
+@rutas.route('/api/tareas', methods=["GET"])
 @requires_auth
 def api_tareas_index():
-    """API que devuelve todas las tareas en formato JSON limpio"""
-    registros = Tarea.get_all()
-    categorias = { cat['id']: cat['nombre'] for cat in Categoria.get_all() }
-    registros = [dict(fila) for fila in registros] # Convertir a diccionario
-    for fila in registros:
-        fila['categoria'] = categorias[fila['id_categoria']]
-    return jsonify(registros)
-
-@app.route('/api/tarea/<int:id>', methods=["GET", "PUT", "PATCH", "DELETE"])
+    """API que devuelve todas las tareas en formato JSON limpio.
+
+    Filtros opcionales por querystring: ?categoria_id=1&estado=pendiente&prioridad=alta
+    Paginación opcional por llave: ?desde_id=100&limite=50 (enteros >= 0 y con tope; si no, 400)
+    Completadas archivadas: ?include_archived=true
+    Formato compacto por columnas (llaves una sola vez): ?formato=columnas
+    Repeticiones de tareas recurrentes hasta una fecha (calendario): ?hasta=2025-07-31
+    Solo cambios desde una fecha (cachés incrementales): ?actualizadas_desde=2025-07-01 10:00:00
+      (con formato=columnas, la respuesta incluye "total_tareas" para detectar eliminaciones)
+    """
+    try:
+        numeros = numeros_de_listado("categoria_id", "desde_id", "limite")
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+    materializar_recurrentes()
+    actualizadas_desde = request.args.get("actualizadas_desde") or None
+    filtros = {
+        **numeros,
+        "estado": request.args.get("estado") or None,
+        "prioridad": request.args.get("prioridad") or None,
+        "incluir_archivadas": incluir_archivadas(),
+        "actualizadas_desde": actualizadas_desde,
+    }
+    if request.args.get("formato") == "columnas":
+        respuesta = filas_a_columnas(Tarea.with_categoria(**filtros))
+        if actualizadas_desde:
+            respuesta["total_tareas"] = Tarea.contar(incluir_archivadas())
+        return jsonify(respuesta)
+    # SQLite arma el JSON (json_object/json_group_array) por páginas y se envía
+    # tal cual, en streaming: sin un dict de Python por tarea. La primera página
+    # ya se leyó al llamar a json_con_categoria (un error de la base es un 500)
+    return Response(Tarea.json_con_categoria(**filtros), mimetype="application/json")
+
+@rutas.route('/api/tareas/exportar', methods=["GET"])
+@requires_auth
+def api_tareas_exportar():
+    """Exporta las tareas como NDJSON (una por línea) en streaming, por páginas de 1000.
+
+    Acepta los mismos filtros que /api/tareas. Lee del snapshot de solo lectura
+    (database.usar_snapshot) para no competir con las escrituras. En el modo ASGI
+    (app_asgi.py) esta ruta se atiende sin ocupar un hilo durante toda la descarga.
+    """
+    try:
+        numeros = numeros_de_listado("categoria_id", "desde_id")
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+    filtros = {
+        "categoria_id": numeros["categoria_id"],
+        "estado": request.args.get("estado") or None,
+        "prioridad": request.args.get("prioridad") or None,
+        "incluir_archivadas": incluir_archivadas(),
+    }
+    def generar(ultimo_id):
+        while True:
+            with usar_snapshot():
+                pagina = Tarea.with_categoria(desde_id=ultimo_id, limite=1000, **filtros)
+            if not pagina:
+                break
+            ultimo_id = pagina[-1]["id"]
+            yield "".join(json.dumps(dict(fila), ensure_ascii=False) + "\n" for fila in pagina)
+    return Response(generar(numeros["desde_id"] or 0), mimetype="application/x-ndjson")
+
+@rutas.route('/api/tareas/vencidas', methods=["GET"])
+@requires_auth
+def api_tareas_vencidas():
+    """Tareas vencidas (la más antigua primero). Opcional: ?limite=100"""
+    try:
+        limite = validar_limite(request.args.get("limite"))
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+    registros = Tarea.get_tareas_vencidas(limite)
+    return jsonify([dict(fila) for fila in registros])
+
+@rutas.route('/api/tareas/proximas', methods=["GET"])
+@requires_auth
+def api_tareas_proximas():
+    """Tareas que vencen en las próximas ?horas=24 (por fecha límite). Opcional: ?limite=100"""
+    try:
+        horas = validar_horas(request.args.get("horas"))
+        limite = validar_limite(request.args.get("limite"))
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+    registros = Tarea.get_tareas_proximas(horas, limite)
+    return jsonify([dict(fila) for fila in registros])
+
+@rutas.route('/api/recordatorios', methods=["GET"])
+@requires_auth
+def api_recordatorios():
+    """Las primeras ?limite=5 tareas vencidas y las 5 próximas fechas límite."""
+    try:
+        limite = validar_limite(request.args.get("limite"))
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+    recordatorios = Tarea.get_recordatorios(5 if limite is None else limite)
+    return jsonify({llave: [dict(fila) for fila in filas] for llave, filas in recordatorios.items()})
+
+@rutas.route('/api/estadisticas', methods=["GET"])
+@requires_auth
+def api_estadisticas():
+    """Resumen de tareas por estado, prioridad y categoría (desde el snapshot)."""
+    with usar_snapshot():
+        return jsonify(Tarea.estadisticas())
+
+@rutas.route('/api/graficos/<nombre>', methods=["GET"])
+@requires_auth
+def api_graficos(nombre):
+    """Gráfico como imagen: ?formato=png|svg, ?desde=YYYY-MM-DD&hasta=YYYY-MM-DD, ?include_archived=true.
+
+    Se dibuja una vez por cada cambio en la base y se sirve desde la caché en
+    disco (graficos_web.py). El ETag permite al navegador revalidar con un 304.
+    """
+    formato = request.args.get("formato", "png")
+    if nombre not in graficos_web.GRAFICOS or formato not in graficos_web.FORMATOS:
+        abort(404)
+    if not graficos_web.disponible():
+        return jsonify({"error": "matplotlib no está instalado"}), 503
+    try:
+        desde = validar_fecha(request.args.get("desde"))
+        hasta = validar_fecha(request.args.get("hasta"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    ruta, etag = graficos_web.obtener(nombre, formato, desde, hasta, incluir_archivadas())
+    respuesta = send_file(ruta, mimetype=graficos_web.FORMATOS[formato], etag=etag, conditional=True)
+    respuesta.cache_control.no_cache = True  # Guardar, pero revalidar siempre (cambia con cada escritura)
+    return respuesta
+
+# =============================================================================
+# API JSON - Plantillas de tareas recurrentes
+# =============================================================================
+@rutas.route('/api/plantillas', methods=["GET", "POST"])
+@requires_auth
+def api_plantillas():
+    """Lista (GET) o crea (POST) plantillas recurrentes.
+
+    Ejemplo de POST: {"nombre": "Regar", "categoria": "Casa", "regla": "semanal",
+    "dias_semana": [0, 3], "hora": "09:00"}. Las repeticiones se crean solas
+    a medida que el calendario o el listado piden fechas (Plantilla.materializar).
+    """
+    if request.method == "GET":
+        return jsonify([dict(fila) for fila in Plantilla.get_all()])
+    if not request.is_json:
+        return jsonify({"error": "Content-Type debe ser application/json"}), 400
+    data = request.get_json(silent=True) or {}
+
+    try:
+        datos = validar_plantilla(data)
+        datos["id_categoria"] = Categoria.get_or_create(datos.pop("categoria"))
+        new_id = Plantilla.create(**datos)
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+
+    Plantilla.materializar()
+    return jsonify(dict(Plantilla.get_by_id(new_id))), 201
+
+@rutas.route('/api/plantilla/<int:id>', methods=["DELETE"])
+@requires_auth
+def api_plantilla_delete(id):
+    if not Plantilla.get_by_id(id):
+        return jsonify({"error": "404: Plantilla no encontrada"}), 404
+    Plantilla.delete(id)
+    return ("", 204)
+
+@rutas.route('/api/tarea/<int:id>', methods=["GET", "PUT", "PATCH", "DELETE"])
 @requires_auth
 def api_tareas_show(id):
-    registro = Tarea.get_by_id(id)
+    # Las archivadas se pueden consultar (GET) pero no modificar
+    registro = Tarea.get_by_id(id, incluir_archivadas=request.method == "GET" and incluir_archivadas())
     if not registro:
         return jsonify({"error": "404: Tarea no encontrada"}), 404
     if request.method == "GET":
@@ -78,36 +319,26 @@ def api_tareas_show(id):
         return jsonify({"error": "Content-Type debe ser application/json"}), 400
     data = request.get_json(silent=True) or {}
 
-    nombre = str(data.get("nombre", "")).strip()
-    categoria = str(data.get("categoria", "")).strip()
-    fecha_limite = data.get("fecha_limite")
-    prioridad = data.get("prioridad")
-    tiempo_estimado = data.get("tiempo_estimado")
-
-    if nombre == "":
-        return jsonify({"error": "El nombre de la tarea es obligatorio"}), 400
-    if categoria == "":
-        return jsonify({"error": "Debes proporcionar una 'categoria' válida"}), 400
-
     try:
-        categoria_id = Categoria.get_or_create(categoria)
-        Tarea.update(id, nombre)
+        datos = validar(data, ESQUEMA_ENTRADA, opcionales=OPCIONALES_EDICION)
+        categoria_id = Categoria.get_or_create(datos["categoria"])
+        Tarea.update(id, datos["nombre"])
         Tarea.move_to_categoria(id, categoria_id)
         
         # Actualizar nuevos campos si se proporcionan
-        if fecha_limite is not None:
-            Tarea.set_fecha_limite(id, fecha_limite)
-        if prioridad is not None:
-            Tarea.set_prioridad(id, prioridad)
-        if tiempo_estimado is not None:
-            Tarea.set_tiempo_estimado(id, tiempo_estimado)
+        if "fecha_limite" in datos:
+            Tarea.set_fecha_limite(id, datos["fecha_limite"])
+        if "prioridad" in datos:
+            Tarea.set_prioridad(id, datos["prioridad"])
+        if "tiempo_estimado" in datos:
+            Tarea.set_tiempo_estimado(id, datos["tiempo_estimado"])
     except ValueError as err:
         return jsonify({"error": str(err)}), 400
 
     actualizado = Tarea.get_by_id(id)
     return jsonify(dict(actualizado))
 
-@app.route('/api/tarea/<int:id>/toggle-estado', methods=["POST", "PATCH"])
+@rutas.route('/api/tarea/<int:id>/toggle-estado', methods=["POST", "PATCH"])
 @requires_auth
 def api_tareas_toggle_estado(id):
     """Alterna el estado de la tarea (pendiente <-> completada) y devuelve el registro actualizado como JSON."""
@@ -120,35 +351,24 @@ def api_tareas_toggle_estado(id):
     return jsonify(dict(actualizado))
 
 
-@app.route('/api/tareas', methods=["POST"])
+@rutas.route('/api/tareas', methods=["POST"])
 @requires_auth
 def api_tareas_create():
     if not request.is_json:
         return jsonify({"error": "Content-Type debe ser application/json"}), 400
     data = request.get_json(silent=True) or {}
 
-    nombre = str(data.get("nombre", "")).strip()
-    if nombre == "":
-        return jsonify({"error": "El nombre de la tarea es obligatorio"}), 400
-    categoria = str(data.get("categoria", "")).strip()
-    if categoria == "":
-        return jsonify({"error": "Debes proporcionar una 'categoria' válida"}), 400
-    
-    # Nuevos campos opcionales
-    fecha_limite = data.get("fecha_limite")
-    prioridad = data.get("prioridad")
-    tiempo_estimado = data.get("tiempo_estimado")
-    estado = data.get("estado", "pendiente")
-    
     try:
-        categoria_id = Categoria.get_or_create(categoria)
+        datos = validar(data, ESQUEMA_ENTRADA)
+        estado = validar_estado(data.get("estado"))
+        categoria_id = Categoria.get_or_create(datos["categoria"])
         new_id = Tarea.create(
-            nombre=nombre, 
+            nombre=datos["nombre"], 
             id_categoria=categoria_id,
             estado=estado,
-            fecha_limite=fecha_limite,
-            prioridad=prioridad,
-            tiempo_estimado=tiempo_estimado
+            fecha_limite=datos["fecha_limite"],
+            prioridad=datos["prioridad"],
+            tiempo_estimado=datos["tiempo_estimado"]
         )
     except ValueError as err:
         return jsonify({"error": str(err)}), 400
@@ -156,38 +376,26 @@ def api_tareas_create():
     nueva = Tarea.get_by_id(new_id)
     return jsonify(dict(nueva)), 201
 
-@app.route("/")
+@rutas.route("/")
 @requires_auth
 def index():
-    registros = Tarea.get_all()
+    materializar_recurrentes()
+    registros = Tarea.with_categoria()
     return render_template("index.html", tareas=registros)
 
-@app.route("/crear", methods=["GET", "POST"])
+@rutas.route("/crear", methods=["GET", "POST"])
 @requires_auth
 def nueva_tarea():
     if request.method == "POST": # Verificamos si la petición es POST (envío de formulario)
-        nombre = request.form.get("title", "").strip()
-        categoria = request.form.get("categoria", "").strip()
-        fecha_limite = request.form.get("fecha_limite", "").strip() or None
-        prioridad = request.form.get("prioridad", "").strip() or None
-        tiempo_estimado = request.form.get("tiempo_estimado", "").strip() or None
-        
-        # Convertir tiempo_estimado a entero si se proporciona
-        if tiempo_estimado:
-            try:
-                tiempo_estimado = int(tiempo_estimado)
-            except ValueError:
-                flash("El tiempo estimado debe ser un número válido", "danger")
-                return redirect("/crear")
-        
         try:
-            categoria_id = Categoria.get_or_create(categoria)
+            datos = validar(datos_desde_formulario(request.form), ESQUEMA_ENTRADA)
+            categoria_id = Categoria.get_or_create(datos["categoria"])
             Tarea.create(
-                nombre=nombre, 
+                nombre=datos["nombre"], 
                 id_categoria=categoria_id,
-                fecha_limite=fecha_limite,
-                prioridad=prioridad,
-                tiempo_estimado=tiempo_estimado
+                fecha_limite=datos["fecha_limite"],
+                prioridad=datos["prioridad"],
+                tiempo_estimado=datos["tiempo_estimado"]
             )
         except ValueError as err:
             flash(str(err), "danger")
@@ -198,16 +406,15 @@ def nueva_tarea():
         categorias = Categoria.get_all()
         return render_template("formulario.html", categorias=categorias)
 
-@app.route('/tarea/<int:id>')
+@rutas.route('/tarea/<int:id>')
 @requires_auth
 def detalle(id): # CONSULTA EL DETALLE DE UNA TAREA ESPECÍFICA
-    tarea = Tarea.get_by_id(id)
+    tarea = Tarea.get_by_id_with_categoria(id, incluir_archivadas()) # Tarea + nombre de categoría en una sola consulta
     if not tarea:
         return render_template("404.html"), 404
-    categoria = Categoria.get_by_id(tarea["id_categoria"])
-    return render_template("tarea.html", tarea=tarea, categoria=categoria)
+    return render_template("tarea.html", tarea=tarea)
 
-@app.route('/tarea/<int:id>/toggle-estado', methods=["POST"])
+@rutas.route('/tarea/<int:id>/toggle-estado', methods=["POST"])
 @requires_auth
 def toggle_estado(id): # Alterna el estado de la tarea entre 'pendiente' y 'completada'
     tarea = Tarea.get_by_id(id)
@@ -217,7 +424,7 @@ def toggle_estado(id): # Alterna el estado de la tarea entre 'pendiente' y 'comp
     Tarea.set_estado(id, nuevo_estado)
     return redirect(f"/tarea/{id}")
 
-@app.route("/editar/<int:id>", methods=["GET", "POST"])
+@rutas.route("/editar/<int:id>", methods=["GET", "POST"])
 @requires_auth
 def editar(id): # EDITA Y ACTUALIZA UNA TAREA EXISTENTE
     tarea = Tarea.get_by_id(id)
@@ -230,32 +437,19 @@ def editar(id): # EDITA Y ACTUALIZA UNA TAREA EXISTENTE
         return api_tareas_show(id)
     
     if request.method == "POST":
-        nombre = request.form.get("title", "").strip()
-        categoria = request.form.get("categoria", "").strip()
-        fecha_limite = request.form.get("fecha_limite", "").strip() or None
-        prioridad = request.form.get("prioridad", "").strip() or None
-        tiempo_estimado = request.form.get("tiempo_estimado", "").strip() or None
-        
-        # Convertir tiempo_estimado a entero si se proporciona
-        if tiempo_estimado:
-            try:
-                tiempo_estimado = int(tiempo_estimado)
-            except ValueError:
-                flash("El tiempo estimado debe ser un número válido", "danger")
-                return redirect(f"/editar/{id}")
-        
         try:
-            categoria_id = Categoria.get_or_create(categoria)
-            Tarea.update(id, nombre)
+            datos = validar(datos_desde_formulario(request.form), ESQUEMA_ENTRADA, opcionales=OPCIONALES_EDICION)
+            categoria_id = Categoria.get_or_create(datos["categoria"])
+            Tarea.update(id, datos["nombre"])
             Tarea.move_to_categoria(id, categoria_id)
             
             # Actualizar nuevos campos
-            if fecha_limite is not None:
-                Tarea.set_fecha_limite(id, fecha_limite)
-            if prioridad is not None:
-                Tarea.set_prioridad(id, prioridad)
-            if tiempo_estimado is not None:
-                Tarea.set_tiempo_estimado(id, tiempo_estimado)
+            if "fecha_limite" in datos:
+                Tarea.set_fecha_limite(id, datos["fecha_limite"])
+            if "prioridad" in datos:
+                Tarea.set_prioridad(id, datos["prioridad"])
+            if "tiempo_estimado" in datos:
+                Tarea.set_tiempo_estimado(id, datos["tiempo_estimado"])
         except ValueError as err:
             flash(str(err), "danger")
             return redirect(f"/editar/{id}")
@@ -265,7 +459,7 @@ def editar(id): # EDITA Y ACTUALIZA UNA TAREA EXISTENTE
         categorias = Categoria.get_all()
         return render_template("editar.html", tarea=tarea, categorias=categorias)
 
-@app.route("/eliminar/<int:id>")
+@rutas.route("/eliminar/<int:id>")
 @requires_auth
 def eliminar(id): # ELIMINA UNA TAREA DESDE LA INTERFAZ
     tarea = Tarea.get_by_id(id)
@@ -273,17 +467,17 @@ def eliminar(id): # ELIMINA UNA TAREA DESDE LA INTERFAZ
         Tarea.delete(id)
     return redirect("/")
 
-@app.errorhandler(404)
+@rutas.app_errorhandler(404)
 @requires_auth
 def page_not_found(error):
     return render_template("404.html"), 404
 
-@app.route('/acerca')
+@rutas.route('/acerca')
 @requires_auth
 def acerca_de():
     return render_template("acerca.html")
 
-@app.route('/filtrar/<filtro>')
+@rutas.route('/filtrar/<filtro>')
 @requires_auth
 def tareas_filtradas(filtro):
     # Obtenemos todas las tareas desde la base de datos
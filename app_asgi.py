@@ -0,0 +1,363 @@
+# =============================================================================
+# MODO ASGI - API ASÍNCRONA CON SQLITE EN UN POOL DE HILOS
+# =============================================================================
+# `app.wsgi` sirve la app Flask de forma síncrona: cada hilo del worker queda
+# bloqueado mientras SQLite lee, y una exportación larga ocupa un worker entero.
+#
+# Este módulo expone una aplicación ASGI:
+#   - Las lecturas de /api/* (listado, detalle, toggle, estadísticas y exportación)
+#     se atienden con corrutinas; el trabajo de SQLite se envía a un pool de
+#     hilos acotado (DB_HILOS) y el event loop sigue atendiendo otras conexiones.
+#   - Todo lo demás (HTML, formularios, POST/PUT/DELETE de la API) se delega a
+#     la app Flask existente mediante asgiref.WsgiToAsgi, en su propio pool de
+#     hilos (ASGI_FLASK_HILOS): asgiref por defecto corre TODAS las peticiones
+#     delegadas en un solo hilo compartido (thread_sensitive=True).
+#   - Las rutas nativas pasan por lo mismo que en Flask: control de admisión
+#     (admision.py), métricas y Server-Timing (metricas.py) y presupuesto de
+#     consultas (database.revisar_presupuesto). Se reconocen con el url_map
+#     de Flask, así el endpoint y la regla son los mismos en los dos modos.
+#
+# Ejecutar:
+#   uvicorn app_asgi:application --workers 2
+# =============================================================================
+import asyncio
+import base64
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from time import perf_counter
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgiInstance
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+
+import admision
+import metricas
+from app import create_app
+from database import (
+    RegistroConsultas, asegurar_esquema, contar_consultas_en, presupuesto_activo, revisar_presupuesto,
+    usar_snapshot
+)
+from models.plantilla import Plantilla
+from models.tarea import Tarea
+from models.validacion import MAX_ID, validar_fecha, validar_limite
+from respuestas import MINIMO_BYTES, CompresorStream, comprimir, dumps, elegir_codificacion, filas_a_columnas
+
+DB_HILOS = int(os.environ.get("ASGI_DB_HILOS", "8"))
+FLASK_HILOS = int(os.environ.get("ASGI_FLASK_HILOS", "16"))
+TAMANO_PAGINA_EXPORTACION = 1000
+
+_pool_db = ThreadPoolExecutor(max_workers=DB_HILOS, thread_name_prefix="sqlite")
+_pool_flask = ThreadPoolExecutor(max_workers=FLASK_HILOS, thread_name_prefix="flask")
+flask_app = create_app()
+_limite_db = None  # asyncio.Semaphore; se crea dentro del event loop
+_peticion = contextvars.ContextVar("peticion_asgi", default=None)  # _Peticion de la ruta nativa en curso
+
+
+# La versión síncrona de WsgiToAsgiInstance.run_wsgi_app, corriendo en _pool_flask
+_correr_wsgi = sync_to_async(WsgiToAsgiInstance.__dict__["run_wsgi_app"].__wrapped__,
+                             thread_sensitive=False, executor=_pool_flask)
+
+class _InstanciaFlask(WsgiToAsgiInstance):
+    """Una petición delegada a Flask, atendida en _pool_flask.
+
+    WsgiToAsgiInstance.run_wsgi_app usa sync_to_async con thread_sensitive=True:
+    todas las peticiones delegadas se atenderían de a una en el mismo hilo.
+    """
+
+    async def run_wsgi_app(self, body):
+        await _correr_wsgi(self, body)
+
+async def _flask(scope, receive, send):
+    await _InstanciaFlask(flask_app)(scope, receive, send)
+
+
+class _Peticion:
+    """Lo que una ruta nativa lleva de su petición: endpoint, regla, inicio y consultas."""
+
+    def __init__(self, metodo, endpoint, regla):
+        self.metodo = metodo
+        self.endpoint = endpoint
+        self.regla = regla
+        self.inicio = perf_counter()
+        self.registro = RegistroConsultas()
+
+    def encabezados(self):
+        """X-Consultas-SQL y Server-Timing con lo medido hasta ahora (como en Flask)."""
+        total = perf_counter() - self.inicio
+        timing = metricas.server_timing(self.registro.total, self.registro.segundos, 0.0, 0.0, total)
+        return [(b"x-consultas-sql", str(self.registro.total).encode()), (b"server-timing", timing.encode())]
+
+def _encabezados_peticion():
+    peticion = _peticion.get()
+    return peticion.encabezados() if peticion is not None else []
+
+
+def _en_base(registro, funcion, *args, **kwargs):
+    """Ejecuta `funcion` en el hilo del pool, con el esquema ya revisado.
+
+    Las rutas nativas no pasan por los before_request de Flask: la primera
+    consulta de cada proceso revisa PRAGMA user_version aquí. Las consultas
+    de `funcion` se suman al registro de la petición (si hay una).
+    """
+    asegurar_esquema()
+    if registro is None:
+        return funcion(*args, **kwargs)
+    with contar_consultas_en(registro):
+        return funcion(*args, **kwargs)
+
+def _desde_snapshot(funcion, *args, **kwargs):
+    """Ejecuta `funcion` leyendo del snapshot de solo lectura (en el hilo del pool)."""
+    with usar_snapshot():
+        return funcion(*args, **kwargs)
+
+async def en_hilo_db(funcion, *args, **kwargs):
+    """Ejecuta una función de los modelos en el pool de SQLite sin bloquear el loop.
+
+    El semáforo acota el trabajo en vuelo al tamaño del pool: las peticiones
+    excedentes esperan como corrutinas (baratas) y no como hilos bloqueados.
+    """
+    global _limite_db
+    if _limite_db is None:
+        _limite_db = asyncio.Semaphore(DB_HILOS)
+    peticion = _peticion.get()
+    registro = peticion.registro if peticion is not None else None
+    async with _limite_db:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_pool_db, partial(_en_base, registro, funcion, *args, **kwargs))
+
+# -----------------------------------------------------------------------------
+# Utilidades HTTP
+# -----------------------------------------------------------------------------
+def _autorizado(scope):
+    """Misma regla que `requires_auth` en app.py (Basic Auth solo en producción)."""
+    if os.environ.get("ENVIRONMENT") != "production":
+        return True
+    headers = dict(scope.get("headers") or [])
+    valor = headers.get(b"authorization", b"").decode("latin-1")
+    if not valor.lower().startswith("basic "):
+        return False
+    try:
+        usuario, _, clave = base64.b64decode(valor[6:]).decode("utf-8").partition(":")
+    except ValueError:
+        return False
+    return usuario == os.environ.get("USERNAME") and clave == os.environ.get("PASSWORD")
+
+def _codificacion(scope):
+    """gzip/br según Accept-Encoding (misma negociación que respuestas.py en Flask)."""
+    headers = dict(scope.get("headers") or [])
+    return elegir_codificacion(headers.get(b"accept-encoding", b"").decode("latin-1"))
+
+async def _responder(scope, send, estado, cuerpo, tipo=b"application/json", extra=()):
+    extra = [*extra, (b"vary", b"Accept-Encoding"), *_encabezados_peticion()]
+    codificacion = _codificacion(scope)
+    if codificacion and len(cuerpo) >= MINIMO_BYTES:
+        cuerpo = comprimir(cuerpo, codificacion)
+        extra.append((b"content-encoding", codificacion.encode()))
+    await send({
+        "type": "http.response.start",
+        "status": estado,
+        "headers": [(b"content-type", tipo), (b"content-length", str(len(cuerpo)).encode()), *extra],
+    })
+    await send({"type": "http.response.body", "body": cuerpo})
+
+async def _enviar_trozos(scope, send, siguiente, tipo):
+    """Respuesta en streaming: llama a `siguiente()` en el pool hasta que devuelva None."""
+    codificacion = _codificacion(scope)
+    headers = [(b"content-type", tipo), (b"vary", b"Accept-Encoding"), *_encabezados_peticion()]
+    if codificacion:
+        headers.append((b"content-encoding", codificacion.encode()))
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    compresor = CompresorStream(codificacion) if codificacion else None
+    while (cuerpo := await en_hilo_db(siguiente)) is not None:
+        if compresor:
+            cuerpo = compresor.comprimir(cuerpo)
+        await send({"type": "http.response.body", "body": cuerpo, "more_body": True})
+    await send({"type": "http.response.body", "body": compresor.terminar() if compresor else b""})
+
+async def _json(scope, send, datos, estado=200):
+    await _responder(scope, send, estado, dumps(datos))
+
+def _parametro_texto(params, nombre):
+    return params.get(nombre, [None])[0] or None
+
+def _numeros_de_listado(params, *nombres):
+    """Misma regla que `numeros_de_listado` en app.py (ValueError -> 400)."""
+    return {nombre: validar_limite(_parametro_texto(params, nombre)) if nombre == "limite"
+            else validar_limite(_parametro_texto(params, nombre), MAX_ID, nombre)
+            for nombre in nombres}
+
+def _incluir_archivadas(params):
+    """Misma regla que `incluir_archivadas` en app.py (?include_archived=true)."""
+    return (_parametro_texto(params, "include_archived") or "").lower() in ("1", "true", "si", "sí")
+
+# -----------------------------------------------------------------------------
+# Rutas asíncronas
+# -----------------------------------------------------------------------------
+def _materializar_recurrentes(params):
+    """Misma regla que `materializar_recurrentes` en app.py (?hasta=YYYY-MM-DD)."""
+    try:
+        hasta = validar_fecha(_parametro_texto(params, "hasta"))
+    except ValueError:
+        hasta = None
+    return Plantilla.materializar(hasta)
+
+async def api_tareas_index(scope, receive, send, params):
+    try:
+        numeros = _numeros_de_listado(params, "categoria_id", "desde_id", "limite")
+    except ValueError as err:
+        return await _json(scope, send, {"error": str(err)}, 400)
+    await en_hilo_db(_materializar_recurrentes, params)
+    actualizadas_desde = _parametro_texto(params, "actualizadas_desde")
+    filtros = {
+        **numeros,
+        "estado": _parametro_texto(params, "estado"),
+        "prioridad": _parametro_texto(params, "prioridad"),
+        "incluir_archivadas": _incluir_archivadas(params),
+        "actualizadas_desde": actualizadas_desde,
+    }
+    if _parametro_texto(params, "formato") == "columnas":
+        respuesta = filas_a_columnas(await en_hilo_db(Tarea.with_categoria, **filtros))
+        if actualizadas_desde:
+            respuesta["total_tareas"] = await en_hilo_db(Tarea.contar, _incluir_archivadas(params))
+        return await _json(scope, send, respuesta)
+    # Cada trozo (una página armada por SQLite) se pide al pool por separado:
+    # entre página y página el loop atiende otras peticiones. La primera página
+    # se lee antes de enviar el 200 (si la base falla, no queda una respuesta a medias)
+    trozos = await en_hilo_db(Tarea.json_con_categoria, **filtros)
+    await _enviar_trozos(scope, send, lambda: next(trozos, None), b"application/json")
+
+async def api_tareas_show(scope, receive, send, params, id):
+    registro = await en_hilo_db(Tarea.get_by_id, id, _incluir_archivadas(params))
+    if not registro:
+        return await _json(scope, send, {"error": "404: Tarea no encontrada"}, 404)
+    await _json(scope, send, dict(registro))
+
+async def api_tareas_toggle_estado(scope, receive, send, params, id):
+    registro = await en_hilo_db(Tarea.get_by_id, id)
+    if not registro:
+        return await _json(scope, send, {"error": "404: Tarea no encontrada"}, 404)
+    nuevo_estado = "pendiente" if registro["estado"] == "completada" else "completada"
+    await en_hilo_db(Tarea.set_estado, id, nuevo_estado)
+    actualizado = await en_hilo_db(Tarea.get_by_id, id)
+    await _json(scope, send, dict(actualizado))
+
+async def api_tareas_exportar(scope, receive, send, params):
+    """Exporta las tareas como NDJSON (una tarea por línea) en streaming.
+
+    Lee páginas de TAMANO_PAGINA_EXPORTACION por llave (id > último) del snapshot
+    de solo lectura, en el pool; entre página y página el loop atiende otras
+    peticiones. Si el cliente se desconecta, uvicorn hace fallar `send` y la
+    exportación se detiene.
+    """
+    try:
+        numeros = _numeros_de_listado(params, "categoria_id", "desde_id")
+    except ValueError as err:
+        return await _json(scope, send, {"error": str(err)}, 400)
+    codificacion = _codificacion(scope)
+    headers = [(b"content-type", b"application/x-ndjson; charset=utf-8"), (b"vary", b"Accept-Encoding"),
+               *_encabezados_peticion()]
+    if codificacion:
+        headers.append((b"content-encoding", codificacion.encode()))
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    filtros = {
+        "categoria_id": numeros["categoria_id"],
+        "estado": _parametro_texto(params, "estado"),
+        "prioridad": _parametro_texto(params, "prioridad"),
+        "incluir_archivadas": _incluir_archivadas(params),
+    }
+    ultimo_id = numeros["desde_id"] or 0
+    compresor = CompresorStream(codificacion) if codificacion else None
+    while True:
+        pagina = await en_hilo_db(_desde_snapshot, Tarea.with_categoria, desde_id=ultimo_id,
+                                  limite=TAMANO_PAGINA_EXPORTACION, **filtros)
+        if not pagina:
+            break
+        ultimo_id = pagina[-1]["id"]
+        cuerpo = b"".join(dumps(dict(fila)) + b"\n" for fila in pagina)
+        if compresor:
+            cuerpo = compresor.comprimir(cuerpo)
+        await send({"type": "http.response.body", "body": cuerpo, "more_body": True})
+    await send({"type": "http.response.body", "body": compresor.terminar() if compresor else b""})
+
+async def api_estadisticas(scope, receive, send, params):
+    await _json(scope, send, await en_hilo_db(_desde_snapshot, Tarea.estadisticas))
+
+# (método, endpoint de Flask) -> corrutina. Las demás combinaciones van a Flask
+NATIVAS = {
+    ("GET", "tareas.api_tareas_index"): api_tareas_index,
+    ("GET", "tareas.api_tareas_exportar"): api_tareas_exportar,
+    ("GET", "tareas.api_estadisticas"): api_estadisticas,
+    ("GET", "tareas.api_tareas_show"): api_tareas_show,
+    ("POST", "tareas.api_tareas_toggle_estado"): api_tareas_toggle_estado,
+    ("PATCH", "tareas.api_tareas_toggle_estado"): api_tareas_toggle_estado,
+}
+
+def _ruta_nativa(scope):
+    """(regla, argumentos, corrutina) si la petición la atiende una ruta nativa; si no, None."""
+    adaptador = flask_app.url_map.bind("localhost")
+    try:
+        regla, argumentos = adaptador.match(scope["path"], scope["method"], return_rule=True)
+    except (HTTPException, RequestRedirect):
+        return None  # 404, 405, redirección: que responda Flask
+    funcion = NATIVAS.get((scope["method"], regla.endpoint))
+    return (regla, argumentos, funcion) if funcion is not None else None
+
+async def _rechazar(scope, send, compuerta):
+    """503 con Retry-After, como admision._rechazar en Flask."""
+    segundos = compuerta.reintentar_en()
+    await _responder(scope, send, 503, dumps({"error": f"503: Servidor ocupado, intenta de nuevo en {segundos} s"}),
+                     extra=[(b"retry-after", str(segundos).encode())])
+
+async def _atender_nativa(scope, receive, send, regla, argumentos, funcion):
+    """Ruta nativa con los mismos ganchos que Flask: admisión, métricas y presupuesto de consultas."""
+    compuerta = None
+    compuertas = admision.compuertas()
+    if compuertas:
+        rutas = flask_app.config.get("ADMISION_RUTAS", {})
+        compuerta = compuertas[rutas.get(regla.endpoint, flask_app.config["ADMISION_CLASE_DEFECTO"])]
+        # entrar() puede esperar un lugar (Condition.wait): fuera del event loop
+        if not await asyncio.to_thread(compuerta.entrar):
+            return await _rechazar(scope, send, compuerta)
+    peticion = _Peticion(scope["method"], regla.endpoint, regla.rule)
+    token = _peticion.set(peticion)
+    try:
+        params = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        await funcion(scope, receive, send, params, **argumentos)
+    finally:
+        _peticion.reset(token)
+        if compuerta is not None:
+            compuerta.salir()
+        metricas.registrar_peticion(peticion.metodo, peticion.regla, perf_counter() - peticion.inicio,
+                                    peticion.registro.total, peticion.registro.segundos)
+    if presupuesto_activo(flask_app):
+        revisar_presupuesto(flask_app, peticion.registro, peticion.endpoint)
+
+# -----------------------------------------------------------------------------
+# Aplicación ASGI
+# -----------------------------------------------------------------------------
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            mensaje = await receive()
+            if mensaje["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif mensaje["type"] == "lifespan.shutdown":
+                _pool_db.shutdown(wait=False)
+                _pool_flask.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] == "http":
+        nativa = _ruta_nativa(scope)
+        if nativa is not None:
+            if not _autorizado(scope):
+                return await _responder(scope, send, 401, "Acceso denegado".encode("utf-8"), b"text/plain; charset=utf-8",
+                                        [(b"www-authenticate", b'Basic realm="Login"')])
+            return await _atender_nativa(scope, receive, send, *nativa)
+
+    # Cualquier otra ruta: la app Flask de siempre
+    await _flask(scope, receive, send)
@@ -0,0 +1,182 @@
+# assets.py
+"""
+Pipeline de archivos estáticos: un bundle de JS minificado y nombres con huella (hash).
+
+Sin este paso, cada página pide por separado funciones-generales.js, tareas.js,
+calendario.js, app.js y los íconos, y el navegador los revalida en cada visita.
+
+`python assets.py` genera `static/dist/`:
+  - app.<hash>.js: los scripts de SCRIPTS_APP, en orden, sin comentarios ni
+    sangrías (se conservan los saltos de línea, así no cambia el significado).
+  - Una copia con huella de cada ícono, SVG y el webmanifest (con sus rutas
+    internas reescritas).
+  - manifest.json: {"nombre original": "/static/dist/nombre.<hash>.ext"}.
+
+La huella cambia solo si cambia el contenido, por eso `init_assets` sirve
+`/static/dist/` con `Cache-Control: immutable` de un año: en visitas repetidas
+el navegador no vuelve a pedir nada. Las plantillas usan `asset("favicon.svg")`
+y `scripts_app()`; si no hay manifest (desarrollo), apuntan a los archivos
+originales de `static/`.
+"""
+import hashlib
+import json
+import os
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+STATIC = os.path.join(RAIZ, "static")
+DIST = os.path.join(STATIC, "dist")
+MANIFEST = os.path.join(DIST, "manifest.json")
+
+# Orden de carga (el mismo que tenía layout.html)
+SCRIPTS_APP = ["funciones-generales.js", "tareas.js", "calendario.js", "app.js"]
+BUNDLE = "app.js"  # Nombre lógico del bundle en el manifest ("bundle:app.js")
+# Archivos que se copian con huella; el webmanifest va al final para reescribir sus íconos
+ARCHIVOS = [
+    "favicon-96x96.png", "favicon.svg", "favicon.ico", "apple-touch-icon.png",
+    "rutina.py-logo.svg", "web-app-manifest-192x192.png", "web-app-manifest-512x512.png",
+    "site.webmanifest",
+]
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+
+# -----------------------------------------------------------------------------
+# Minificación conservadora de JS
+# -----------------------------------------------------------------------------
+def minificar_js(codigo):
+    """Quita comentarios, sangrías y líneas vacías sin tocar cadenas ni plantillas.
+
+    Respeta '...', "..." y `...`; reconoce expresiones regulares literales por
+    el carácter anterior. Conserva un salto de línea donde había uno, así la
+    inserción automática de punto y coma de JS sigue igual.
+    """
+    salida = []
+    i, n = 0, len(codigo)
+    anterior = ""  # Último carácter significativo escrito (para distinguir / de regex)
+    while i < n:
+        c = codigo[i]
+        siguiente = codigo[i + 1] if i + 1 < n else ""
+        if c in "'\"`":
+            fin = i + 1
+            while fin < n and codigo[fin] != c:
+                fin += 2 if codigo[fin] == "\\" else 1
+            salida.append(codigo[i:fin + 1])
+            anterior = c
+            i = fin + 1
+        elif c == "/" and siguiente == "/":
+            while i < n and codigo[i] != "\n":
+                i += 1
+        elif c == "/" and siguiente == "*":
+            fin = codigo.find("*/", i + 2)
+            i = n if fin == -1 else fin + 2
+            salida.append(" ")
+        elif c == "/" and (anterior == "" or anterior in "(,=:[!&|?{};+-*%<>~^"):
+            fin, en_clase = i + 1, False  # Regex literal: /.../flags
+            while fin < n and (codigo[fin] != "/" or en_clase):
+                if codigo[fin] == "\\":
+                    fin += 1
+                elif codigo[fin] == "[":
+                    en_clase = True
+                elif codigo[fin] == "]":
+                    en_clase = False
+                fin += 1
+            salida.append(codigo[i:fin + 1])
+            anterior = "/"
+            i = fin + 1
+        else:
+            salida.append(c)
+            if not c.isspace() or c == "\n":
+                anterior = c
+            i += 1
+    lineas = (linea.strip() for linea in "".join(salida).splitlines())
+    return "\n".join(linea for linea in lineas if linea) + "\n"
+
+# -----------------------------------------------------------------------------
+# Construcción
+# -----------------------------------------------------------------------------
+def _huella(contenido):
+    return hashlib.sha256(contenido).hexdigest()[:12]
+
+def _escribir_con_huella(nombre, contenido):
+    base, extension = os.path.splitext(nombre)
+    final = f"{base}.{_huella(contenido)}{extension}"
+    with open(os.path.join(DIST, final), "wb") as archivo:
+        archivo.write(contenido)
+    return f"/static/dist/{final}"
+
+def construir(informar=print):
+    """Genera static/dist/ y su manifest.json. Devuelve el manifest (dict)."""
+    os.makedirs(DIST, exist_ok=True)
+    for viejo in os.listdir(DIST):  # Sin restos de builds anteriores
+        os.remove(os.path.join(DIST, viejo))
+
+    manifest = {}
+    partes = []
+    tamano_original = 0
+    for nombre in SCRIPTS_APP:
+        with open(os.path.join(STATIC, nombre), encoding="utf-8") as archivo:
+            codigo = archivo.read()
+        tamano_original += len(codigo.encode("utf-8"))
+        partes.append(f"/* {nombre} */\n{minificar_js(codigo)};")
+    bundle = "\n".join(partes).encode("utf-8")
+    manifest[f"bundle:{BUNDLE}"] = _escribir_con_huella(BUNDLE, bundle)
+    if informar:
+        informar(f" * {manifest['bundle:' + BUNDLE]}: {tamano_original} -> {len(bundle)} bytes "
+                 f"({len(SCRIPTS_APP)} scripts en 1)")
+
+    for nombre in ARCHIVOS:
+        with open(os.path.join(STATIC, nombre), "rb") as archivo:
+            contenido = archivo.read()
+        if nombre.endswith(".webmanifest"):
+            texto = contenido.decode("utf-8")
+            for original, con_huella in manifest.items():
+                texto = texto.replace(f'"/{original}"', f'"{con_huella}"')
+                texto = texto.replace(f'"/static/{original}"', f'"{con_huella}"')
+            contenido = texto.encode("utf-8")
+        manifest[nombre] = _escribir_con_huella(nombre, contenido)
+
+    with open(MANIFEST, "w", encoding="utf-8") as archivo:
+        json.dump(manifest, archivo, indent=2)
+    if informar:
+        informar(f" * {len(manifest)} archivos con huella en {DIST}")
+    return manifest
+
+# -----------------------------------------------------------------------------
+# Integración con Flask
+# -----------------------------------------------------------------------------
+def cargar_manifest():
+    try:
+        with open(MANIFEST, encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return {}
+
+def init_assets(app):
+    """Registra `asset()` y `scripts_app()` en Jinja y el Cache-Control de static/dist/.
+
+    El manifest se lee una vez al arrancar; tras `python assets.py` hay que
+    reiniciar la app (como en cualquier despliegue).
+    """
+    from flask import request
+
+    manifest = cargar_manifest()
+
+    def asset(nombre):
+        """URL con huella de un archivo de static/, o la original si no hay build."""
+        return manifest.get(nombre, f"/static/{nombre}")
+
+    def scripts_app():
+        """URLs de los scripts de la app: el bundle si existe, o los archivos sueltos."""
+        if f"bundle:{BUNDLE}" in manifest:
+            return [manifest[f"bundle:{BUNDLE}"]]
+        return [f"/static/{nombre}" for nombre in SCRIPTS_APP]
+
+    app.jinja_env.globals.update(asset=asset, scripts_app=scripts_app)
+
+    @app.after_request
+    def cache_inmutable(response):
+        if request.path.startswith("/static/dist/") and response.status_code == 200:
+            response.headers["Cache-Control"] = CACHE_INMUTABLE
+        return response
+
+
+if __name__ == "__main__":
+    construir()
@@ -0,0 +1,89 @@
+"""Presupuesto de arranque: cuánto cuesta importar la app y levantar un worker.
+
+Cada medición corre en un intérprete nuevo (como un worker de gunicorn recién
+creado) contra una base temporal ya al día, y mide `import app`,
+`create_app()` y la revisión del esquema de la primera petición.
+
+Que arrancar no toque la base (y que en una base al día solo se lea
+PRAGMA user_version) lo revisa tests/test_arranque.py; aquí solo se miden
+tiempos.
+
+Uso:
+    python benchmarks/arranque.py
+    python benchmarks/arranque.py --import-ms 800 --app-ms 200 --repeticiones 5
+
+Termina con código 1 si alguna medición (la mediana) supera su presupuesto.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Se ejecuta en un proceso nuevo; imprime un JSON con los tiempos y revisiones
+PROCESO = r"""
+import json, sys, time
+sys.path.insert(0, {raiz!r})
+ruta = {ruta!r}
+inicio = time.perf_counter()
+import app as modulo_app
+t_import = time.perf_counter() - inicio
+
+inicio = time.perf_counter()
+app = modulo_app.create_app(DATABASE=ruta)
+t_app = time.perf_counter() - inicio
+
+import database
+inicio = time.perf_counter()
+with app.app_context():
+    database.asegurar_esquema()
+t_esquema = time.perf_counter() - inicio
+print(json.dumps({{"import": t_import, "app": t_app, "esquema": t_esquema}}))
+"""
+
+
+def medir(ruta):
+    codigo = PROCESO.format(raiz=RAIZ, ruta=ruta)
+    salida = subprocess.run([sys.executable, "-c", codigo], check=True, capture_output=True, text=True,
+                            cwd=tempfile.gettempdir()).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de arranque de la app")
+    parser.add_argument("--import-ms", type=float, default=500, help="Máximo para `import app`")
+    parser.add_argument("--app-ms", type=float, default=100, help="Máximo para create_app()")
+    parser.add_argument("--esquema-ms", type=float, default=20,
+                        help="Máximo para revisar el esquema de una base ya al día")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    ruta = os.path.join(tempfile.mkdtemp(prefix="rutina-arranque-"), "arranque.sqlite")
+    errores = []
+
+    # 1) Base nueva: la primera petición aplica el esquema
+    primero = medir(ruta)
+    print(f" * Base nueva: esquema creado en {primero['esquema'] * 1000:.1f} ms")
+
+    # 2) Workers siguientes: base ya al día
+    mediciones = [medir(ruta) for _ in range(args.repeticiones)]
+    presupuestos = (("import", args.import_ms), ("app", args.app_ms), ("esquema", args.esquema_ms))
+    for llave, maximo in presupuestos:
+        mediana = statistics.median(medicion[llave] for medicion in mediciones) * 1000
+        estado = "ok" if mediana <= maximo else "EXCEDIDO"
+        print(f" * {llave:<8} mediana {mediana:8.1f} ms (presupuesto {maximo:.0f} ms) {estado}")
+        if mediana > maximo:
+            errores.append(f"{llave}: {mediana:.1f} ms > {maximo:.0f} ms")
+
+    for error in errores:
+        print(f" ! {error}")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""Benchmark reproducible de la API Flask y las vistas principales.
+
+Siembra una base SQLite temporal con N tareas, ejecuta las rutas reales
+(con el cliente de pruebas de Flask o con un servidor WSGI local) bajo
+concurrencia y guarda latencias p50/p95/p99, throughput y RSS máximo en JSON.
+
+Uso:
+    python benchmarks/bench_api.py --tamano 1k --modo cliente
+    python benchmarks/bench_api.py --tamano 100k --modo wsgi --concurrencia 16
+    python benchmarks/bench_api.py --tamano 1k --salida actual.json --base base.json
+
+Para comparar el despliegue WSGI actual con el modo ASGI (app_asgi.py):
+    python benchmarks/bench_api.py --tamano 100k --modo wsgi --salida wsgi.json
+    python benchmarks/bench_api.py --tamano 100k --modo asgi --salida asgi.json --base wsgi.json
+
+Con --base compara contra un resultado previo y termina con código 1 si
+alguna ruta empeora su p95 más allá de --tolerancia (por defecto 20%).
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Permite ejecutar el script desde cualquier carpeta
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks import generar_datos  # noqa: E402
+
+TAMANOS = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+LISTADOS = ("GET /api/tareas", "GET /api/tareas/exportar", "GET /")
+
+# ----------------------------------------------------------------------
+# Preparación de datos
+# ----------------------------------------------------------------------
+def sembrar(ruta_db, total, semilla=42):
+    """Crea el esquema en `ruta_db` y lo llena con `total` tareas sintéticas."""
+    generar_datos.generar(ruta_db, total, semilla=semilla)
+
+# ----------------------------------------------------------------------
+# Escenarios: (nombre, método, ruta, cuerpo JSON, datos de formulario)
+# ----------------------------------------------------------------------
+def escenarios(total):
+    aleatorio = random.Random(7)
+    def id_azar():
+        return aleatorio.randint(1, total)
+    return [
+        ("GET /api/tareas", lambda: ("GET", "/api/tareas", None, None)),
+        ("GET /api/tareas/exportar", lambda: ("GET", "/api/tareas/exportar", None, None)),
+        ("GET /api/tarea/<id>", lambda: ("GET", f"/api/tarea/{id_azar()}", None, None)),
+        ("POST /api/tarea/<id>/toggle-estado", lambda: ("POST", f"/api/tarea/{id_azar()}/toggle-estado", None, None)),
+        ("POST /api/tareas", lambda: ("POST", "/api/tareas", {"nombre": "Benchmark", "categoria": "trabajo", "prioridad": "alta"}, None)),
+        ("GET /", lambda: ("GET", "/", None, None)),
+        ("POST /crear", lambda: ("POST", "/crear", None, {"title": "Benchmark", "categoria": "personal"})),
+    ]
+
+# ----------------------------------------------------------------------
+# Clientes
+# ----------------------------------------------------------------------
+def crear_cliente_flask(app):
+    """Cada hilo usa su propio test_client (no comparten cookies ni estado)."""
+    locales = threading.local()
+    def enviar(metodo, ruta, cuerpo, formulario):
+        if not hasattr(locales, "cliente"):
+            locales.cliente = app.test_client()
+        respuesta = locales.cliente.open(ruta, method=metodo, json=cuerpo, data=formulario)
+        respuesta.get_data()
+        return respuesta.status_code
+    return enviar
+
+def crear_cliente_http(base_url):
+    def enviar(metodo, ruta, cuerpo, formulario):
+        datos = None
+        headers = {}
+        if cuerpo is not None:
+            datos = json.dumps(cuerpo).encode()
+            headers["Content-Type"] = "application/json"
+        elif formulario is not None:
+            datos = urllib.parse.urlencode(formulario).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        peticion = urllib.request.Request(base_url + ruta, data=datos, headers=headers, method=metodo)
+        try:
+            with urllib.request.urlopen(peticion) as respuesta:
+                respuesta.read()
+                return respuesta.status
+        except urllib.error.HTTPError as err:
+            return err.code
+    return enviar
+
+def iniciar_servidor_wsgi(app):
+    """Levanta un servidor WSGI con hilos en un puerto libre y devuelve (servidor, url)."""
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # Sin una línea de log por petición
+    servidor = make_server("127.0.0.1", 0, app, threaded=True)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    return servidor, f"http://127.0.0.1:{servidor.server_port}"
+
+def iniciar_servidor_asgi(app_asgi):
+    """Levanta uvicorn (modo ASGI de app_asgi.py) en un hilo y devuelve (servidor, url)."""
+    import socket
+    import uvicorn
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        puerto = sock.getsockname()[1]
+    servidor = uvicorn.Server(uvicorn.Config(app_asgi, host="127.0.0.1", port=puerto, log_level="warning"))
+    hilo = threading.Thread(target=servidor.run, daemon=True)
+    hilo.start()
+    while not servidor.started:
+        time.sleep(0.01)
+    return servidor, f"http://127.0.0.1:{puerto}"
+
+def detener_servidor(servidor):
+    if hasattr(servidor, "should_exit"):  # uvicorn
+        servidor.should_exit = True
+    else:
+        servidor.shutdown()
+
+# ----------------------------------------------------------------------
+# Medición
+# ----------------------------------------------------------------------
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    indice = min(len(valores_ordenados) - 1, int(round(p / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[indice]
+
+def medir(enviar, generar, peticiones, concurrencia):
+    """Ejecuta `peticiones` llamadas con `concurrencia` hilos y devuelve métricas en ms."""
+    def una():
+        metodo, ruta, cuerpo, formulario = generar()
+        inicio = time.perf_counter()
+        estado = enviar(metodo, ruta, cuerpo, formulario)
+        return (time.perf_counter() - inicio) * 1000, estado
+
+    inicio_total = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        resultados = list(pool.map(lambda _: una(), range(peticiones)))
+    duracion = time.perf_counter() - inicio_total
+
+    latencias = sorted(r[0] for r in resultados)
+    errores = sum(1 for r in resultados if r[1] >= 500 and r[1] != 503)
+    rechazadas = sum(1 for r in resultados if r[1] == 503)  # Control de admisión (admision.py)
+    return {
+        "peticiones": peticiones,
+        "errores": errores,
+        "rechazadas": rechazadas,
+        "p50_ms": round(percentil(latencias, 50), 3),
+        "p95_ms": round(percentil(latencias, 95), 3),
+        "p99_ms": round(percentil(latencias, 99), 3),
+        "throughput_rps": round(peticiones / duracion, 2) if duracion else 0.0,
+    }
+
+def rss_maximo_mb():
+    """RSS máximo del proceso (Linux reporta KB, macOS bytes)."""
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(maximo / 1024 / (1024 if sys.platform == "darwin" else 1), 2)
+
+def comparar(actual, base, tolerancia):
+    """Devuelve lista de rutas cuyo p95 empeoró más que `tolerancia` (0.2 = 20%)."""
+    regresiones = []
+    for ruta, metricas in actual["rutas"].items():
+        previo = base.get("rutas", {}).get(ruta)
+        if not previo or not previo.get("p95_ms"):
+            continue
+        cambio = (metricas["p95_ms"] - previo["p95_ms"]) / previo["p95_ms"]
+        if cambio > tolerancia:
+            regresiones.append((ruta, previo["p95_ms"], metricas["p95_ms"], cambio))
+    return regresiones
+
+# ----------------------------------------------------------------------
+# Programa principal
+# ----------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de rutas Flask de Rutina.py")
+    parser.add_argument("--tamano", default="1k", help="1k, 100k, 1m o un número de tareas")
+    parser.add_argument("--modo", choices=["cliente", "wsgi", "asgi"], default="cliente",
+                        help="cliente: test_client de Flask; wsgi: servidor WSGI con hilos; asgi: uvicorn + app_asgi")
+    parser.add_argument("--peticiones", type=int, default=200, help="Peticiones por ruta")
+    parser.add_argument("--peticiones-listado", type=int, default=20,
+                        help="Peticiones para rutas que devuelven todas las tareas (/, /api/tareas, exportar)")
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--salida", default="bench_output.json")
+    parser.add_argument("--base", help="JSON de un resultado previo para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.20)
+    args = parser.parse_args(argv)
+
+    total = TAMANOS.get(args.tamano.lower()) or int(args.tamano)
+    directorio = tempfile.mkdtemp(prefix="rutina-bench-")
+    ruta_db = os.path.join(directorio, "bench.sqlite")
+
+    inicio = time.perf_counter()
+    sembrar(ruta_db, total)
+    print(f" * Base sembrada con {total} tareas en {time.perf_counter() - inicio:.2f}s ({ruta_db})")
+
+    from app import create_app
+    app = create_app(DATABASE=ruta_db, SECRET_KEY="benchmark")  # flash() necesita sesión
+
+    servidor = None
+    if args.modo == "wsgi":
+        servidor, url = iniciar_servidor_wsgi(app)
+        enviar = crear_cliente_http(url)
+    elif args.modo == "asgi":
+        from app_asgi import application
+        servidor, url = iniciar_servidor_asgi(application)
+        enviar = crear_cliente_http(url)
+    else:
+        enviar = crear_cliente_flask(app)
+
+    resultado = {
+        "tamano": total,
+        "modo": args.modo,
+        "concurrencia": args.concurrencia,
+        "python": sys.version.split()[0],
+        "sqlite": sqlite3.sqlite_version,
+        "rutas": {},
+    }
+    try:
+        for nombre, generar in escenarios(total):
+            n = args.peticiones_listado if nombre in LISTADOS else args.peticiones
+            metricas = medir(enviar, generar, n, args.concurrencia)
+            resultado["rutas"][nombre] = metricas
+            print(f"{nombre:40s} p50={metricas['p50_ms']:8.2f}ms p95={metricas['p95_ms']:8.2f}ms "
+                  f"p99={metricas['p99_ms']:8.2f}ms {metricas['throughput_rps']:8.1f} req/s"
+                  + (f" ({metricas['rechazadas']} rechazadas con 503)" if metricas["rechazadas"] else ""))
+    finally:
+        if servidor is not None:
+            detener_servidor(servidor)
+
+    resultado["rss_max_mb"] = rss_maximo_mb()
+    print(f" * RSS máximo: {resultado['rss_max_mb']} MB")
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+    print(f" * Resultados guardados en {args.salida}")
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as archivo:
+            base = json.load(archivo)
+        regresiones = comparar(resultado, base, args.tolerancia)
+        for ruta, antes, ahora, cambio in regresiones:
+            print(f" ! Regresión en {ruta}: p95 {antes:.2f}ms -> {ahora:.2f}ms (+{cambio:.0%})")
+        if regresiones:
+            return 1
+        print(" * Sin regresiones respecto a la base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Compara el análisis en memoria con el análisis por trozos sobre datos generados.
+
+`procesamiento.resumen(df)` y `por_trozos.analizar(trozos)` deben dar los
+mismos resultados. Este script genera una base sintética (generar_datos.py),
+calcula el resumen de las dos formas y compara cada valor:
+
+- filas, conteos y porcentajes: iguales
+- promedios y desviación: iguales salvo redondeo (tolerancia relativa 1e-9)
+
+Termina con código 1 si algo no coincide, así sirve como chequeo antes de
+cambiar procesamiento.py o por_trozos.py.
+
+Uso:
+    python benchmarks/comparar_trozos.py                       # 200.000 tareas, trozos de 30.000
+    python benchmarks/comparar_trozos.py --total 1000000 --procesos 4
+    python benchmarks/comparar_trozos.py --db tareas_grande.sqlite   # Una base que ya existe
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, "pandas"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cargador  # noqa: E402
+import por_trozos  # noqa: E402
+import procesamiento  # noqa: E402
+from generar_datos import generar  # noqa: E402
+
+TOLERANCIA = 1e-9  # Relativa, para promedios y desviación
+
+
+def _iguales(a, b):
+    """Compara dos resultados (números, Series o DataFrames) con TOLERANCIA."""
+    if isinstance(a, (pd.Series, pd.DataFrame)):
+        try:
+            comparar = pd.testing.assert_frame_equal if isinstance(a, pd.DataFrame) else pd.testing.assert_series_equal
+            comparar(a, b, check_exact=False, rtol=TOLERANCIA, atol=0)
+        except AssertionError:
+            return False
+        return True
+    if isinstance(a, float) or isinstance(b, float):
+        if math.isnan(a) or math.isnan(b):
+            return math.isnan(a) and math.isnan(b)
+        return math.isclose(a, b, rel_tol=TOLERANCIA, abs_tol=0)
+    return a == b
+
+
+def comparar(en_memoria, por_trozos_, prefijo=""):
+    """Lista de llaves cuyos valores no coinciden."""
+    distintas = []
+    for llave, valor in en_memoria.items():
+        otro = por_trozos_[llave]
+        if isinstance(valor, dict):
+            distintas += comparar(valor, otro, f"{prefijo}{llave}.")
+        elif not _iguales(valor, otro):
+            distintas.append(f"{prefijo}{llave}: en memoria {valor!r} / por trozos {otro!r}")
+    return distintas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara procesamiento.resumen con por_trozos.analizar")
+    parser.add_argument("--total", type=int, default=200_000, help="Tareas a generar")
+    parser.add_argument("--db", help="Usar esta base en vez de generar una")
+    parser.add_argument("--tamano-trozo", type=int, default=30_000)
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = args.db
+        if ruta is None:
+            ruta = os.path.join(carpeta, "comparar.sqlite")
+            generar(ruta, args.total)
+
+        df = procesamiento.procesar(cargador.leer_sqlite(ruta, tamano_trozo=args.tamano_trozo))
+        en_memoria = procesamiento.resumen(df)
+        del df
+        trozos = cargador.trozos_sqlite(ruta, tamano_trozo=args.tamano_trozo)
+        resultado = por_trozos.analizar(trozos, procesos=args.procesos)
+
+    distintas = comparar(en_memoria, resultado)
+    for linea in distintas:
+        print(f"DISTINTO  {linea}")
+    print(f"tiempo_promedio:   {en_memoria['tiempo_promedio']!r} / {resultado['tiempo_promedio']!r}")
+    print(f"tiempo_desviacion: {en_memoria['tiempo_desviacion']!r} / {resultado['tiempo_desviacion']!r}")
+    print("Los resultados coinciden" if not distintas else f"{len(distintas)} resultados distintos")
+    sys.exit(1 if distintas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Generador de datos sintéticos para Rutina.py.
+
+Llena el esquema de `database.py` con muchas tareas realistas para reproducir
+localmente problemas de escala. Las distribuciones imitan lo que analiza
+`pandas/03-visualizacion.py`:
+
+- nombres repetidos (pocas tareas muy frecuentes y una cola larga de únicas)
+- categorías con popularidad desigual
+- prioridad media dominante; las tareas de prioridad alta tienen plazos cortos
+- más tareas creadas entre semana y en horario laboral
+- las tareas viejas casi siempre están completadas; una parte se entregó tarde
+
+Uso:
+    python benchmarks/generar_datos.py --total 1000000 --db tareas_grande.sqlite
+    python benchmarks/generar_datos.py --total 50000 --dias 180 --semilla 1
+
+Las filas se insertan con `executemany` por lotes dentro de una sola transacción
+y las fechas se formatean en SQLite (`datetime(?, 'unixepoch')`), así Python
+solo genera números.
+"""
+
+import argparse
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import database  # noqa: E402
+
+# Categorías y su peso relativo (algunas se usan mucho más que otras)
+CATEGORIAS = {
+    "trabajo": 30, "personal": 20, "hogar": 14, "estudio": 12, "salud": 8,
+    "finanzas": 6, "compras": 5, "proyectos": 3, "familia": 1.5, "viajes": 0.5,
+}
+
+# Tareas recurrentes por categoría; el orden define su popularidad (Zipf)
+NOMBRES = {
+    "trabajo": ["Revisar correo", "Reunión diaria", "Actualizar reporte", "Responder tickets",
+                "Planear sprint", "Revisar pull requests", "Preparar presentación", "Llamada con cliente"],
+    "personal": ["Leer 30 minutos", "Meditar", "Escribir diario", "Llamar a mamá", "Ordenar escritorio"],
+    "hogar": ["Lavar ropa", "Sacar la basura", "Limpiar cocina", "Regar plantas", "Cocinar"],
+    "estudio": ["Repasar Python", "Curso de pandas", "Practicar SQL", "Hacer tarea", "Ver clase grabada"],
+    "salud": ["Ir al gimnasio", "Salir a correr", "Tomar vitaminas", "Cita médica"],
+    "finanzas": ["Pagar tarjeta", "Revisar presupuesto", "Pagar renta", "Declarar impuestos"],
+    "compras": ["Comprar despensa", "Ir al mercado", "Comprar regalo"],
+    "proyectos": ["Avanzar proyecto final", "Diseñar logo", "Publicar blog"],
+    "familia": ["Cumpleaños", "Comida familiar"],
+    "viajes": ["Reservar vuelo", "Hacer maleta"],
+}
+
+PRIORIDADES = (("baja", 25), ("media", 50), ("alta", 25))
+# Días de plazo típicos (media de una lognormal) según prioridad
+PLAZO_DIAS = {"baja": 10, "media": 5, "alta": 1.5}
+TIEMPOS = ((15, 20), (30, 25), (45, 10), (60, 20), (90, 8), (120, 10), (180, 4), (240, 3))
+# Probabilidad de que una tarea de cierta antigüedad (días) ya esté completada
+PROB_COMPLETADA = ((1, 0.15), (7, 0.45), (30, 0.75), (math.inf, 0.92))
+PROB_SIN_FECHA_LIMITE = 0.12
+PROB_NOMBRE_UNICO = 0.08
+DIA = 86_400
+
+
+def _zipf(n, s=1.1):
+    return [1 / (k ** s) for k in range(1, n + 1)]
+
+def _prob_completada(antiguedad_dias):
+    for limite, prob in PROB_COMPLETADA:
+        if antiguedad_dias < limite:
+            return prob
+    return PROB_COMPLETADA[-1][1]
+
+def generar_filas(total, dias, semilla, ahora=None):
+    """Genera tuplas listas para el INSERT (fechas como segundos epoch)."""
+    aleatorio = random.Random(semilla)
+    ahora = int(ahora or time.time())
+    inicio = ahora - dias * DIA
+
+    nombres_cat = list(CATEGORIAS)
+    ids_cat = {nombre: i for i, nombre in enumerate(nombres_cat, start=1)}
+    pesos_cat = list(CATEGORIAS.values())
+    pesos_nombres = {cat: _zipf(len(NOMBRES[cat])) for cat in nombres_cat}
+    prioridades, pesos_prio = zip(*PRIORIDADES)
+    tiempos, pesos_tiempo = zip(*TIEMPOS)
+
+    # Elegimos en bloque para no pagar una llamada a choices() por fila
+    for base in range(0, total, 10_000):
+        n = min(10_000, total - base)
+        categorias = aleatorio.choices(nombres_cat, pesos_cat, k=n)
+        prios = aleatorio.choices(prioridades, pesos_prio, k=n)
+        minutos = aleatorio.choices(tiempos, pesos_tiempo, k=n)
+        for i in range(n):
+            cat = categorias[i]
+            prioridad = prios[i]
+            if aleatorio.random() < PROB_NOMBRE_UNICO:
+                nombre = f"{NOMBRES[cat][0]} #{base + i}"
+            else:
+                nombre = aleatorio.choices(NOMBRES[cat], pesos_nombres[cat])[0]
+
+            # Creación: más entre semana y entre 8:00 y 20:00
+            creado = inicio + aleatorio.randrange(dias) * DIA
+            if time.gmtime(creado).tm_wday >= 5 and aleatorio.random() < 0.6:
+                creado -= 2 * DIA
+            creado = max(inicio, creado) - creado % DIA + aleatorio.randint(8 * 3600, 20 * 3600)
+            creado = min(creado, ahora)
+
+            limite = None
+            if aleatorio.random() >= PROB_SIN_FECHA_LIMITE:
+                plazo = aleatorio.lognormvariate(math.log(PLAZO_DIAS[prioridad]), 0.6)
+                limite = creado + int(plazo * DIA)
+
+            completado = None
+            estado = "pendiente"
+            if aleatorio.random() < _prob_completada((ahora - creado) / DIA):
+                # Retraso de entrega: casi siempre cerca del plazo, a veces tarde
+                referencia = (limite - creado) if limite else PLAZO_DIAS[prioridad] * DIA
+                completado = creado + int(referencia * aleatorio.gammavariate(2.0, 0.45))
+                if completado <= ahora:
+                    estado = "completada"
+                else:
+                    completado = None
+            if estado == "pendiente" and aleatorio.random() < 0.2:
+                estado = "en_progreso"
+
+            actualizado = completado or min(ahora, creado + aleatorio.randint(0, DIA))
+            yield (nombre, creado, limite, prioridad, estado, minutos[i], completado, ids_cat[cat], actualizado)
+
+def generar(ruta_db, total, dias=365, semilla=42, lote=50_000, progreso=False):
+    """Crea el esquema en `ruta_db` y lo llena con `total` tareas sintéticas."""
+    database.DATABASE_NAME = ruta_db
+    database.init_db()
+    conn = sqlite3.connect(ruta_db)
+    # Carga masiva: sin fsync por transacción y con los índices creados al final
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    indices = [fila[0] for fila in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tareas' AND sql IS NOT NULL"
+    )]
+    inicio = time.perf_counter()
+    with conn:
+        for indice in indices:
+            conn.execute(f"DROP INDEX {indice}")
+        conn.executemany("INSERT OR IGNORE INTO categorias (id, nombre) VALUES (?, ?)",
+                         list(enumerate(CATEGORIAS, start=1)))
+        filas = generar_filas(total, dias, semilla)
+        insertadas = 0
+        while insertadas < total:
+            bloque = [fila for _, fila in zip(range(lote), filas)]
+            conn.executemany(
+                """INSERT INTO tareas (nombre, fecha_creacion, fecha_limite, prioridad, estado,
+                                       tiempo_estimado, completado_en, id_categoria, fecha_actualizacion)
+                   VALUES (?, datetime(?, 'unixepoch', 'localtime'),
+                           strftime('%Y-%m-%dT%H:%M', ?, 'unixepoch', 'localtime'),
+                           ?, ?, ?, datetime(?, 'unixepoch', 'localtime'), ?,
+                           datetime(?, 'unixepoch', 'localtime'))""",
+                bloque,
+            )
+            insertadas += len(bloque)
+            if progreso:
+                print(f" * {insertadas}/{total} tareas ({time.perf_counter() - inicio:.1f}s)")
+    database.create_indices(conn)
+    conn.commit()  # create_indices ya no confirma: lo hace quien lo llama
+    # journal_mode queda guardado en el archivo: sin esto la base seguiría en
+    # MEMORY y la app (init_db no vuelve a correr) trabajaría sin WAL
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.close()
+    return insertadas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera tareas sintéticas para Rutina.py")
+    parser.add_argument("--total", type=int, default=100_000, help="Número de tareas a generar")
+    parser.add_argument("--db", default="tareas_sinteticas.sqlite", help="Archivo SQLite destino")
+    parser.add_argument("--dias", type=int, default=365, help="Días de historia hacia atrás")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--lote", type=int, default=50_000, help="Filas por executemany")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    total = generar(args.db, args.total, args.dias, args.semilla, args.lote, progreso=True)
+    duracion = time.perf_counter() - inicio
+    print(f" * {total} tareas generadas en {args.db} en {duracion:.1f}s ({total / duracion:,.0f} filas/s)")
+
+
+if __name__ == "__main__":
+    main()
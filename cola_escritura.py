@@ -0,0 +1,164 @@
+# cola_escritura.py
+"""
+Cola de escritura con un solo hilo escritor para SQLite.
+
+SQLite admite un solo escritor a la vez. Con varios hilos llamando a
+`database.execute`, las ráfagas de /crear y toggles terminan en
+"database is locked" y cada hilo reintenta por su cuenta.
+
+Con esta cola, todas las escrituras del proceso pasan por un hilo dedicado:
+  1. Los hilos de las peticiones encolan (sql, params) y reciben un Future.
+  2. El escritor toma todo lo que haya en la cola (hasta `max_lote`) y lo
+     ejecuta en UNA transacción; cada sentencia va dentro de un SAVEPOINT,
+     así un error (p. ej. llave foránea) solo afecta a su propio Future.
+  3. Tras el COMMIT se resuelven los Futures con lastrowid, o con las filas
+     devueltas si la sentencia usa RETURNING.
+
+El costo de cada COMMIT (fsync) se reparte entre todo el lote, así que el
+throughput de escritura crece con el tamaño del lote en vez de desplomarse.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+_FIN = object()  # Marca para detener el hilo escritor
+TIEMPO_MAXIMO = 30  # Segundos que ejecutar() espera su resultado antes de rendirse
+
+
+class ColaEscritura:
+    """Serializa escrituras de varios hilos en un hilo escritor con group commit."""
+
+    def __init__(self, conectar, max_lote=200, espera_lote=0.001):
+        """
+        - conectar: función sin argumentos que devuelve una conexión sqlite3
+        - max_lote: máximo de sentencias por transacción
+        - espera_lote: segundos que el escritor espera por más trabajo antes de confirmar
+        """
+        self._conectar = conectar
+        self._max_lote = max_lote
+        self._espera_lote = espera_lote
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.lotes = 0          # Transacciones confirmadas (para métricas)
+        self.sentencias = 0     # Sentencias escritas
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def enviar(self, sql, params=None):
+        """Encola una sentencia y devuelve un Future.
+
+        El resultado es `lastrowid`, o la lista de filas si el SQL tiene RETURNING.
+        """
+        self._asegurar_hilo()
+        futuro = Future()
+        self._cola.put((sql, params or (), futuro))
+        return futuro
+
+    def ejecutar(self, sql, params=None, timeout=TIEMPO_MAXIMO):
+        """Igual que enviar(), pero espera el resultado (o relanza el error).
+
+        Si pasan `timeout` segundos sin resultado lanza concurrent.futures.TimeoutError
+        (una petición nunca queda colgada para siempre).
+        """
+        return self.enviar(sql, params).result(timeout)
+
+    def detener(self, timeout=5):
+        """Procesa lo pendiente y detiene el hilo escritor."""
+        if self._hilo is not None and self._hilo.is_alive():
+            self._cola.put(_FIN)
+            self._hilo.join(timeout)
+        self._hilo = None
+
+    # ------------------------------------------------------------------
+    # Hilo escritor
+    # ------------------------------------------------------------------
+    def _asegurar_hilo(self):
+        # Los hilos no sobreviven a un fork: cada proceso arranca el suyo.
+        # Si el escritor murió por un error inesperado, se arranca otro.
+        if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is None or self._pid != os.getpid() or not self._hilo.is_alive():
+                if self._pid != os.getpid():
+                    self._cola = queue.Queue()
+                self._pid = os.getpid()
+                self._hilo = threading.Thread(target=self._bucle, name="sqlite-escritor", daemon=True)
+                self._hilo.start()
+
+    def _tomar_lote(self):
+        primero = self._cola.get()
+        if primero is _FIN:
+            return None
+        lote = [primero]
+        while len(lote) < self._max_lote:
+            try:
+                siguiente = self._cola.get(timeout=self._espera_lote)
+            except queue.Empty:
+                break
+            if siguiente is _FIN:
+                self._cola.put(_FIN)  # Se procesa este lote y luego se termina
+                break
+            lote.append(siguiente)
+        return lote
+
+    def _bucle(self):
+        conn = self._conectar()
+        conn.isolation_level = None  # Controlamos BEGIN/COMMIT manualmente
+        try:
+            while True:
+                lote = self._tomar_lote()
+                if lote is None:
+                    return
+                self._escribir_lote(conn, lote)
+        finally:
+            conn.close()
+
+    def _escribir_lote(self, conn, lote):
+        resultados = []
+        confirmado = False
+        error = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for sql, params, futuro in lote:
+                if not futuro.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT sentencia")
+                try:
+                    cur = conn.execute(sql, params)
+                    valor = cur.fetchall() if "returning" in sql.lower() else cur.lastrowid
+                except Exception as exc:
+                    # No solo sqlite3.Error: al enlazar 10**30 sqlite3 lanza OverflowError.
+                    # El error es de esta sentencia; el resto del lote sigue.
+                    conn.execute("ROLLBACK TO sentencia")
+                    conn.execute("RELEASE sentencia")
+                    futuro.set_exception(exc)
+                    continue
+                conn.execute("RELEASE sentencia")
+                resultados.append((futuro, valor))
+            conn.execute("COMMIT")
+            confirmado = True
+        except Exception as exc:
+            error = exc
+        finally:
+            if not confirmado:
+                # Falló el BEGIN, un SAVEPOINT o el COMMIT: nada del lote quedó guardado,
+                # pero todos los Futures se resuelven (nadie espera para siempre)
+                if conn.in_transaction:
+                    try:
+                        conn.execute("ROLLBACK")
+                    except sqlite3.Error:
+                        pass
+                for _, _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(error or RuntimeError("El lote de escritura se interrumpió"))
+        if not confirmado:
+            return
+        self.lotes += 1
+        self.sentencias += len(resultados)
+        for futuro, valor in resultados:
+            futuro.set_result(valor)
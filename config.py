@@ -0,0 +1,87 @@
+# config.py
+"""
+Configuración de la aplicación (objetos de configuración para `create_app`).
+
+    from app import create_app
+    app = create_app()                       # Según ENVIRONMENT
+    app = create_app("config.PruebasConfig")  # O una clase/ruta concreta
+    app = create_app(DATABASE="/tmp/prueba.sqlite", TESTING=True)
+
+Cada atributo en MAYÚSCULAS termina en `app.config`. Los valores que dependen
+del entorno se leen de variables de entorno al importar este módulo.
+"""
+import os
+
+
+class Config:
+    """Valores comunes a todos los entornos."""
+
+    # Archivo de la base; None deja el de database.py (tareas_dev/tareas_prod.sqlite)
+    DATABASE = os.environ.get('DATABASE')
+    # flash() guarda los mensajes en la sesión, que necesita una llave
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'desarrollo')
+
+    # Esquema: por defecto se revisa en la primera petición de cada proceso
+    # (PRAGMA user_version) y no al importar ni al crear la app
+    ESQUEMA_AL_INICIAR = False
+
+    # Mantenimiento de SQLite en segundo plano (respaldo, optimize, vacuum incremental,
+    # checkpoint): DB_MANTENIMIENTO_HORAS=24 [DB_RESPALDOS=respaldos/]. Ver mantenimiento.py
+    DB_MANTENIMIENTO_HORAS = float(os.environ.get('DB_MANTENIMIENTO_HORAS') or 0)
+    DB_RESPALDOS = os.environ.get('DB_RESPALDOS')
+
+    # Snapshot de solo lectura para analítica (database.crear_snapshot): con
+    # DB_SNAPSHOT_PERIODICO=1 un hilo lo renueva cada DB_SNAPSHOT_SEGUNDOS (300)
+    SNAPSHOT_PERIODICO = os.environ.get('DB_SNAPSHOT_PERIODICO') == '1'
+
+    # Control de admisión (admision.py): límite de peticiones a la vez por clase
+    # de rutas, en cada proceso. Las analíticas (listados completos, exportación,
+    # estadísticas, gráficos) no pueden ocupar todos los hilos del worker.
+    ADMISION_ACTIVA = os.environ.get('ADMISION', '1') != '0'
+    ADMISION_CLASES = {
+        "analitica": {"limite": int(os.environ.get('ADMISION_ANALITICA', '2')), "cola": 4, "espera": 5.0},
+        "interactiva": {"limite": int(os.environ.get('ADMISION_INTERACTIVA', '16')), "cola": 32, "espera": 1.0},
+    }
+    ADMISION_RUTAS = {
+        "tareas.api_tareas_index": "analitica",
+        "tareas.api_tareas_exportar": "analitica",
+        "tareas.api_estadisticas": "analitica",
+        "tareas.api_graficos": "analitica",
+        "tareas.tareas_filtradas": "analitica",
+    }
+    ADMISION_CLASE_DEFECTO = "interactiva"
+
+    # En modo debug/pruebas: cuenta consultas por petición y avisa de N+1.
+    # Presupuestos actuales por endpoint; bajarlos cada vez que se optimice una ruta.
+    PRESUPUESTO_CONSULTAS_DEFECTO = 3
+    PRESUPUESTO_CONSULTAS = {
+        # Plantillas (SELECT + INSERT + UPDATE si hay que materializar) + listado + conteo;
+        # el listado en streaming suma una consulta por página de TAMANO_PAGINA_JSON (2000)
+        "tareas.api_tareas_index": 6,
+        "tareas.index": 5,
+        "tareas.api_plantillas": 7,      # POST: get_or_create (2 si la categoría es nueva) + INSERT + materializar (3) + relectura
+        "tareas.api_tareas_show": 9,     # PUT: lectura + get_or_create + hasta 5 UPDATE + relectura
+        "tareas.editar": 9,
+        "tareas.api_tareas_create": 4,   # get_or_create (2 si la categoría es nueva) + INSERT + relectura
+        "tareas.nueva_tarea": 3,
+    }
+
+
+class DesarrolloConfig(Config):
+    pass
+
+
+class ProduccionConfig(Config):
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+
+
+class PruebasConfig(Config):
+    TESTING = True
+    ESQUEMA_AL_INICIAR = True  # Las pruebas quieren la base lista antes de la primera petición
+
+
+def config_por_entorno():
+    """La clase de configuración que corresponde a ENVIRONMENT."""
+    if os.environ.get('ENVIRONMENT') == 'production':
+        return ProduccionConfig
+    return DesarrolloConfig
@@ -1,35 +1,135 @@
 # database.py
 import sqlite3
 import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter, sleep, time
 
 if os.environ.get('ENVIRONMENT') == 'production':
     DATABASE_NAME = 'tareas_prod.sqlite'
 else:
     DATABASE_NAME = 'tareas_dev.sqlite'
 
+# Cola de un solo escritor (opcional): DB_COLA_ESCRITURA=1 o activar_cola_escritura()
+_cola_escritura = None
+
+# Copia de solo lectura para analítica (ver "Snapshot" más abajo)
+# (por defecto junto a la base principal: tareas_dev.snapshot.sqlite)
+SNAPSHOT_NAME = os.environ.get('DB_SNAPSHOT')
+SNAPSHOT_SEGUNDOS = int(os.environ.get('DB_SNAPSHOT_SEGUNDOS', '300'))
+
+# -----------------------------------------------------------------------------
+# Observadores: funciones que reciben (tipo, sql, segundos) después de cada
+# conexión o consulta. Los usa `metricas.py`; si no hay ninguno, el costo es
+# solo una comprobación de lista vacía.
+# -----------------------------------------------------------------------------
+_observadores = []
+
+def agregar_observador(funcion):
+    """Registra una función fn(tipo, sql, segundos) para instrumentar la base."""
+    if funcion not in _observadores:
+        _observadores.append(funcion)
+
+def quitar_observador(funcion):
+    if funcion in _observadores:
+        _observadores.remove(funcion)
+
+def _notificar(tipo, sql, inicio):
+    duracion = perf_counter() - inicio
+    for funcion in _observadores:
+        funcion(tipo, sql, duracion)
+
 def connect_db():
     """
     Conecta a la base de datos
     """
+    inicio = perf_counter()
     conn = sqlite3.connect(DATABASE_NAME) # Conecta a la base de datos
     conn.row_factory = sqlite3.Row  # Devuelve filas tipo Row: acceso por índice y por llave
     conn.execute("PRAGMA foreign_keys = ON") # Activa el modo de clave foránea
     # print(f" * Conectado a: {DATABASE_NAME}")
+    if _observadores:
+        _notificar("connect", None, inicio)
     return conn
 
+# Versión del esquema (PRAGMA user_version): subirla al cambiar tablas, índices o
+# vistas; así init_db vuelve a correr una vez en cada base y después se salta
+VERSION_ESQUEMA = 2
+
 # Función para inicializar la base 
-def init_db():
+def init_db(forzar=False):
     """
     Inicializa la base de datos
     En este método se define la estructura de la base de datos
     creando tablas, índices, etc.
+
+    Si `PRAGMA user_version` ya es VERSION_ESQUEMA no hace nada (una sola
+    lectura). Si no, aplica todo en UNA transacción (un solo commit) y
+    guarda la versión. Devuelve True si tuvo que crear o migrar algo.
     """
     conn = connect_db()
-    # print(" * Inicializando base de datos")
-    create_table_categorias(conn)
-    create_table_tareas(conn)
-    create_indices(conn)
-    conn.close()
+    try:
+        if not forzar and conn.execute("PRAGMA user_version").fetchone()[0] >= VERSION_ESQUEMA:
+            return False
+        # print(" * Inicializando base de datos")
+        # Vacuum incremental: las páginas que liberan los DELETE se pueden devolver
+        # al disco por pasos (mantenimiento.py). Solo tiene efecto en bases nuevas.
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # WAL: los lectores no bloquean al escritor ni al revés (se guarda en el archivo)
+        conn.execute("PRAGMA journal_mode = WAL")
+        # IMMEDIATE: si dos workers arrancan a la vez, el segundo espera y ve la versión nueva
+        conn.execute("BEGIN IMMEDIATE")
+        if not forzar and conn.execute("PRAGMA user_version").fetchone()[0] >= VERSION_ESQUEMA:
+            conn.rollback()
+            return False
+        create_table_categorias(conn)
+        create_table_plantillas(conn)
+        create_table_tareas(conn)
+        migrar_tareas(conn)
+        create_table_tareas_archivo(conn)
+        migrar_tareas_archivo(conn)
+        create_indices(conn)
+        create_views(conn)
+        conn.execute(f"PRAGMA user_version = {VERSION_ESQUEMA}")
+        conn.commit()
+    finally:
+        conn.close()
+    return True
+
+# El esquema se revisa una vez por proceso y por archivo, en la primera
+# petición (no al importar): ver init_esquema
+_esquema_listo_en = None
+_esquema_lock = threading.Lock()
+
+def asegurar_esquema():
+    """Llama a init_db() la primera vez en este proceso (o si cambió DATABASE_NAME)."""
+    global _esquema_listo_en
+    if _esquema_listo_en == DATABASE_NAME:
+        return
+    with _esquema_lock:
+        if _esquema_listo_en != DATABASE_NAME:
+            init_db()
+            _esquema_listo_en = DATABASE_NAME
+
+def init_esquema(app, al_iniciar=False):
+    """Crea o migra el esquema antes de la primera petición de cada proceso.
+
+    - al_iniciar=True: lo hace ya (útil con `gunicorn --preload`: el proceso
+      principal lo hace una vez, cierra la conexión y los workers lo heredan
+      como hecho).
+    - `flask init-db` lo fuerza desde la línea de comandos.
+    """
+    app.before_request(asegurar_esquema)
+
+    @app.cli.command("init-db")
+    def _comando_init_db():
+        """Crea o migra el esquema de la base de datos."""
+        print(" * Esquema actualizado" if init_db(forzar=True) else " * El esquema ya estaba al día")
+
+    if al_iniciar:
+        asegurar_esquema()
 
 
 def create_table_categorias(conn):
@@ -45,7 +145,6 @@ def create_table_categorias(conn):
             nombre TEXT NOT NULL UNIQUE
         )
     """)
-    conn.commit()
     # print(" * Tabla categorias creada")
 
 def create_table_tareas(conn):
@@ -63,6 +162,8 @@ def create_table_tareas(conn):
         - completado_en (TEXT): Fecha y hora de completado de la tarea (null si no se ha completado)
         - id_categoria (INTEGER): Identificador de la categoría de la tarea
         - fecha_actualizacion (TEXT): Fecha y hora de actualización de la tarea
+        - id_plantilla (INTEGER): Plantilla recurrente que la generó (null si se creó a mano)
+        - ocurrencia (TEXT): Fecha (YYYY-MM-DD) de la repetición que representa, si viene de plantilla
         
     NOTA: fecha_limite ahora maneja fecha y hora en formato ISO (YYYY-MM-DDTHH:MM)
     """
@@ -78,25 +179,174 @@ def create_table_tareas(conn):
             completado_en TEXT,
             id_categoria INTEGER NOT NULL,
             fecha_actualizacion TEXT NOT NULL DEFAULT (datetime('now','localtime')),
+            id_plantilla INTEGER REFERENCES plantillas_recurrentes(id) ON DELETE SET NULL,
+            ocurrencia TEXT,
             FOREIGN KEY (id_categoria) REFERENCES categorias(id)
                 ON UPDATE CASCADE
                 ON DELETE RESTRICT
         );
     """)
-    conn.commit()
     # print(" * Tabla tareas creada")
 
+def migrar_tareas(conn):
+    """Agrega a una tabla `tareas` existente las columnas nuevas (id_plantilla, ocurrencia)."""
+    columnas = {fila[1] for fila in conn.execute("PRAGMA table_info(tareas)")}
+    if "id_plantilla" not in columnas:
+        conn.execute("ALTER TABLE tareas ADD COLUMN id_plantilla INTEGER "
+                     "REFERENCES plantillas_recurrentes(id) ON DELETE SET NULL")
+    if "ocurrencia" not in columnas:
+        conn.execute("ALTER TABLE tareas ADD COLUMN ocurrencia TEXT")
+
+def create_table_plantillas(conn):
+    """
+    Tabla: plantillas_recurrentes
+
+    Tareas que se repiten (ver models/plantilla.py). Las repeticiones no se
+    crean por adelantado: se materializan en `tareas` a medida que se piden
+    fechas futuras, y `materializado_hasta` recuerda hasta dónde se llegó.
+
+    Columnas:
+        - regla (TEXT): diaria | semanal | mensual
+        - intervalo (INTEGER): cada cuántos días/semanas/meses
+        - dias_semana (TEXT): para reglas semanales, días separados por coma (0=lunes ... 6=domingo)
+        - hora (TEXT): hora de la fecha límite de cada repetición (HH:MM)
+        - inicio / fin (TEXT): rango de fechas (YYYY-MM-DD); fin es opcional
+        - materializado_hasta (TEXT): última fecha ya generada en `tareas`
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS plantillas_recurrentes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            id_categoria INTEGER NOT NULL,
+            prioridad TEXT DEFAULT 'media',
+            tiempo_estimado INTEGER,
+            regla TEXT NOT NULL,
+            intervalo INTEGER NOT NULL DEFAULT 1,
+            dias_semana TEXT,
+            hora TEXT NOT NULL DEFAULT '23:59',
+            inicio TEXT NOT NULL DEFAULT (date('now','localtime')),
+            fin TEXT,
+            materializado_hasta TEXT,
+            activa INTEGER NOT NULL DEFAULT 1,
+            fecha_creacion TEXT NOT NULL DEFAULT (datetime('now','localtime')),
+            FOREIGN KEY (id_categoria) REFERENCES categorias(id)
+                ON UPDATE CASCADE
+                ON DELETE RESTRICT
+        );
+    """)
+    # print(" * Tabla plantillas_recurrentes creada")
+
+def create_table_tareas_archivo(conn):
+    """
+    Tabla: tareas_archivo
+
+    Tareas completadas hace tiempo, movidas desde `tareas` por
+    `mantenimiento.py archivar`. Mismas columnas (el id se conserva) más
+    `archivado_en`. Así `tareas` y sus índices solo guardan lo activo.
+    Las repeticiones de plantillas conservan `id_plantilla` y `ocurrencia`.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tareas_archivo (
+            id INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            fecha_creacion TEXT NOT NULL,
+            fecha_limite TEXT,
+            prioridad TEXT,
+            estado TEXT NOT NULL,
+            tiempo_estimado INTEGER,
+            completado_en TEXT,
+            id_categoria INTEGER NOT NULL,
+            fecha_actualizacion TEXT NOT NULL,
+            archivado_en TEXT NOT NULL DEFAULT (datetime('now','localtime')),
+            id_plantilla INTEGER REFERENCES plantillas_recurrentes(id) ON DELETE SET NULL,
+            ocurrencia TEXT,
+            FOREIGN KEY (id_categoria) REFERENCES categorias(id)
+                ON UPDATE CASCADE
+                ON DELETE RESTRICT
+        );
+    """)
+    # print(" * Tabla tareas_archivo creada")
+
+def migrar_tareas_archivo(conn):
+    """Agrega a una tabla `tareas_archivo` existente las columnas id_plantilla y ocurrencia."""
+    columnas = {fila[1] for fila in conn.execute("PRAGMA table_info(tareas_archivo)")}
+    if "id_plantilla" not in columnas:
+        conn.execute("ALTER TABLE tareas_archivo ADD COLUMN id_plantilla INTEGER "
+                     "REFERENCES plantillas_recurrentes(id) ON DELETE SET NULL")
+    if "ocurrencia" not in columnas:
+        conn.execute("ALTER TABLE tareas_archivo ADD COLUMN ocurrencia TEXT")
+
 def create_indices(conn):
     """
     Índices recomendados según consultas más comunes:
       - Buscar tareas por categoría y estado
+      - Filtrar tareas por estado y prioridad (sin categoría)
+      - Encontrar completadas viejas para archivarlas (índice parcial: solo completadas)
+      - Una sola tarea por plantilla y fecha de repetición (materializar es idempotente)
+      - Fechas límite de las tareas no completadas, en orden (vencidas / próximas;
+        índice parcial: las completadas, que son la mayoría, no ocupan espacio)
     """
     conn.execute("""
         CREATE INDEX IF NOT EXISTS idx_tareas_categoria_estado
         ON tareas(id_categoria, estado);
     """)
-    conn.commit()
-    # print(" * Índice idx_tareas_categoria_estado creado")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tareas_estado_prioridad
+        ON tareas(estado, prioridad);
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tareas_completadas
+        ON tareas(completado_en) WHERE estado = 'completada';
+    """)
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_tareas_plantilla_ocurrencia
+        ON tareas(id_plantilla, ocurrencia) WHERE id_plantilla IS NOT NULL;
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tareas_vencimiento
+        ON tareas(fecha_limite) WHERE estado != 'completada';
+    """)
+    # print(" * Índices de tareas creados")
+
+def create_views(conn):
+    """
+    Vista: vista_tareas
+
+    Tareas con el nombre de su categoría ya resuelto por SQLite.
+    Devuelve las mismas columnas que `tareas` más `categoria` (nombre),
+    así la API y las plantillas no necesitan una segunda consulta
+    ni unir categorías en Python.
+
+    Vista: vista_tareas_todas
+
+    Igual que vista_tareas pero incluye las tareas archivadas
+    (`tareas_archivo`). SQLite aplica los filtros a cada parte del UNION ALL,
+    así que sigue usando los índices de ambas tablas.
+
+    Se borran y se vuelven a crear: CREATE VIEW IF NOT EXISTS no actualiza
+    una vista de una versión anterior del esquema.
+    """
+    conn.execute("DROP VIEW IF EXISTS vista_tareas_todas")
+    conn.execute("DROP VIEW IF EXISTS vista_tareas")
+    conn.execute("""
+        CREATE VIEW vista_tareas AS
+        SELECT t.id, t.nombre, t.fecha_creacion, t.fecha_limite, t.prioridad, t.estado,
+               t.tiempo_estimado, t.completado_en, t.id_categoria, t.fecha_actualizacion,
+               t.id_plantilla, t.ocurrencia, c.nombre AS categoria
+        FROM tareas t
+        LEFT JOIN categorias c ON c.id = t.id_categoria
+    """)
+    conn.execute("""
+        CREATE VIEW vista_tareas_todas AS
+        SELECT * FROM vista_tareas
+        UNION ALL
+        SELECT a.id, a.nombre, a.fecha_creacion, a.fecha_limite, a.prioridad, a.estado,
+               a.tiempo_estimado, a.completado_en, a.id_categoria, a.fecha_actualizacion,
+               a.id_plantilla, a.ocurrencia, c.nombre AS categoria
+        FROM tareas_archivo a
+        LEFT JOIN categorias c ON c.id = a.id_categoria
+    """)
+    # print(" * Vistas vista_tareas y vista_tareas_todas creadas")
 
 # -----------------------------------------------------------------------------
 # Helpers simples: ejecutar consultas sin repetir conexión
@@ -105,27 +355,437 @@ def create_indices(conn):
 # U - UPDATE -> UPDATE
 # D - DELETE -> DELETE
 # -----------------------------------------------------------------------------
+def activar_cola_escritura(max_lote=200, espera_lote=0.001):
+    """Serializa todas las escrituras de este proceso en un hilo escritor (ver cola_escritura.py)."""
+    global _cola_escritura
+    from cola_escritura import ColaEscritura
+    if _cola_escritura is None:
+        _cola_escritura = ColaEscritura(connect_db, max_lote=max_lote, espera_lote=espera_lote)
+    return _cola_escritura
+
+def desactivar_cola_escritura():
+    global _cola_escritura
+    if _cola_escritura is not None:
+        _cola_escritura.detener()
+        _cola_escritura = None
+
 def execute(sql, params=None):
     """
     Ejecuta INSERT/UPDATE/DELETE. Devuelve lastrowid si aplica, o None.
+    Si la cola de escritura está activa, la sentencia se confirma en lote
+    junto con las de otros hilos.
     """
+    if _cola_escritura is not None:
+        inicio = perf_counter()
+        last_id = _cola_escritura.ejecutar(sql, params)
+        if _observadores:
+            _notificar("execute", sql, inicio)
+        return last_id
     conn = connect_db()
-    cur = conn.execute(sql, params or ())
-    conn.commit()
-    last_id = cur.lastrowid
-    conn.close()
+    try:  # Si la sentencia falla (p. ej. una llave foránea), close() deshace y libera el lock
+        inicio = perf_counter()
+        cur = conn.execute(sql, params or ())
+        conn.commit()
+        last_id = cur.lastrowid
+        if _observadores:
+            _notificar("execute", sql, inicio)
+    finally:
+        conn.close()
     return last_id
 
+def execute_returning(sql, params=None):
+    """Ejecuta INSERT/UPDATE/DELETE ... RETURNING y devuelve las filas devueltas."""
+    if _cola_escritura is not None:
+        inicio = perf_counter()
+        rows = _cola_escritura.ejecutar(sql, params)
+        if _observadores:
+            _notificar("execute", sql, inicio)
+        return rows
+    conn = connect_db()
+    try:  # Igual que execute: una sentencia fallida no deja la transacción abierta
+        inicio = perf_counter()
+        rows = conn.execute(sql, params or ()).fetchall()
+        conn.commit()
+        if _observadores:
+            _notificar("execute", sql, inicio)
+    finally:
+        conn.close()
+    return rows
+
 def query_all(sql, params=None):
     """Ejecuta SELECT y devuelve lista de filas."""
-    conn = connect_db()
+    conn = _conexion_lectura()
+    inicio = perf_counter()
     rows = conn.execute(sql, params or ()).fetchall()
+    if _observadores:
+        _notificar("query_all", sql, inicio)
     conn.close()
     return rows
 
 def query_one(sql, params=None):
     """Ejecuta SELECT y devuelve una fila o None."""
-    conn = connect_db()
+    conn = _conexion_lectura()
+    inicio = perf_counter()
     row = conn.execute(sql, params or ()).fetchone()
+    if _observadores:
+        _notificar("query_one", sql, inicio)
     conn.close()
     return row
+
+# Bytes de cabecera que cambian con las escrituras (ver https://www.sqlite.org/fileformat.html):
+# - base: "file change counter" (24-27), sube con cada transacción fuera de WAL
+# - -wal: número de checkpoint y salts (12-23), cambian cada vez que el WAL vuelve a empezar
+_CABECERAS = ((24, 28), (12, 24))
+# Conexión que version_datos deja abierta (ver _mantener_wal)
+_guardia = {"ruta": None, "conn": None}
+_guardia_lock = threading.Lock()
+
+def _mantener_wal():
+    """Deja abierta una conexión sin uso a la base, una por proceso.
+
+    SQLite borra el archivo -wal cuando se cierra la última conexión, y aquí
+    cada consulta abre y cierra la suya: sin esta conexión el -wal (y sus
+    salts) desaparecería después de cada escritura. No abre transacciones, así
+    que no frena checkpoints ni escrituras.
+    """
+    if _guardia["ruta"] == DATABASE_NAME:
+        return
+    with _guardia_lock:
+        if _guardia["ruta"] == DATABASE_NAME:
+            return
+        if _guardia["conn"] is not None:
+            _guardia["conn"].close()
+        conn = sqlite3.connect(DATABASE_NAME, check_same_thread=False)
+        conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()  # Abre el -wal y lo mantiene
+        _guardia.update(ruta=DATABASE_NAME, conn=conn)
+
+def version_datos():
+    """Texto que cambia con cada escritura confirmada en la base, de cualquier proceso.
+
+    En modo WAL cada COMMIT agrega páginas al archivo `-wal` (crece); sin WAL,
+    sube el contador de cambios de la cabecera de la base. Pero después de un
+    checkpoint RESTART/TRUNCATE el WAL vuelve a empezar desde cero: dos
+    escrituras en el mismo tic del reloj podían dejar el mismo tamaño y la
+    misma fecha de modificación. Por eso la llave incluye también el número de
+    checkpoint y los salts de la cabecera del WAL, que cambian en cada reinicio
+    (y `_mantener_wal` evita que el -wal se borre entre escrituras).
+    Basta con leer unos bytes de cada archivo: no hace falta consultar la base.
+    Un checkpoint también la cambia, lo que solo provoca alguna invalidación de más.
+    """
+    if os.path.exists(DATABASE_NAME):
+        _mantener_wal()
+    partes = []
+    for ruta, (inicio, fin) in zip((DATABASE_NAME, DATABASE_NAME + "-wal"), _CABECERAS):
+        try:
+            with open(ruta, "rb") as archivo:
+                cabecera = archivo.read(fin)
+                estado = os.fstat(archivo.fileno())
+        except OSError:
+            partes.append("-")
+            continue
+        partes.append(f"{estado.st_mtime_ns:x}.{estado.st_size:x}.{cabecera[inicio:fin].hex()}")
+    return "-".join(partes)
+
+# -----------------------------------------------------------------------------
+# Snapshot de solo lectura para analítica
+# -----------------------------------------------------------------------------
+# Las consultas largas (exportaciones, estadísticas, pandas) leen una copia
+# consistente de la base creada con la API de backup de SQLite. La copia se
+# abre con `mode=ro&immutable=1`: SQLite no toma locks ni revisa cambios, y la
+# base principal queda libre para las lecturas y escrituras interactivas.
+#
+# La copia se reemplaza con un rename atómico; las conexiones abiertas siguen
+# leyendo la versión anterior hasta cerrarse.
+_snapshot_hilo = threading.local()
+_snapshot_lock = threading.Lock()
+_snapshot_refrescando = False
+
+def ruta_snapshot():
+    """Archivo del snapshot: SNAPSHOT_NAME o `<base>.snapshot.sqlite`."""
+    if SNAPSHOT_NAME:
+        return SNAPSHOT_NAME
+    raiz, extension = os.path.splitext(DATABASE_NAME)
+    return f"{raiz}.snapshot{extension or '.sqlite'}"
+
+def crear_snapshot(destino=None, origen=None):
+    """Copia la base principal (u `origen`) a `destino` (por defecto ruta_snapshot()) de forma consistente."""
+    destino = destino or ruta_snapshot()
+    temporal = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    inicio = perf_counter()
+    origen = sqlite3.connect(origen or DATABASE_NAME)
+    copia = sqlite3.connect(temporal)
+    try:
+        origen.backup(copia)  # Un solo paso: lectura consistente (en WAL no bloquea escritores)
+        copia.execute("PRAGMA journal_mode = DELETE")  # La copia no necesita WAL
+        copia.commit()
+    finally:
+        copia.close()
+        origen.close()
+    os.replace(temporal, destino)
+    if _observadores:
+        _notificar("snapshot", None, inicio)
+    return destino
+
+def _edad_snapshot():
+    try:
+        return time() - os.path.getmtime(ruta_snapshot())
+    except OSError:
+        return None
+
+def _refrescar_en_segundo_plano():
+    global _snapshot_refrescando
+    try:
+        crear_snapshot()
+    finally:
+        _snapshot_refrescando = False
+
+def asegurar_snapshot(max_edad=None):
+    """Crea el snapshot si no existe; si es más viejo que `max_edad`, lo refresca.
+
+    Si ya existe una copia vieja se sigue usando mientras otro hilo la refresca,
+    así ninguna petición espera a que termine la copia.
+    """
+    global _snapshot_refrescando
+    max_edad = SNAPSHOT_SEGUNDOS if max_edad is None else max_edad
+    edad = _edad_snapshot()
+    if edad is None:
+        with _snapshot_lock:
+            if _edad_snapshot() is None:
+                crear_snapshot()
+    elif edad > max_edad and not _snapshot_refrescando:
+        with _snapshot_lock:
+            if _snapshot_refrescando:
+                return
+            _snapshot_refrescando = True
+        threading.Thread(target=_refrescar_en_segundo_plano, name="sqlite-snapshot", daemon=True).start()
+
+def connect_snapshot():
+    """Conexión de solo lectura al snapshot (sin locks ni journal)."""
+    asegurar_snapshot()
+    inicio = perf_counter()
+    conn = sqlite3.connect(f"file:{os.path.abspath(ruta_snapshot())}?mode=ro&immutable=1", uri=True)
+    conn.row_factory = sqlite3.Row
+    if _observadores:
+        _notificar("connect", None, inicio)
+    return conn
+
+@contextmanager
+def usar_snapshot():
+    """Dentro del bloque, query_all/query_one del hilo actual leen del snapshot:
+
+        with usar_snapshot():
+            filas = Tarea.with_categoria()
+    """
+    anterior = getattr(_snapshot_hilo, "activo", False)
+    _snapshot_hilo.activo = True
+    try:
+        yield
+    finally:
+        _snapshot_hilo.activo = anterior
+
+def _conexion_lectura():
+    if getattr(_snapshot_hilo, "activo", False):
+        return connect_snapshot()
+    return connect_db()
+
+def _despues_de_fork():
+    """En el proceso hijo (gunicorn --preload, multiprocessing): locks nuevos.
+
+    Un Lock tomado por otro hilo en el momento del fork quedaría tomado para
+    siempre en el hijo. Cada llamada abre su propia conexión; solo la de
+    _mantener_wal se hereda, y el hijo la reemplaza.
+    """
+    global _snapshot_lock, _snapshot_refrescando, _esquema_lock, _guardia_lock
+    _snapshot_lock = threading.Lock()
+    _snapshot_refrescando = False  # El hilo que refrescaba no existe en el hijo
+    _esquema_lock = threading.Lock()
+    # La conexión de _mantener_wal es del padre: el hijo abre la suya (sin cerrar
+    # la heredada, que liberaría los locks del padre)
+    _guardia_lock = threading.Lock()
+    _guardia.update(ruta=None, conn=None)
+
+if hasattr(os, "register_at_fork"):  # No existe en Windows
+    os.register_at_fork(after_in_child=_despues_de_fork)
+
+def iniciar_refresco_snapshot(intervalo=None):
+    """Hilo opcional que mantiene el snapshot fresco cada `intervalo` segundos."""
+    intervalo = intervalo or SNAPSHOT_SEGUNDOS
+    def bucle():
+        while True:
+            try:
+                crear_snapshot()
+            except Exception as exc:  # Disco lleno, base bloqueada...: se reintenta en la próxima vuelta
+                print(f" * Snapshot fallido: {exc}")
+            sleep(intervalo)
+    hilo = threading.Thread(target=bucle, name="sqlite-snapshot-periodico", daemon=True)
+    hilo.start()
+    return hilo
+
+# -----------------------------------------------------------------------------
+# Detector de N+1 y presupuesto de consultas (modo debug / pruebas)
+# -----------------------------------------------------------------------------
+# Cada hilo lleva su propio registro de sentencias; las sentencias se agrupan
+# por "huella" (mismo SQL con distintos valores) para detectar repeticiones.
+_registro_hilo = threading.local()
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ESPACIOS = re.compile(r"\s+")
+
+class PresupuestoConsultasExcedido(AssertionError):
+    """Una petición o bloque ejecutó más consultas que las permitidas."""
+
+def huella_sql(sql):
+    """Normaliza una sentencia: sin literales ni espacios repetidos, en minúsculas."""
+    return _ESPACIOS.sub(" ", _LITERALES.sub("?", sql)).strip().lower()
+
+class RegistroConsultas:
+    """Sentencias ejecutadas en un bloque, agrupadas por huella."""
+
+    def __init__(self):
+        self.huellas = Counter()
+        self.segundos = 0.0  # Tiempo total de las sentencias (métricas de app_asgi.py)
+
+    @property
+    def total(self):
+        return sum(self.huellas.values())
+
+    def repetidas(self, minimo=2):
+        """Lista de (huella, veces) que se ejecutaron `minimo` veces o más."""
+        return [(huella, veces) for huella, veces in self.huellas.most_common() if veces >= minimo]
+
+def _registros_del_hilo():
+    if not hasattr(_registro_hilo, "pila"):
+        _registro_hilo.pila = []
+    return _registro_hilo.pila
+
+def _registrar_en_hilo(tipo, sql, segundos):
+    pila = getattr(_registro_hilo, "pila", None)
+    if pila and sql:
+        huella = huella_sql(sql)
+        for registro in pila:  # Los registros pueden anidarse (prueba > petición)
+            registro.huellas[huella] += 1
+            registro.segundos += segundos
+
+def iniciar_registro_consultas():
+    """Empieza a contar las sentencias ejecutadas por el hilo actual."""
+    agregar_observador(_registrar_en_hilo)
+    registro = RegistroConsultas()
+    _registros_del_hilo().append(registro)
+    return registro
+
+def terminar_registro_consultas(registro):
+    """Deja de contar en `registro` y lo devuelve."""
+    pila = _registros_del_hilo()
+    if registro in pila:
+        pila.remove(registro)
+    return registro
+
+@contextmanager
+def contar_consultas_en(registro):
+    """Suma a `registro` (ya creado) las sentencias del bloque en el hilo actual.
+
+    Para peticiones cuyo trabajo pasa por varios hilos (cuerpos en streaming,
+    rutas nativas de app_asgi.py): el mismo registro sigue a la petición.
+    """
+    agregar_observador(_registrar_en_hilo)
+    _registros_del_hilo().append(registro)
+    try:
+        yield registro
+    finally:
+        terminar_registro_consultas(registro)
+
+def _contar_mientras_genera(cuerpo, registro, al_terminar):
+    """Recorre `cuerpo` contando en `registro` las consultas de cada trozo; al final llama a `al_terminar()`."""
+    iterador = iter(cuerpo)
+    try:
+        while True:
+            with contar_consultas_en(registro):  # Solo mientras se genera el trozo
+                trozo = next(iterador, None)
+            if trozo is None:
+                break
+            yield trozo
+    finally:
+        if hasattr(iterador, "close"):
+            iterador.close()  # Cliente desconectado: se cierra también el generador original
+    al_terminar()
+
+@contextmanager
+def presupuesto_consultas(maximo):
+    """Falla si el bloque ejecuta más de `maximo` sentencias. Pensado para pruebas:
+
+        with presupuesto_consultas(2):
+            cliente.get("/tarea/1")
+    """
+    registro = iniciar_registro_consultas()
+    try:
+        yield registro
+    finally:
+        terminar_registro_consultas(registro)
+    if registro.total > maximo:
+        raise PresupuestoConsultasExcedido(
+            f"Se ejecutaron {registro.total} consultas (máximo {maximo}); repetidas: {registro.repetidas()}"
+        )
+
+def presupuesto_activo(app):
+    """El detector trabaja si `app.debug`, `app.testing` o PRESUPUESTO_CONSULTAS_ACTIVO."""
+    return app.debug or app.testing or app.config.get("PRESUPUESTO_CONSULTAS_ACTIVO", False)
+
+def revisar_presupuesto(app, registro, endpoint):
+    """Avisa de posibles N+1 y aplica el presupuesto de `endpoint` a `registro`."""
+    maximo = app.config["PRESUPUESTO_CONSULTAS"].get(endpoint, app.config["PRESUPUESTO_CONSULTAS_DEFECTO"])
+    for huella, veces in registro.repetidas():
+        app.logger.warning("Posible N+1 en %s: %d veces -> %s", endpoint, veces, huella)
+    if registro.total > maximo:
+        mensaje = f"{endpoint} ejecutó {registro.total} consultas (presupuesto {maximo})"
+        if app.config.get("PRESUPUESTO_CONSULTAS_ESTRICTO", app.testing):
+            raise PresupuestoConsultasExcedido(mensaje)
+        app.logger.warning(mensaje)
+
+def init_presupuesto_consultas(app):
+    """Activa el detector por petición en una app Flask.
+
+    Solo trabaja si `app.debug`, `app.testing` o `PRESUPUESTO_CONSULTAS_ACTIVO`.
+    Configuración (app.config):
+      - PRESUPUESTO_CONSULTAS: {endpoint: máximo} por ruta
+      - PRESUPUESTO_CONSULTAS_DEFECTO: máximo para las demás rutas
+      - PRESUPUESTO_CONSULTAS_ESTRICTO: si es True (por defecto en pruebas) lanza
+        PresupuestoConsultasExcedido en lugar de solo registrar una advertencia.
+    """
+    from flask import g, request
+
+    app.config.setdefault("PRESUPUESTO_CONSULTAS", {})
+    app.config.setdefault("PRESUPUESTO_CONSULTAS_DEFECTO", 5)
+    app.config.setdefault("PRESUPUESTO_CONSULTAS_ACTIVO", False)
+
+    @app.before_request
+    def _iniciar_presupuesto():
+        if presupuesto_activo(app):
+            g._registro_consultas = iniciar_registro_consultas()
+
+    @app.after_request
+    def _revisar_presupuesto(response):
+        registro = g.pop("_registro_consultas", None)
+        if registro is None:
+            return response
+        terminar_registro_consultas(registro)
+        endpoint = request.endpoint or "sin_ruta"
+        response.headers["X-Consultas-SQL"] = str(registro.total)
+        if response.is_streamed and not response.direct_passthrough:
+            # En streaming (listado, exportación) el cuerpo se genera después de esta
+            # función: sus consultas se suman al mismo registro mientras se recorre y
+            # el presupuesto se revisa al terminar. X-Consultas-SQL ya se envió, así
+            # que solo cuenta las consultas anteriores al cuerpo.
+            response.response = _contar_mientras_genera(response.response, registro,
+                                                        lambda: revisar_presupuesto(app, registro, endpoint))
+            return response
+        revisar_presupuesto(app, registro, endpoint)
+        return response
+
+    @app.teardown_request
+    def _limpiar_presupuesto(error=None):
+        # Si la vista lanzó una excepción, after_request no corrió
+        registro = g.pop("_registro_consultas", None)
+        if registro is not None:
+            terminar_registro_consultas(registro)
+
+if os.environ.get('DB_COLA_ESCRITURA') == '1':
+    activar_cola_escritura()
@@ -0,0 +1,163 @@
+# graficos_web.py
+"""
+Gráficos de tareas como imágenes (PNG o SVG) servidos por la app.
+
+Los mismos gráficos básicos de `pandas/03-visualizacion.py`, pero sin pandas
+ni un script aparte: cada uno sale de una sola consulta GROUP BY
+(`Tarea.conteos`) y se dibuja con matplotlib (backend Agg, sin pantalla).
+
+La imagen se guarda en disco (GRAFICOS_CACHE, por defecto `.cache/graficos/`)
+con un nombre que incluye el gráfico, sus parámetros y
+`database.version_datos()`. Mientras nadie escriba en la base, todas las
+peticiones (de cualquier worker) reciben el mismo archivo sin consultar ni
+dibujar nada; después de una escritura, la primera petición lo vuelve a
+generar y borra la versión anterior.
+
+matplotlib es opcional: si no está instalado, la ruta responde 503.
+"""
+import hashlib
+import os
+import threading
+
+import database
+from models.tarea import Tarea
+
+CARPETA = os.environ.get('GRAFICOS_CACHE', os.path.join('.cache', 'graficos'))
+FORMATOS = {"png": "image/png", "svg": "image/svg+xml"}
+PRIORIDADES = ("baja", "media", "alta")
+COLORES_ESTADO = {"pendiente": "#ff9999", "en_progreso": "#66b3ff", "completada": "#99ff99"}
+
+_locks = {}                 # llave -> Lock: dos peticiones iguales no dibujan dos veces
+_locks_lock = threading.Lock()
+
+# -----------------------------------------------------------------------------
+# Dibujo: cada función recibe un Axes y las filas de Tarea.conteos
+# -----------------------------------------------------------------------------
+def _sin_datos(ax, filas, titulo):
+    ax.set_title(titulo)
+    if filas:
+        return False
+    ax.text(0.5, 0.5, "Sin datos", ha="center", va="center", transform=ax.transAxes)
+    ax.set_axis_off()
+    return True
+
+def _barras_prioridad(ax, filas):
+    if _sin_datos(ax, filas, "Tareas por prioridad"):
+        return
+    # Orden baja < media < alta (las prioridades desconocidas, al final)
+    filas = sorted(filas, key=lambda fila: (PRIORIDADES.index(fila["prioridad"])
+                                            if fila["prioridad"] in PRIORIDADES else len(PRIORIDADES)))
+    ax.bar([str(fila["prioridad"]) for fila in filas], [fila["total"] for fila in filas])
+    ax.set_xlabel("Prioridad")
+    ax.set_ylabel("No de Tareas")
+    ax.grid(axis="y", linestyle="--", alpha=0.4)
+
+def _lineas_por_dia(ax, filas):
+    if _sin_datos(ax, filas, "Tareas creadas por día"):
+        return
+    from datetime import date
+    ax.plot([date.fromisoformat(fila["dia"]) for fila in filas], [fila["total"] for fila in filas])
+    ax.set_xlabel("Fecha")
+    ax.set_ylabel("Tareas creadas")
+    ax.grid(True, linestyle="--", alpha=0.9)
+    ax.figure.autofmt_xdate()
+
+def _pastel_estado(ax, filas):
+    if _sin_datos(ax, filas, "Distribución por estado"):
+        return
+    ax.pie([fila["total"] for fila in filas], labels=[fila["estado"] for fila in filas],
+           colors=[COLORES_ESTADO.get(fila["estado"]) for fila in filas], autopct="%1.1f%%")
+
+def _heatmap_categoria_estado(ax, filas):
+    if _sin_datos(ax, filas, "Categoría vs Estado"):
+        return
+    categorias = sorted({fila["categoria"] for fila in filas})
+    estados = sorted({fila["estado"] for fila in filas})
+    tabla = [[0] * len(estados) for _ in categorias]
+    for fila in filas:
+        tabla[categorias.index(fila["categoria"])][estados.index(fila["estado"])] = fila["total"]
+    im = ax.imshow(tabla, cmap="YlOrRd", aspect="auto")
+    ax.set_xlabel("Estado")
+    ax.set_ylabel("Categoría")
+    ax.set_xticks(range(len(estados)))
+    ax.set_xticklabels(estados, rotation=45, ha="right")
+    ax.set_yticks(range(len(categorias)))
+    ax.set_yticklabels(categorias)
+    for i, fila in enumerate(tabla):
+        for j, valor in enumerate(fila):
+            ax.text(j, i, valor, ha="center", va="center", color="black", fontweight="bold")
+    ax.figure.colorbar(im, ax=ax, shrink=0.8)
+
+# Nombre en la URL -> (columnas para Tarea.conteos, función de dibujo)
+GRAFICOS = {
+    "prioridad": (("prioridad",), _barras_prioridad),
+    "creadas-por-dia": (("dia",), _lineas_por_dia),
+    "estado": (("estado",), _pastel_estado),
+    "categoria-estado": (("categoria", "estado"), _heatmap_categoria_estado),
+}
+
+# -----------------------------------------------------------------------------
+# Caché en disco
+# -----------------------------------------------------------------------------
+def disponible():
+    """True si matplotlib está instalado."""
+    try:
+        import matplotlib  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _despues_de_fork():
+    global _locks, _locks_lock
+    _locks = {}
+    _locks_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):  # No existe en Windows
+    os.register_at_fork(after_in_child=_despues_de_fork)
+
+def _lock(llave):
+    with _locks_lock:
+        return _locks.setdefault(llave, threading.Lock())
+
+def _dibujar(nombre, filas, formato, ruta):
+    from matplotlib.figure import Figure  # Se importa al primer gráfico, no al iniciar la app
+
+    dibujar = GRAFICOS[nombre][1]
+    figura = Figure(figsize=(8, 5))  # Sin pyplot: no hay estado global ni ventanas
+    dibujar(figura.add_subplot(), filas)
+    figura.tight_layout()
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    figura.savefig(temporal, format=formato, dpi=110)
+    os.replace(temporal, ruta)  # Otro worker nunca ve un archivo a medio escribir
+
+def _borrar_anteriores(prefijo, vigente):
+    """Borra las versiones viejas del mismo gráfico y parámetros (en cualquier formato)."""
+    for archivo in os.listdir(CARPETA):
+        if archivo.startswith(prefijo) and not archivo.startswith(vigente) and not archivo.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(CARPETA, archivo))
+            except OSError:
+                pass  # Otro worker ya lo borró
+
+def obtener(nombre, formato="png", desde=None, hasta=None, incluir_archivadas=False):
+    """Devuelve (ruta del archivo, etag) del gráfico; lo dibuja solo si cambió la base.
+
+    `nombre` debe estar en GRAFICOS y `formato` en FORMATOS (lo revisa la ruta).
+    """
+    parametros = f"{desde}|{hasta}|{int(bool(incluir_archivadas))}"
+    prefijo = f"{nombre}-{hashlib.sha1(parametros.encode()).hexdigest()[:12]}-"
+    # La versión se lee ANTES de consultar: si alguien escribe mientras tanto,
+    # la imagen queda con la versión vieja y la próxima petición la rehace
+    version = hashlib.sha1(database.version_datos().encode()).hexdigest()[:12]
+    archivo = f"{prefijo}{version}.{formato}"
+    ruta = os.path.abspath(os.path.join(CARPETA, archivo))
+    if not os.path.exists(ruta):
+        with _lock(archivo):
+            if not os.path.exists(ruta):
+                os.makedirs(CARPETA, exist_ok=True)
+                filas = Tarea.conteos(GRAFICOS[nombre][0], desde, hasta, incluir_archivadas)
+                _dibujar(nombre, filas, formato, ruta)
+                _borrar_anteriores(prefijo, prefijo + version)
+        with _locks_lock:
+            _locks.pop(archivo, None)
+    return ruta, archivo.rsplit(".", 1)[0]
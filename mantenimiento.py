@@ -0,0 +1,323 @@
+# mantenimiento.py
+"""
+Mantenimiento en línea de la base SQLite: respaldo, estadísticas, compactación y checkpoint.
+
+`Tarea.delete` deja páginas libres que SQLite nunca devuelve al disco y el
+archivo WAL crece mientras haya tráfico. Cada paso de este módulo que
+escribe trabaja en trozos pequeños con pausas entre ellos, así ninguna
+petición espera más de unos milisegundos por el mantenimiento:
+
+  - respaldo:    copia en línea con la API de backup (en un paso; WAL no bloquea a los escritores)
+  - archivar:    mueve completadas viejas a `tareas_archivo` en lotes
+  - optimizar:   PRAGMA optimize (ANALYZE solo de lo que lo necesita)
+  - vaciar:      PRAGMA incremental_vacuum(N) en transacciones cortas
+  - checkpoint:  PRAGMA wal_checkpoint (PASSIVE por defecto: no espera a nadie)
+
+Uso:
+    python mantenimiento.py todo --respaldos respaldos/
+    python mantenimiento.py respaldo --destino copia.sqlite
+    python mantenimiento.py archivar --dias 90 --lote 500
+    python mantenimiento.py checkpoint --modo truncate
+    python mantenimiento.py materializar --dias 30   # repeticiones de tareas recurrentes
+    python mantenimiento.py convertir   # una sola vez, con la app detenida
+
+También se puede programar dentro del proceso con `iniciar_mantenimiento_periodico`
+(o la variable DB_MANTENIMIENTO_HORAS, ver app.py).
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from time import perf_counter, sleep, strftime
+
+import database
+
+PAGINAS_POR_PASO = 64      # Páginas liberadas por paso (vaciado incremental)
+PAUSA_ENTRE_PASOS = 0.005  # Segundos de respiro entre pasos para las peticiones
+ESPERA_LOCK_MS = 50        # busy_timeout de la conexión de mantenimiento
+DIAS_ARCHIVO = int(os.environ.get("DB_ARCHIVAR_DIAS", "90"))  # Antigüedad mínima para archivar
+LOTE_ARCHIVO = 500         # Tareas movidas por transacción
+
+
+def _conectar():
+    conn = sqlite3.connect(database.DATABASE_NAME, isolation_level=None)
+    conn.execute(f"PRAGMA busy_timeout = {ESPERA_LOCK_MS}")
+    return conn
+
+def _imprimir(mensaje):
+    print(f" * {mensaje}")
+
+# -----------------------------------------------------------------------------
+# Pasos
+# -----------------------------------------------------------------------------
+def respaldar(destino, informar=_imprimir):
+    """Copia la base a `destino` sin detener la app.
+
+    La copia se hace en un solo paso dentro de una transacción de lectura:
+    en modo WAL los lectores no bloquean a los escritores, así que la app
+    sigue escribiendo mientras tanto y la copia queda consistente (lo
+    confirmado hasta que empezó). Copiar por trozos con pausas no sirve aquí:
+    cada escritura de otra conexión reinicia la copia y, con tráfico
+    constante, nunca termina.
+
+    Se escribe en `destino.tmp` y solo al final se renombra; si algo falla,
+    el temporal se borra. Devuelve los segundos que tardó.
+    """
+    inicio = perf_counter()
+    temporal = f"{destino}.tmp"
+    origen = _conectar()
+    copia = None
+    try:
+        if informar:
+            paginas = origen.execute("PRAGMA page_count").fetchone()[0]
+            informar(f"respaldo: copiando {paginas} páginas a {destino}")
+        copia = sqlite3.connect(temporal)
+        origen.backup(copia)  # pages=-1 (por defecto): todo en un paso
+        copia.close()
+        copia = None
+        os.replace(temporal, destino)
+    finally:
+        if copia is not None:
+            copia.close()
+        origen.close()
+        if os.path.exists(temporal):
+            os.remove(temporal)  # Respaldo fallido: no dejar el temporal a medias
+    duracion = perf_counter() - inicio
+    if informar:
+        informar(f"respaldo listo en {destino} ({duracion:.2f}s)")
+    return duracion
+
+def optimizar(informar=_imprimir):
+    """Actualiza las estadísticas del planificador solo donde hace falta."""
+    inicio = perf_counter()
+    conn = _conectar()
+    try:
+        conn.execute("PRAGMA analysis_limit = 400")  # ANALYZE aproximado: no recorre tablas completas
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+    duracion = perf_counter() - inicio
+    if informar:
+        informar(f"optimize listo ({duracion:.2f}s)")
+    return duracion
+
+def vaciar_incremental(paginas=PAGINAS_POR_PASO, pausa=PAUSA_ENTRE_PASOS, informar=_imprimir):
+    """Devuelve al disco las páginas libres, `paginas` por transacción.
+
+    Solo funciona si la base usa `auto_vacuum = INCREMENTAL` (las bases nuevas
+    lo usan desde init_db; las viejas necesitan `convertir()` una vez).
+    Devuelve el número de páginas liberadas.
+    """
+    inicio = perf_counter()
+    conn = _conectar()
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            if informar:
+                informar("vaciar: la base no usa auto_vacuum=INCREMENTAL; ejecuta `convertir` una vez")
+            return 0
+        libres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        liberadas = 0
+        while libres:
+            try:
+                # executescript avanza la sentencia hasta el final: con execute()
+                # el módulo sqlite3 da un solo paso y solo se libera una página
+                conn.executescript(f"PRAGMA incremental_vacuum({paginas})")
+            except sqlite3.OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+                sleep(pausa)  # Hay un escritor: se reintenta en el siguiente paso
+                continue
+            restantes = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            liberadas += libres - restantes
+            libres = restantes
+            if informar:
+                informar(f"vaciar: {liberadas} páginas liberadas, quedan {libres}")
+            sleep(pausa)
+    finally:
+        conn.close()
+    if informar:
+        informar(f"vaciar listo: {liberadas} páginas ({perf_counter() - inicio:.2f}s)")
+    return liberadas
+
+def archivar(dias=DIAS_ARCHIVO, lote=LOTE_ARCHIVO, pausa=PAUSA_ENTRE_PASOS, informar=_imprimir):
+    """Mueve a `tareas_archivo` las tareas completadas hace más de `dias` días.
+
+    Cada lote es una transacción corta: copia las filas (conservando el id) y
+    las borra de `tareas`. Se leen con `include_archived=true` en la API o
+    `incluir_archivadas=True` en los modelos. Devuelve cuántas se movieron.
+    """
+    inicio = perf_counter()
+    limite = f"-{int(dias)} days"
+    columnas = ("id, nombre, fecha_creacion, fecha_limite, prioridad, estado, tiempo_estimado, "
+                "completado_en, id_categoria, fecha_actualizacion, id_plantilla, ocurrencia")
+    conn = _conectar()
+    movidas = 0
+    try:
+        while True:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+                sleep(pausa)  # Hay un escritor: se reintenta en el siguiente paso
+                continue
+            try:
+                # Usa el índice parcial idx_tareas_completadas
+                ids = [fila[0] for fila in conn.execute(
+                    """SELECT id FROM tareas
+                       WHERE estado = 'completada' AND completado_en < datetime('now', 'localtime', ?)
+                       ORDER BY completado_en LIMIT ?""",
+                    (limite, lote),
+                )]
+                if ids:
+                    marcas = ",".join("?" * len(ids))
+                    conn.execute(f"INSERT INTO tareas_archivo ({columnas}) "
+                                 f"SELECT {columnas} FROM tareas WHERE id IN ({marcas})", ids)
+                    conn.execute(f"DELETE FROM tareas WHERE id IN ({marcas})", ids)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            if not ids:
+                break
+            movidas += len(ids)
+            if informar:
+                informar(f"archivar: {movidas} tareas movidas")
+            sleep(pausa)
+    finally:
+        conn.close()
+    if informar:
+        informar(f"archivar listo: {movidas} tareas completadas hace más de {dias} días "
+                 f"({perf_counter() - inicio:.2f}s)")
+    return movidas
+
+def checkpoint(modo="PASSIVE", informar=_imprimir):
+    """Copia el WAL a la base. PASSIVE no espera; TRUNCATE además vacía el archivo -wal.
+
+    Devuelve (ocupado, páginas_en_wal, páginas_copiadas) tal como lo reporta SQLite.
+    """
+    modo = modo.upper()
+    if modo not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Modo de checkpoint no válido: {modo}")
+    inicio = perf_counter()
+    conn = _conectar()
+    try:
+        ocupado, en_wal, copiadas = conn.execute(f"PRAGMA wal_checkpoint({modo})").fetchone()
+    finally:
+        conn.close()
+    if informar and en_wal == -1:
+        informar("checkpoint: la base no está en modo WAL, no hay nada que copiar")
+    elif informar:
+        informar(f"checkpoint {modo}: {copiadas}/{en_wal} páginas del WAL"
+                 f"{' (había lectores, se reintenta luego)' if ocupado else ''} ({perf_counter() - inicio:.2f}s)")
+    return ocupado, en_wal, copiadas
+
+def convertir(informar=_imprimir):
+    """Activa auto_vacuum=INCREMENTAL en una base existente.
+
+    Requiere un VACUUM completo, que bloquea la base mientras reescribe el
+    archivo: hacerlo una sola vez y con la app detenida.
+    """
+    inicio = perf_counter()
+    conn = sqlite3.connect(database.DATABASE_NAME, isolation_level=None)
+    try:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    if informar:
+        informar(f"base convertida a auto_vacuum=INCREMENTAL ({perf_counter() - inicio:.2f}s)")
+
+def todo(directorio_respaldos=None, informar=_imprimir):
+    """Respaldo (si se indica carpeta), archivado, optimize, vaciado incremental y checkpoint."""
+    if directorio_respaldos:
+        os.makedirs(directorio_respaldos, exist_ok=True)
+        nombre = os.path.splitext(os.path.basename(database.DATABASE_NAME))[0]
+        respaldar(os.path.join(directorio_respaldos, f"{nombre}-{strftime('%Y%m%d-%H%M%S')}.sqlite"),
+                  informar=informar)
+    archivar(informar=informar)
+    optimizar(informar=informar)
+    vaciar_incremental(informar=informar)
+    checkpoint(informar=informar)
+
+# -----------------------------------------------------------------------------
+# Tarea programada (opcional, dentro del proceso de la app)
+# -----------------------------------------------------------------------------
+def iniciar_mantenimiento_periodico(horas, directorio_respaldos=None):
+    """Ejecuta `todo()` cada `horas` horas en un hilo de fondo. Los errores se reportan y no detienen el hilo."""
+    def bucle():
+        while True:
+            sleep(horas * 3600)
+            try:
+                todo(directorio_respaldos)
+            except Exception as exc:
+                # Cualquier error (disco lleno, permisos, SQLite): se reporta y el hilo sigue vivo
+                print(f" * Mantenimiento fallido: {exc!r}")
+    hilo = threading.Thread(target=bucle, name="sqlite-mantenimiento", daemon=True)
+    hilo.start()
+    return hilo
+
+# -----------------------------------------------------------------------------
+# Línea de comandos
+# -----------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mantenimiento en línea de la base SQLite de Rutina.py")
+    parser.add_argument("--db", help=f"Archivo SQLite (por defecto {database.DATABASE_NAME})")
+    sub = parser.add_subparsers(dest="paso", required=True)
+
+    p = sub.add_parser("respaldo", help="Copia en línea con la API de backup")
+    p.add_argument("--destino", required=True)
+
+    p = sub.add_parser("archivar", help="Mueve completadas viejas a tareas_archivo")
+    p.add_argument("--dias", type=int, default=DIAS_ARCHIVO)
+    p.add_argument("--lote", type=int, default=LOTE_ARCHIVO)
+
+    sub.add_parser("optimizar", help="PRAGMA optimize / ANALYZE")
+
+    p = sub.add_parser("vaciar", help="Vacuum incremental por pasos")
+    p.add_argument("--paginas", type=int, default=PAGINAS_POR_PASO)
+    p.add_argument("--pausa", type=float, default=PAUSA_ENTRE_PASOS)
+
+    p = sub.add_parser("checkpoint", help="Checkpoint del WAL")
+    p.add_argument("--modo", default="PASSIVE", choices=["passive", "full", "restart", "truncate"],
+                   type=str.lower)
+
+    sub.add_parser("convertir", help="Activa auto_vacuum=INCREMENTAL (bloquea; con la app detenida)")
+
+    p = sub.add_parser("materializar", help="Crea las repeticiones de las plantillas recurrentes")
+    p.add_argument("--dias", type=int, default=None, help="Días hacia adelante (por defecto 14)")
+
+    p = sub.add_parser("todo", help="Respaldo + archivar + optimizar + vaciar + checkpoint")
+    p.add_argument("--respaldos", help="Carpeta donde guardar un respaldo con fecha")
+
+    args = parser.parse_args(argv)
+    if args.db:
+        database.DATABASE_NAME = args.db
+
+    inicio = perf_counter()
+    if args.paso == "respaldo":
+        respaldar(args.destino)
+    elif args.paso == "archivar":
+        archivar(args.dias, args.lote)
+    elif args.paso == "optimizar":
+        optimizar()
+    elif args.paso == "vaciar":
+        vaciar_incremental(args.paginas, args.pausa)
+    elif args.paso == "checkpoint":
+        checkpoint(args.modo)
+    elif args.paso == "convertir":
+        convertir()
+    elif args.paso == "materializar":
+        from datetime import date, timedelta
+        from models.plantilla import Plantilla
+        hasta = date.today() + timedelta(days=args.dias) if args.dias is not None else None
+        _imprimir(f"materializar: {Plantilla.materializar(hasta)} tareas creadas")
+    else:
+        todo(args.respaldos)
+    _imprimir(f"Mantenimiento terminado en {perf_counter() - inicio:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+# metricas.py
+"""
+Instrumentación por petición: latencia por ruta, consultas SQL y tiempo de plantillas.
+
+- Se engancha a `database.py` con `agregar_observador` y a Flask con
+  before_request/after_request y las señales de plantillas de Jinja.
+- Cada respuesta lleva un encabezado `Server-Timing` (visible en DevTools).
+- `GET /metrics` expone los acumulados en formato de texto de Prometheus.
+
+Las métricas viven en memoria de cada proceso (cada worker de gunicorn tiene
+las suyas). El costo por petición es de unos pocos perf_counter() y un lock.
+"""
+import os
+import re
+import threading
+from collections import deque
+from time import perf_counter
+
+from flask import Response, g, has_request_context, request
+from flask import before_render_template, template_rendered
+
+import admision
+import database
+
+# Límites de los buckets del histograma de latencia (segundos)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UMBRAL_LENTA = 0.1  # Consultas más lentas que esto se guardan como muestra
+MAX_MUESTRAS_LENTAS = 50
+
+_lock = threading.Lock()
+_rutas = {}         # (metodo, ruta) -> {"buckets": [...], "suma": s, "total": n, "sql": n, "sql_seg": s}
+_sql = {}           # tipo -> [total, segundos]
+_lentas = deque(maxlen=MAX_MUESTRAS_LENTAS)  # (segundos, tipo, sql)
+
+_ESPACIOS = re.compile(r"\s+")
+
+
+def _normalizar_sql(sql):
+    return _ESPACIOS.sub(" ", sql).strip() if sql else ""
+
+# -----------------------------------------------------------------------------
+# Recolección
+# -----------------------------------------------------------------------------
+def _observar_sql(tipo, sql, segundos):
+    """Observador para database.py: acumula por tipo y por petición."""
+    with _lock:
+        acumulado = _sql.setdefault(tipo, [0, 0.0])
+        acumulado[0] += 1
+        acumulado[1] += segundos
+        if segundos >= UMBRAL_LENTA and sql:
+            _lentas.append((segundos, tipo, _normalizar_sql(sql)))
+    if has_request_context() and "_metricas_inicio" in g:
+        if tipo == "connect":
+            g._metricas_connect += segundos
+        else:
+            g._metricas_sql += 1
+            g._metricas_sql_seg += segundos
+
+def _antes_de_peticion():
+    g._metricas_inicio = perf_counter()
+    g._metricas_connect = 0.0
+    g._metricas_sql = 0
+    g._metricas_sql_seg = 0.0
+    g._metricas_plantilla = 0.0
+
+def _antes_de_plantilla(sender, template, context, **extra):
+    g._metricas_plantilla_inicio = perf_counter()
+
+def _plantilla_renderizada(sender, template, context, **extra):
+    inicio = g.pop("_metricas_plantilla_inicio", None)
+    if inicio is not None and "_metricas_plantilla" in g:
+        g._metricas_plantilla += perf_counter() - inicio
+
+def registrar_peticion(metodo, ruta, total, sql, sql_seg):
+    """Acumula una petición terminada: latencia `total`, `sql` consultas y `sql_seg` segundos en SQL.
+
+    Lo usan el after_request de Flask y las rutas nativas de app_asgi.py.
+    """
+    clave = (metodo, ruta)
+    with _lock:
+        datos = _rutas.get(clave)
+        if datos is None:
+            datos = _rutas[clave] = {"buckets": [0] * len(BUCKETS), "suma": 0.0, "total": 0,
+                                     "sql": 0, "sql_seg": 0.0}
+        for i, limite in enumerate(BUCKETS):
+            if total <= limite:
+                datos["buckets"][i] += 1
+                break
+        datos["suma"] += total
+        datos["total"] += 1
+        datos["sql"] += sql
+        datos["sql_seg"] += sql_seg
+
+def server_timing(sql, sql_seg, connect, plantilla, total):
+    """Valor del encabezado Server-Timing (segundos -> milisegundos)."""
+    return (f'db;dur={sql_seg * 1000:.2f};desc="{sql} consultas", '
+            f"connect;dur={connect * 1000:.2f}, "
+            f"tpl;dur={plantilla * 1000:.2f}, "
+            f"total;dur={total * 1000:.2f}")
+
+def _despues_de_peticion(response):
+    if "_metricas_inicio" not in g:
+        return response
+    total = perf_counter() - g._metricas_inicio
+    ruta = request.url_rule.rule if request.url_rule else "sin_ruta"
+    registrar_peticion(request.method, ruta, total, g._metricas_sql, g._metricas_sql_seg)
+    response.headers.add("Server-Timing", server_timing(g._metricas_sql, g._metricas_sql_seg,
+                                                        g._metricas_connect, g._metricas_plantilla, total))
+    return response
+
+# -----------------------------------------------------------------------------
+# Exposición en formato Prometheus
+# -----------------------------------------------------------------------------
+def _etiqueta(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", " ").replace('"', '\\"')
+
+def texto_prometheus():
+    """Devuelve todas las métricas en el formato de exposición de Prometheus."""
+    with _lock:
+        rutas = {clave: {**datos, "buckets": list(datos["buckets"])} for clave, datos in _rutas.items()}
+        sql = {tipo: list(valores) for tipo, valores in _sql.items()}
+        lentas = list(_lentas)
+
+    lineas = [
+        "# HELP rutina_http_request_duration_seconds Latencia de las peticiones por ruta.",
+        "# TYPE rutina_http_request_duration_seconds histogram",
+    ]
+    for (metodo, ruta), datos in sorted(rutas.items()):
+        etiquetas = f'method="{metodo}",route="{_etiqueta(ruta)}"'
+        acumulado = 0
+        for limite, cantidad in zip(BUCKETS, datos["buckets"]):
+            acumulado += cantidad
+            lineas.append(f'rutina_http_request_duration_seconds_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+        lineas.append(f'rutina_http_request_duration_seconds_bucket{{{etiquetas},le="+Inf"}} {datos["total"]}')
+        lineas.append(f"rutina_http_request_duration_seconds_sum{{{etiquetas}}} {datos['suma']:.6f}")
+        lineas.append(f"rutina_http_request_duration_seconds_count{{{etiquetas}}} {datos['total']}")
+
+    lineas += [
+        "# HELP rutina_http_request_sql_queries_total Consultas SQL ejecutadas dentro de peticiones, por ruta.",
+        "# TYPE rutina_http_request_sql_queries_total counter",
+    ]
+    for (metodo, ruta), datos in sorted(rutas.items()):
+        lineas.append(f'rutina_http_request_sql_queries_total{{method="{metodo}",route="{_etiqueta(ruta)}"}} {datos["sql"]}')
+    lineas += [
+        "# HELP rutina_http_request_sql_seconds_total Tiempo en consultas SQL dentro de peticiones, por ruta.",
+        "# TYPE rutina_http_request_sql_seconds_total counter",
+    ]
+    for (metodo, ruta), datos in sorted(rutas.items()):
+        lineas.append(f'rutina_http_request_sql_seconds_total{{method="{metodo}",route="{_etiqueta(ruta)}"}} {datos["sql_seg"]:.6f}')
+
+    lineas += [
+        "# HELP rutina_sql_operations_total Operaciones de base de datos por tipo.",
+        "# TYPE rutina_sql_operations_total counter",
+    ]
+    for tipo, (total, _) in sorted(sql.items()):
+        lineas.append(f'rutina_sql_operations_total{{tipo="{tipo}"}} {total}')
+    lineas += [
+        "# HELP rutina_sql_operations_seconds_total Tiempo en operaciones de base de datos por tipo.",
+        "# TYPE rutina_sql_operations_seconds_total counter",
+    ]
+    for tipo, (_, segundos) in sorted(sql.items()):
+        lineas.append(f'rutina_sql_operations_seconds_total{{tipo="{tipo}"}} {segundos:.6f}')
+
+    lineas += [
+        f"# HELP rutina_sql_slow_query_seconds Muestras recientes de consultas de más de {UMBRAL_LENTA}s.",
+        "# TYPE rutina_sql_slow_query_seconds gauge",
+    ]
+    for segundos, tipo, texto in lentas:
+        lineas.append(f'rutina_sql_slow_query_seconds{{tipo="{tipo}",sql="{_etiqueta(texto[:200])}"}} {segundos:.6f}')
+
+    cola = database._cola_escritura
+    if cola is not None:
+        lineas += [
+            "# HELP rutina_sql_write_batches_total Transacciones confirmadas por la cola de escritura.",
+            "# TYPE rutina_sql_write_batches_total counter",
+            f"rutina_sql_write_batches_total {cola.lotes}",
+            "# HELP rutina_sql_write_statements_total Sentencias escritas por la cola de escritura.",
+            "# TYPE rutina_sql_write_statements_total counter",
+            f"rutina_sql_write_statements_total {cola.sentencias}",
+        ]
+    compuertas = sorted(admision.compuertas().items())
+    if compuertas:
+        lineas += [
+            "# HELP rutina_admission_in_flight Peticiones atendiéndose ahora, por clase de ruta.",
+            "# TYPE rutina_admission_in_flight gauge",
+        ]
+        lineas += [f'rutina_admission_in_flight{{clase="{clase}"}} {c.en_curso}' for clase, c in compuertas]
+        lineas += [
+            "# HELP rutina_admission_queue_depth Peticiones esperando un lugar, por clase de ruta.",
+            "# TYPE rutina_admission_queue_depth gauge",
+        ]
+        lineas += [f'rutina_admission_queue_depth{{clase="{clase}"}} {c.esperando}' for clase, c in compuertas]
+        lineas += [
+            "# HELP rutina_admission_admitted_total Peticiones admitidas, por clase de ruta.",
+            "# TYPE rutina_admission_admitted_total counter",
+        ]
+        lineas += [f'rutina_admission_admitted_total{{clase="{clase}"}} {c.admitidas}' for clase, c in compuertas]
+        lineas += [
+            "# HELP rutina_admission_rejected_total Peticiones rechazadas con 503, por clase y motivo.",
+            "# TYPE rutina_admission_rejected_total counter",
+        ]
+        for clase, c in compuertas:
+            for motivo, total in sorted(c.rechazadas.items()):
+                lineas.append(f'rutina_admission_rejected_total{{clase="{clase}",motivo="{motivo}"}} {total}')
+        lineas += [
+            "# HELP rutina_admission_wait_seconds_total Tiempo total esperando en la cola, por clase de ruta.",
+            "# TYPE rutina_admission_wait_seconds_total counter",
+        ]
+        lineas += [f'rutina_admission_wait_seconds_total{{clase="{clase}"}} {c.segundos_espera:.6f}'
+                   for clase, c in compuertas]
+    return "\n".join(lineas) + "\n"
+
+def _despues_de_fork():
+    """Cada worker empieza con sus propias métricas y un lock libre."""
+    global _lock
+    _lock = threading.Lock()
+    _rutas.clear()
+    _sql.clear()
+    _lentas.clear()
+
+if hasattr(os, "register_at_fork"):  # No existe en Windows
+    os.register_at_fork(after_in_child=_despues_de_fork)
+
+def reiniciar():
+    """Borra todos los acumulados (útil en benchmarks)."""
+    with _lock:
+        _rutas.clear()
+        _sql.clear()
+        _lentas.clear()
+
+# -----------------------------------------------------------------------------
+# Integración con Flask
+# -----------------------------------------------------------------------------
+def init_metricas(app, proteger=None):
+    """Activa la instrumentación en `app` y registra la ruta GET /metrics.
+
+    `proteger` es un decorador opcional (por ejemplo `requires_auth`).
+    """
+    database.agregar_observador(_observar_sql)
+    app.before_request(_antes_de_peticion)
+    app.after_request(_despues_de_peticion)
+    before_render_template.connect(_antes_de_plantilla, app)
+    template_rendered.connect(_plantilla_renderizada, app)
+
+    def metrics():
+        return Response(texto_prometheus(), mimetype="text/plain; version=0.0.4")
+    app.add_url_rule("/metrics", "metrics", proteger(metrics) if proteger else metrics)
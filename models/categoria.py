@@ -1,7 +1,28 @@
+import sqlite3
+
 from database import execute, query_one, query_all
 
+# `json_group_array(... ORDER BY id)` existe desde SQLite 3.44. Antes, el arreglo
+# sale en el orden de la subconsulta (así funciona en la práctica, aunque SQLite
+# no lo garantiza); la paginación no depende de eso porque usa max(id).
+_ORDEN_JSON = " ORDER BY id" if sqlite3.sqlite_version_info >= (3, 44, 0) else ""
+
 class Categoria:
     """Operaciones básicas sobre la tabla `categorias`."""
+    # Caché en memoria nombre -> id. Las categorías casi nunca cambian, así que
+    # guardamos las que ya vimos para evitar un SELECT en cada alta de tarea.
+    _cache_ids = {}
+
+    @staticmethod
+    def id_en_cache(nombre):
+        """Devuelve el id de la categoría si ya está en caché, o None."""
+        return Categoria._cache_ids.get(nombre)
+
+    @staticmethod
+    def limpiar_cache():
+        """Vacía la caché (después de renombrar o eliminar categorías)."""
+        Categoria._cache_ids.clear()
+
     # ------------------------------------------------------------------
     # Crear
     # ------------------------------------------------------------------
@@ -12,6 +33,7 @@ class Categoria:
             raise ValueError("El nombre de la categoría es obligatorio")
         query = execute("INSERT INTO categorias (nombre) VALUES (?)", (nombre,))
         print(f" * Categoría creada: {query}")
+        Categoria._cache_ids[nombre] = query
         return query
 
     # ------------------------------------------------------------------
@@ -34,9 +56,13 @@ class Categoria:
         """Devuelve un id; crea la categoría si no existe. Limpia y valida nombre."""
         if nombre == "":
             raise ValueError("El nombre de la categoría es obligatorio")
+        categoria_id = Categoria.id_en_cache(nombre)
+        if categoria_id is not None:
+            return categoria_id
         row = Categoria.get_by_name(nombre)
         if not row:
             return Categoria.create(nombre)
+        Categoria._cache_ids[nombre] = row["id"]
         return row["id"]
 
     @staticmethod
@@ -44,6 +70,7 @@ class Categoria:
         """Devuelve lista de filas con todas las categorías."""
         query = query_all("SELECT id, nombre FROM categorias ORDER BY id")
         print(f" * Categorías: {query}")
+        Categoria._cache_ids.update((row["nombre"], row["id"]) for row in query)
         return query
 
     # ------------------------------------------------------------------
@@ -53,6 +80,7 @@ class Categoria:
     def update(categoria_id, nuevo_nombre):
         """Actualiza el nombre de la categoría."""
         query = execute("UPDATE categorias SET nombre = ? WHERE id = ?", (nuevo_nombre, categoria_id))
+        Categoria.limpiar_cache()
         print(f" * Nombre de categoría actualizada a: {nuevo_nombre}")
         return query
 
@@ -63,6 +91,7 @@ class Categoria:
     def delete(categoria_id):
         """Elimina la categoría indicada."""
         query = execute("DELETE FROM categorias WHERE id = ?", (categoria_id,))
+        Categoria.limpiar_cache()
         print(f" * Categoría eliminada: {query}")
         return query
 
@@ -70,29 +99,88 @@ class Categoria:
     # JOINs — tareas con nombre de categoría
     # ------------------------------------------------------------------
     @staticmethod
-    def tareas_join(categoria_id=None):
-        """Devuelve tareas con el nombre de la categoría incluido.
-        
-        Si categoria_id es None, devuelve todas las tareas con sus categorías.
-        Si categoria_id es especificado, filtra por esa categoría.
+    def tareas_join(categoria_id=None, estado=None, prioridad=None, desde_id=None, limite=None,
+                    incluir_archivadas=False, actualizadas_desde=None):
+        """Devuelve tareas con el nombre de la categoría incluido (columna `categoria`).
+
+        Lee de la vista `vista_tareas`; SQLite resuelve el JOIN y usa los índices
+        de `tareas` para los filtros. Cada filtro es opcional:
+        - categoria_id: solo tareas de esa categoría
+        - estado: pendiente | en_progreso | completada
+        - prioridad: baja | media | alta
+        - desde_id / limite: paginación por llave (tareas con id > desde_id)
+        - incluir_archivadas: también las de `tareas_archivo` (vista_tareas_todas)
+        - actualizadas_desde: solo las creadas o modificadas en esa fecha/hora o después
+          (YYYY-MM-DD HH:MM:SS, como `fecha_actualizacion`); para refrescar cachés
+        """
+        where, params = Categoria._filtros_tareas(categoria_id, estado, prioridad, desde_id, actualizadas_desde)
+        vista = "vista_tareas_todas" if incluir_archivadas else "vista_tareas"
+        limit = ""
+        if limite is not None:
+            limit = "LIMIT ?"
+            params.append(limite)
+        return query_all(
+            f"""SELECT id, nombre, fecha_creacion, fecha_limite, prioridad, estado,
+                       tiempo_estimado, completado_en, id_categoria, fecha_actualizacion,
+                       categoria
+                FROM {vista} {where}
+                ORDER BY id {limit}""",
+            tuple(params),
+        )
+
+    @staticmethod
+    def _filtros_tareas(categoria_id, estado, prioridad, desde_id, actualizadas_desde):
+        """WHERE y parámetros de los filtros de tareas_join (los comparte tareas_json)."""
+        condiciones = []
+        params = []
+        if categoria_id is not None:
+            condiciones.append("id_categoria = ?")
+            params.append(categoria_id)
+        if estado is not None:
+            condiciones.append("estado = ?")
+            params.append(estado)
+        if prioridad is not None:
+            condiciones.append("prioridad = ?")
+            params.append(prioridad)
+        if desde_id is not None:
+            condiciones.append("id > ?")
+            params.append(desde_id)
+        if actualizadas_desde is not None:
+            condiciones.append("fecha_actualizacion >= ?")
+            params.append(actualizadas_desde)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return where, params
+
+    @staticmethod
+    def tareas_json(categoria_id=None, estado=None, prioridad=None, desde_id=None, limite=1000,
+                    incluir_archivadas=False, actualizadas_desde=None):
+        """Una página de tareas_join ya convertida a JSON por SQLite.
+
+        Mismos filtros que tareas_join. SQLite arma cada tarea con json_object
+        (las mismas llaves, en el mismo orden) y la página con json_group_array:
+        Python recibe UNA fila con el texto, sin un Row ni un dict por tarea.
+        Devuelve (texto del arreglo JSON, id de la última tarea o None, número de tareas).
+
+        La página (qué tareas entran) la fija `ORDER BY id LIMIT` de la
+        subconsulta; el id para la siguiente página es max(id), que no depende
+        del orden en que el agregado recorra las filas (ver _ORDEN_JSON).
         """
-        if categoria_id is None:
-            return query_all(
-                """SELECT t.id, t.nombre, t.creado_en, t.fecha_limite, t.prioridad, t.estado, 
-                          t.tiempo_estimado, t.completado_en, t.id_categoria, t.actualizado_en,
-                          c.nombre as categoria_nombre
-                   FROM tareas t 
-                   LEFT JOIN categorias c ON t.id_categoria = c.id 
-                   ORDER BY t.id"""
-            )
-        else:
-            return query_all(
-                """SELECT t.id, t.nombre, t.creado_en, t.fecha_limite, t.prioridad, t.estado, 
-                          t.tiempo_estimado, t.completado_en, t.id_categoria, t.actualizado_en,
-                          c.nombre as categoria_nombre
-                   FROM tareas t 
-                   LEFT JOIN categorias c ON t.id_categoria = c.id 
-                   WHERE t.id_categoria = ?
-                   ORDER BY t.id""",
-                (categoria_id,)
-            )
\ No newline at end of file
+        where, params = Categoria._filtros_tareas(categoria_id, estado, prioridad, desde_id, actualizadas_desde)
+        vista = "vista_tareas_todas" if incluir_archivadas else "vista_tareas"
+        # json(...): el texto de la subconsulta se vuelve a marcar como JSON (si no, se citaría como string)
+        fila = query_one(
+            f"""SELECT json_group_array(json(tarea){_ORDEN_JSON}) AS texto, max(id) AS ultimo_id, count(*) AS total
+                FROM (
+                    SELECT id, json_object(
+                        'id', id, 'nombre', nombre, 'fecha_creacion', fecha_creacion,
+                        'fecha_limite', fecha_limite, 'prioridad', prioridad, 'estado', estado,
+                        'tiempo_estimado', tiempo_estimado, 'completado_en', completado_en,
+                        'id_categoria', id_categoria, 'fecha_actualizacion', fecha_actualizacion,
+                        'categoria', categoria
+                    ) AS tarea
+                    FROM {vista} {where}
+                    ORDER BY id LIMIT ?
+                )""",
+            (*params, limite),
+        )
+        return fila["texto"], fila["ultimo_id"], fila["total"]
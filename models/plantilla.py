@@ -0,0 +1,186 @@
+"""Modelo Plantilla: tareas recurrentes (diarias, semanales o mensuales).
+
+Una plantilla guarda el nombre, la categoría y la regla de repetición. Las
+repeticiones no se crean por adelantado: `materializar(hasta)` genera en
+`tareas` las que faltan hasta esa fecha con un solo INSERT por lote, y el
+listado de la API la llama con el rango visible del calendario.
+
+Cada tarea generada guarda `id_plantilla` y `ocurrencia` (la fecha que
+representa). El índice único sobre ambas hace que materializar dos veces la
+misma fecha no duplique nada.
+"""
+
+import sqlite3
+from calendar import monthrange
+from datetime import date, timedelta
+from time import monotonic
+
+from database import execute, execute_returning, query_all, query_one
+from .categoria import Categoria
+from .vencimiento import Vencimiento
+
+HORIZONTE_DIAS = 14      # Si no se indica `hasta`, se materializa hasta hoy + 14 días
+MAX_HORIZONTE_DIAS = 366  # Nunca se genera más de un año hacia adelante
+FILAS_POR_INSERT = 4000   # 8 parámetros por fila: por debajo del límite de SQLite
+VIGENCIA_MEMORIA = 60     # Segundos que se confía en `_materializado` antes de volver a consultar
+
+_materializado = {"hasta": None, "momento": 0.0}  # Último `hasta` materializado en este proceso
+
+_COLUMNAS = """id, nombre, id_categoria, prioridad, tiempo_estimado, regla, intervalo,
+               dias_semana, hora, inicio, fin, materializado_hasta, activa"""
+
+
+def ocurrencias(plantilla, desde, hasta):
+    """Fechas (date) de la plantilla en el rango (desde, hasta]; `desde` puede ser None.
+
+    - diaria: cada `intervalo` días a partir de `inicio`
+    - semanal: los `dias_semana` (o el día de `inicio`) de cada `intervalo` semanas
+    - mensual: el mismo día de `inicio` cada `intervalo` meses (o el último día del mes)
+    """
+    inicio = date.fromisoformat(plantilla["inicio"])
+    if plantilla["fin"]:
+        hasta = min(hasta, date.fromisoformat(plantilla["fin"]))
+    primero = max(inicio, desde + timedelta(days=1)) if desde else inicio
+    intervalo = plantilla["intervalo"] or 1
+    fechas = []
+    if primero > hasta:
+        return fechas
+
+    if plantilla["regla"] == "diaria":
+        saltos = -(-(primero - inicio).days // intervalo)  # Primer múltiplo >= primero
+        dia = inicio + timedelta(days=saltos * intervalo)
+        while dia <= hasta:
+            fechas.append(dia)
+            dia += timedelta(days=intervalo)
+    elif plantilla["regla"] == "semanal":
+        dias = {int(d) for d in plantilla["dias_semana"].split(",")} if plantilla["dias_semana"] else {inicio.weekday()}
+        lunes_inicio = inicio - timedelta(days=inicio.weekday())
+        dia = primero
+        while dia <= hasta:
+            if dia.weekday() in dias and ((dia - lunes_inicio).days // 7) % intervalo == 0:
+                fechas.append(dia)
+            dia += timedelta(days=1)
+    else:  # mensual
+        meses = 0
+        while True:
+            anio, mes = divmod(inicio.month - 1 + meses, 12)
+            anio += inicio.year
+            mes += 1
+            dia = date(anio, mes, min(inicio.day, monthrange(anio, mes)[1]))
+            if dia > hasta:
+                break
+            if dia >= primero:
+                fechas.append(dia)
+            meses += intervalo
+    return fechas
+
+
+class Plantilla:
+    """Operaciones sobre la tabla `plantillas_recurrentes`."""
+
+    @staticmethod
+    def create(nombre, id_categoria, regla, intervalo=1, dias_semana=None, hora="23:59",
+               inicio=None, fin=None, prioridad="media", tiempo_estimado=None):
+        """Crea una plantilla (datos ya validados con validar_plantilla) y devuelve su id."""
+        try:
+            nuevo_id = execute(
+                """INSERT INTO plantillas_recurrentes
+                       (nombre, id_categoria, regla, intervalo, dias_semana, hora, inicio, fin, prioridad, tiempo_estimado)
+                   VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, date('now','localtime')), ?, ?, ?)""",
+                (nombre, id_categoria, regla, intervalo, dias_semana, hora, inicio, fin, prioridad, tiempo_estimado),
+            )
+        except sqlite3.IntegrityError as exc:
+            # Id de categoría viejo en la caché (ver Tarea.move_to_categoria)
+            Categoria.limpiar_cache()
+            raise ValueError("La categoría seleccionada ya no existe. Vuelve a intentarlo.") from exc
+        _materializado["hasta"] = None  # Hay una plantilla sin materializar
+        return nuevo_id
+
+    @staticmethod
+    def limpiar_cache():
+        """Olvida hasta dónde materializó este proceso; la próxima llamada vuelve a consultar."""
+        _materializado.update(hasta=None, momento=0.0)
+
+    @staticmethod
+    def get_by_id(plantilla_id):
+        return query_one(f"SELECT {_COLUMNAS} FROM plantillas_recurrentes WHERE id = ?", (plantilla_id,))
+
+    @staticmethod
+    def get_all():
+        return query_all(f"SELECT {_COLUMNAS} FROM plantillas_recurrentes WHERE activa = 1 ORDER BY id")
+
+    @staticmethod
+    def delete(plantilla_id):
+        """Elimina la plantilla y sus repeticiones futuras pendientes.
+
+        Las repeticiones pasadas o ya trabajadas se conservan (su `id_plantilla`
+        queda en NULL por la llave foránea).
+        """
+        execute(
+            """DELETE FROM tareas WHERE id_plantilla = ? AND estado = 'pendiente'
+               AND ocurrencia >= date('now','localtime')""",
+            (plantilla_id,),
+        )
+        execute("DELETE FROM plantillas_recurrentes WHERE id = ?", (plantilla_id,))
+        Vencimiento.limpiar()
+
+    @staticmethod
+    def materializar(hasta=None):
+        """Crea en `tareas` las repeticiones pendientes hasta `hasta` (date o YYYY-MM-DD).
+
+        Solo mira plantillas con `materializado_hasta` anterior a `hasta`, así
+        que llamarla en cada listado cuesta un SELECT (o nada, si este proceso
+        ya llegó a esa fecha hace menos de VIGENCIA_MEMORIA segundos).
+        Nunca crea repeticiones anteriores a hoy: una plantilla con `inicio`
+        en el pasado empieza a generarse desde hoy (si no, "inicio": "2000-01-01"
+        crearía miles de tareas ya vencidas).
+        Devuelve el número de tareas creadas.
+        """
+        hoy = date.today()
+        if hasta is None:
+            hasta = hoy + timedelta(days=HORIZONTE_DIAS)
+        elif isinstance(hasta, str):
+            hasta = date.fromisoformat(hasta[:10])
+        hasta = min(hasta, hoy + timedelta(days=MAX_HORIZONTE_DIAS))
+
+        previo = _materializado["hasta"]
+        if previo is not None and hasta <= previo and monotonic() - _materializado["momento"] < VIGENCIA_MEMORIA:
+            return 0
+
+        plantillas = query_all(
+            f"""SELECT {_COLUMNAS} FROM plantillas_recurrentes
+                WHERE activa = 1 AND (materializado_hasta IS NULL OR materializado_hasta < ?)""",
+            (hasta.isoformat(),),
+        )
+        ayer = hoy - timedelta(days=1)  # `ocurrencias` excluye `desde`: la primera puede ser hoy
+        filas = []
+        for plantilla in plantillas:
+            desde = ayer
+            if plantilla["materializado_hasta"]:
+                desde = max(desde, date.fromisoformat(plantilla["materializado_hasta"]))
+            for dia in ocurrencias(plantilla, desde, hasta):
+                filas.append((plantilla["nombre"], plantilla["id_categoria"], plantilla["prioridad"],
+                              plantilla["tiempo_estimado"], f"{dia.isoformat()}T{plantilla['hora']}",
+                              plantilla["id"], dia.isoformat(), "pendiente"))
+
+        # Un INSERT con muchas filas = una transacción (un solo fsync) por lote
+        total = 0
+        for inicio in range(0, len(filas), FILAS_POR_INSERT):
+            lote = filas[inicio:inicio + FILAS_POR_INSERT]
+            creadas = execute_returning(
+                "INSERT OR IGNORE INTO tareas (nombre, id_categoria, prioridad, tiempo_estimado, fecha_limite, "
+                "id_plantilla, ocurrencia, estado) VALUES " + ", ".join(["(?, ?, ?, ?, ?, ?, ?, ?)"] * len(lote))
+                + " RETURNING id, fecha_limite",
+                tuple(valor for fila in lote for valor in fila),
+            )
+            for creada in creadas:
+                Vencimiento.registrar(creada["id"], creada["fecha_limite"])
+            total += len(creadas)
+        if plantillas:
+            ids = [plantilla["id"] for plantilla in plantillas]
+            execute(
+                f"UPDATE plantillas_recurrentes SET materializado_hasta = ? WHERE id IN ({', '.join('?' * len(ids))})",
+                (hasta.isoformat(), *ids),
+            )
+        _materializado.update(hasta=hasta, momento=monotonic())
+        return total
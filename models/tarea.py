@@ -4,8 +4,28 @@ Objetivo: centralizar CRUD con pocas funciones, devolver tipos básicos (tuplas
 y añadir comentarios claros. Sin clases avanzadas ni decoradores.
 """
 
-from database import execute, query_one, query_all
+import sqlite3
+from itertools import chain
+
+from database import execute, execute_returning, query_one, query_all
 from .categoria import Categoria
+from .vencimiento import Vencimiento
+from . import validacion
+
+def _tabla(incluir_archivadas):
+    """Tareas activas, o activas + archivadas (vista `vista_tareas_todas` de database.py)."""
+    return "vista_tareas_todas" if incluir_archivadas else "tareas"
+
+# Tareas por consulta en Tarea.json_con_categoria (cada página es un trozo de la respuesta)
+TAMANO_PAGINA_JSON = 2000
+
+# Columnas por las que Tarea.conteos puede agrupar (llave -> expresión SQL)
+_AGRUPABLES = {
+    "prioridad": "prioridad",
+    "estado": "estado",
+    "categoria": "COALESCE(categoria, 'Sin categoría')",
+    "dia": "date(fecha_creacion)",
+}
 
 class Tarea:
     """Operaciones básicas sobre la tabla `tareas`."""
@@ -14,67 +34,16 @@ class Tarea:
     def validate(nombre, id_categoria_raw, fecha_limite=None, prioridad=None, tiempo_estimado=None):
         """Valida datos de entrada para Tarea y retorna (nombre_limpio, id_categoria, fecha_limite, prioridad, tiempo_estimado).
 
+        Usa los validadores de `models.validacion` (sin consultas a la base para ids).
         Lanza ValueError con mensajes orientados al usuario si algo no es válido.
         """
-        # Validación de nombre
-        if nombre is None:
-            raise ValueError("El nombre de la tarea es obligatorio")
-        nombre = str(nombre).strip()
-        if nombre == "":
-            raise ValueError("El nombre de la tarea es obligatorio")
-
-        # Validación de categoría
-        if id_categoria_raw is None or str(id_categoria_raw).strip() == "":
-            raise ValueError("Debes seleccionar una categoría válida")
-        categoria_str = str(id_categoria_raw).strip()
-        if categoria_str.isdigit():
-            id_categoria = int(categoria_str)
-            if not Categoria.get_by_id(id_categoria):
-                raise ValueError("La categoría seleccionada no existe")
-        else:
-            row = Categoria.get_by_name(categoria_str)
-            if not row:
-                raise ValueError("La categoría seleccionada no existe")
-            id_categoria = row["id"] if isinstance(row, dict) else row.id
-
-        # Validación de fecha límite (opcional) - ahora acepta fecha y hora
-        fecha_limite_ok = None
-        if fecha_limite and str(fecha_limite).strip():
-            fecha_limite_str = str(fecha_limite).strip()
-            # Validar formato de fecha y hora (YYYY-MM-DDTHH:MM)
-            try:
-                from datetime import datetime
-                # Intentar parsear el formato datetime-local
-                if 'T' in fecha_limite_str:
-                    datetime.strptime(fecha_limite_str, "%Y-%m-%dT%H:%M")
-                else:
-                    # Si solo tiene fecha, agregar hora por defecto (23:59)
-                    datetime.strptime(fecha_limite_str, "%Y-%m-%d")
-                    fecha_limite_str = fecha_limite_str + "T23:59"
-                fecha_limite_ok = fecha_limite_str
-            except ValueError:
-                raise ValueError("La fecha límite debe tener el formato YYYY-MM-DD o YYYY-MM-DDTHH:MM")
-
-        # Validación de prioridad
-        prioridad_ok = "media"  # valor por defecto
-        if prioridad and str(prioridad).strip():
-            prioridad_valida = str(prioridad).strip().lower()
-            if prioridad_valida in ["baja", "media", "alta"]:
-                prioridad_ok = prioridad_valida
-            else:
-                raise ValueError("La prioridad debe ser: baja, media o alta")
-
-        # Validación de tiempo estimado
-        tiempo_estimado_ok = None
-        if tiempo_estimado is not None and str(tiempo_estimado).strip():
-            try:
-                tiempo_estimado_ok = int(tiempo_estimado)
-                if tiempo_estimado_ok < 0:
-                    raise ValueError("El tiempo estimado no puede ser negativo")
-            except ValueError:
-                raise ValueError("El tiempo estimado debe ser un número entero válido")
-
-        return nombre, id_categoria, fecha_limite_ok, prioridad_ok, tiempo_estimado_ok
+        return (
+            validacion.validar_nombre(nombre),
+            validacion.validar_categoria(id_categoria_raw),
+            validacion.validar_fecha_limite(fecha_limite),
+            validacion.validar_prioridad(prioridad),
+            validacion.validar_tiempo_estimado(tiempo_estimado),
+        )
     
     @staticmethod
     def create(nombre="", id_categoria=None, estado="pendiente", fecha_limite=None, prioridad=None, tiempo_estimado=None):
@@ -98,35 +67,43 @@ class Tarea:
             completado_en = "datetime('now','localtime')"
         
         try:
-            return execute(
+            nuevo_id = execute(
                 """INSERT INTO tareas (nombre, estado, id_categoria, fecha_limite, prioridad, tiempo_estimado, completado_en) 
                    VALUES (?, ?, ?, ?, ?, ?, ?)""",
                 (nombre_ok, estado, categoria_ok, fecha_limite_ok, prioridad_ok, tiempo_estimado_ok, completado_en),
             )
         except Exception as exc:
-            # Normalizamos errores de integridad a ValueError con mensaje de usuario
+            # Normalizamos errores de integridad a ValueError con mensaje de usuario.
+            # Si la categoría ya no existe, la caché podría estar desactualizada.
+            Categoria.limpiar_cache()
             raise ValueError("No se pudo crear la tarea por una restricción de integridad.") from exc
+        Vencimiento.registrar(nuevo_id, fecha_limite_ok, estado)
+        return nuevo_id
 
     # ------------------------------------------------------------------
     # Leer (SELECT)
     # ------------------------------------------------------------------
     @staticmethod
-    def get_by_id(tarea_id):
-        """Devuelve una fila con todos los campos de la tarea o None."""
+    def get_by_id(tarea_id, incluir_archivadas=False):
+        """Devuelve una fila con todos los campos de la tarea o None.
+
+        Las tareas archivadas solo se buscan con `incluir_archivadas=True`
+        (son de solo lectura: los UPDATE de este modelo solo tocan `tareas`).
+        """
         return query_one(
-            """SELECT id, nombre, fecha_creacion, fecha_limite, prioridad, estado, tiempo_estimado, 
+            f"""SELECT id, nombre, fecha_creacion, fecha_limite, prioridad, estado, tiempo_estimado, 
                       completado_en, id_categoria, fecha_actualizacion 
-               FROM tareas WHERE id = ?""",
+               FROM {_tabla(incluir_archivadas)} WHERE id = ?""",
             (tarea_id,),
         )
 
     @staticmethod
-    def get_all():
-        """Devuelve lista de filas con todas las tareas."""
+    def get_all(incluir_archivadas=False):
+        """Devuelve lista de filas con todas las tareas (activas, o también archivadas)."""
         return query_all(
-            """SELECT id, nombre, fecha_creacion, fecha_limite, prioridad, estado, tiempo_estimado, 
+            f"""SELECT id, nombre, fecha_creacion, fecha_limite, prioridad, estado, tiempo_estimado, 
                       completado_en, id_categoria, fecha_actualizacion 
-               FROM tareas ORDER BY id"""
+               FROM {_tabla(incluir_archivadas)} ORDER BY id"""
         )
 
     # ------------------------------------------------------------------
@@ -146,35 +123,50 @@ class Tarea:
         
         Si el estado es 'completada', también establece completado_en.
         Si se cambia de 'completada' a otro estado, limpia completado_en.
+        RETURNING devuelve la fecha límite para el motor de vencimientos (sin otra consulta).
         """
         if nuevo_estado == "completada":
-            execute(
+            filas = execute_returning(
                 """UPDATE tareas SET estado = ?, completado_en = datetime('now','localtime'), 
-                   fecha_actualizacion = datetime('now','localtime') WHERE id = ?""",
+                   fecha_actualizacion = datetime('now','localtime') WHERE id = ? RETURNING fecha_limite""",
                 (nuevo_estado, tarea_id),
             )
         else:
-            execute(
+            filas = execute_returning(
                 """UPDATE tareas SET estado = ?, completado_en = NULL, 
-                   fecha_actualizacion = datetime('now','localtime') WHERE id = ?""",
+                   fecha_actualizacion = datetime('now','localtime') WHERE id = ? RETURNING fecha_limite""",
                 (nuevo_estado, tarea_id),
             )
+        if filas:
+            Vencimiento.registrar(tarea_id, filas[0]["fecha_limite"], nuevo_estado)
 
     @staticmethod
     def move_to_categoria(tarea_id, nueva_categoria_id):
-        """Mueve la tarea a otra categoría (FK válida) y actualiza `fecha_actualizacion`."""
-        execute(
-            "UPDATE tareas SET id_categoria = ?, fecha_actualizacion = datetime('now','localtime') WHERE id = ?",
-            (nueva_categoria_id, tarea_id),
-        )
+        """Mueve la tarea a otra categoría (FK válida) y actualiza `fecha_actualizacion`.
+
+        Si la categoría ya no existe (el id venía de la caché de otra época),
+        vacía la caché y lanza ValueError: la ruta responde 400 y el próximo
+        intento vuelve a buscar la categoría por nombre.
+        """
+        try:
+            execute(
+                "UPDATE tareas SET id_categoria = ?, fecha_actualizacion = datetime('now','localtime') WHERE id = ?",
+                (nueva_categoria_id, tarea_id),
+            )
+        except sqlite3.IntegrityError as exc:
+            Categoria.limpiar_cache()
+            raise ValueError("La categoría seleccionada ya no existe. Vuelve a intentarlo.") from exc
 
     @staticmethod
     def set_fecha_limite(tarea_id, fecha_limite):
         """Actualiza la fecha límite de la tarea y `fecha_actualizacion`."""
-        execute(
-            "UPDATE tareas SET fecha_limite = ?, fecha_actualizacion = datetime('now','localtime') WHERE id = ?",
+        filas = execute_returning(
+            """UPDATE tareas SET fecha_limite = ?, fecha_actualizacion = datetime('now','localtime')
+               WHERE id = ? RETURNING estado""",
             (fecha_limite, tarea_id),
         )
+        if filas:
+            Vencimiento.registrar(tarea_id, fecha_limite, filas[0]["estado"])
 
     @staticmethod
     def set_prioridad(tarea_id, prioridad):
@@ -192,8 +184,8 @@ class Tarea:
     @staticmethod
     def set_tiempo_estimado(tarea_id, tiempo_estimado):
         """Actualiza el tiempo estimado de la tarea y `fecha_actualizacion`."""
-        if tiempo_estimado is not None and tiempo_estimado < 0:
-            raise ValueError("El tiempo estimado no puede ser negativo")
+        if tiempo_estimado is not None:
+            tiempo_estimado = validacion.validar_tiempo_estimado(tiempo_estimado)
         execute(
             "UPDATE tareas SET tiempo_estimado = ?, fecha_actualizacion = datetime('now','localtime') WHERE id = ?",
             (tiempo_estimado, tarea_id),
@@ -206,6 +198,7 @@ class Tarea:
     def delete(tarea_id):
         """Elimina la tarea indicada."""
         execute("DELETE FROM tareas WHERE id = ?", (tarea_id,))
+        Vencimiento.quitar(tarea_id)
 
     # ------------------------------------------------------------------
     # Consultas específicas con nuevos campos
@@ -221,24 +214,40 @@ class Tarea:
         )
 
     @staticmethod
-    def get_tareas_vencidas():
-        """Devuelve lista de tareas que han pasado su fecha límite y no están completadas."""
-        return query_all(
-            """SELECT id, nombre, fecha_creacion, fecha_limite, prioridad, estado, tiempo_estimado, 
-                      completado_en, id_categoria, fecha_actualizacion 
-               FROM tareas WHERE fecha_limite < datetime('now','localtime') 
-               AND estado != 'completada' ORDER BY fecha_limite ASC"""
-        )
+    def get_tareas_vencidas(limite=None):
+        """Devuelve lista de tareas que han pasado su fecha límite y no están completadas.
+
+        Usa el motor de vencimientos en memoria (models/vencimiento.py).
+        """
+        return Vencimiento.filas(Vencimiento.ids_vencidas(limite))
 
     @staticmethod
-    def get_tareas_completadas():
+    def get_tareas_proximas(horas=24, limite=None):
+        """Devuelve las tareas no completadas que vencen en las próximas `horas`."""
+        return Vencimiento.filas(Vencimiento.ids_proximas(horas, limite))
+
+    @staticmethod
+    def get_recordatorios(limite=5):
+        """Devuelve {"vencidas": [...], "siguientes": [...]}: lo que ya venció y las próximas fechas límite."""
+        return {
+            "vencidas": Vencimiento.filas(Vencimiento.ids_vencidas(limite)),
+            "siguientes": Vencimiento.filas(Vencimiento.ids_siguientes(limite)),
+        }
+
+    @staticmethod
+    def get_tareas_completadas(incluir_archivadas=False):
         """Devuelve lista de tareas completadas ordenadas por fecha de completado."""
         return query_all(
-            """SELECT id, nombre, fecha_creacion, fecha_limite, prioridad, estado, tiempo_estimado, 
+            f"""SELECT id, nombre, fecha_creacion, fecha_limite, prioridad, estado, tiempo_estimado, 
                       completado_en, id_categoria, fecha_actualizacion 
-               FROM tareas WHERE estado = 'completada' ORDER BY completado_en DESC"""
+               FROM {_tabla(incluir_archivadas)} WHERE estado = 'completada' ORDER BY completado_en DESC"""
         )
 
+    @staticmethod
+    def contar(incluir_archivadas=False):
+        """Devuelve el número de tareas (activas, o también archivadas)."""
+        return query_one(f"SELECT COUNT(*) AS total FROM {_tabla(incluir_archivadas)}")["total"]
+
     @staticmethod
     def get_tiempo_total_estimado():
         """Devuelve la suma total del tiempo estimado de todas las tareas pendientes."""
@@ -247,13 +256,117 @@ class Tarea:
         )
         return result["total"] if result and result["total"] else 0
 
+    @staticmethod
+    def estadisticas():
+        """Devuelve conteos por estado, prioridad y categoría, más el tiempo estimado pendiente.
+
+        Son recorridos completos de la tabla: conviene llamarlo dentro de
+        `database.usar_snapshot()` para no competir con el tráfico interactivo.
+        """
+        # Una sola consulta: cada parte del UNION ALL marca su grupo
+        filas = query_all(
+            """SELECT orden, valor, total FROM (
+                   SELECT 1 AS orden, estado AS valor, COUNT(*) AS total FROM tareas GROUP BY estado
+                   UNION ALL
+                   SELECT 2, prioridad, COUNT(*) FROM tareas GROUP BY prioridad
+                   UNION ALL
+                   SELECT 3, categoria, COUNT(*) FROM vista_tareas GROUP BY categoria
+                   UNION ALL
+                   SELECT 4, NULL, SUM(tiempo_estimado) FROM tareas
+                   WHERE estado != 'completada' AND tiempo_estimado IS NOT NULL
+               )
+               ORDER BY orden, CASE WHEN orden = 3 THEN -total END, valor"""
+        )
+        grupos = {1: {}, 2: {}, 3: {}, 4: {}}
+        for fila in filas:
+            grupos[fila["orden"]][fila["valor"]] = fila["total"]
+        return {
+            "por_estado": grupos[1],
+            "por_prioridad": grupos[2],
+            "por_categoria": grupos[3],
+            "tiempo_total_estimado": grupos[4].get(None) or 0,
+        }
+
+    @staticmethod
+    def conteos(agrupar, desde=None, hasta=None, incluir_archivadas=False):
+        """Cuenta tareas agrupadas por las columnas de `agrupar` (una consulta GROUP BY).
+
+        `agrupar` es una tupla de llaves de _AGRUPABLES, por ejemplo ("categoria", "estado").
+        `desde` / `hasta` (YYYY-MM-DD, ya validadas) filtran por fecha de creación.
+        Devuelve filas con esas columnas más `total`, ordenadas por ellas.
+        """
+        columnas = ", ".join(f"{_AGRUPABLES[llave]} AS {llave}" for llave in agrupar)
+        condiciones, params = [], []
+        if desde:
+            condiciones.append("fecha_creacion >= ?")
+            params.append(desde)
+        if hasta:
+            condiciones.append("fecha_creacion < date(?, '+1 day')")
+            params.append(hasta)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        vista = "vista_tareas_todas" if incluir_archivadas else "vista_tareas"
+        orden = ", ".join(agrupar)
+        return query_all(
+            f"SELECT {columnas}, COUNT(*) AS total FROM {vista} {where} GROUP BY {orden} ORDER BY {orden}",
+            tuple(params),
+        )
+
     # ------------------------------------------------------------------
     # JOINs — tareas con nombre de categoría
     # ------------------------------------------------------------------
     @staticmethod
-    def with_categoria(categoria_id=None):
+    def with_categoria(categoria_id=None, estado=None, prioridad=None, desde_id=None, limite=None,
+                       incluir_archivadas=False, actualizadas_desde=None):
         """Delegado: usa Categoria.tareas_join para el JOIN tareas-categorías."""
-        return Categoria.tareas_join(categoria_id)
+        return Categoria.tareas_join(categoria_id, estado, prioridad, desde_id, limite, incluir_archivadas,
+                                     actualizadas_desde)
 
+    @staticmethod
+    def json_con_categoria(categoria_id=None, estado=None, prioridad=None, desde_id=None, limite=None,
+                           incluir_archivadas=False, actualizadas_desde=None):
+        """Lo mismo que with_categoria, pero como un arreglo JSON en trozos de bytes (para streaming).
+
+        Lee páginas de TAMANO_PAGINA_JSON tareas por llave (id > última) con
+        Categoria.tareas_json: SQLite escribe el JSON y Python solo une los trozos.
 
+        La primera página se lee aquí mismo, antes de devolver el iterador: si la
+        base falla, el error sale en la ruta (un 500 normal) y no a mitad de un
+        200 ya enviado. Las demás se leen a medida que se recorre.
+        """
+        trozos = Tarea._json_por_paginas(categoria_id, estado, prioridad, desde_id, limite,
+                                         incluir_archivadas, actualizadas_desde)
+        primero = next(trozos)
+        return chain([primero], trozos)
 
+    @staticmethod
+    def _json_por_paginas(categoria_id, estado, prioridad, desde_id, limite, incluir_archivadas,
+                          actualizadas_desde):
+        """Generador de json_con_categoria: '[' + página, ',' + página..., ']'."""
+        pendientes = limite
+        separador = b"["
+        while pendientes is None or pendientes > 0:
+            tamano = TAMANO_PAGINA_JSON if pendientes is None else min(TAMANO_PAGINA_JSON, pendientes)
+            texto, ultimo_id, total = Categoria.tareas_json(categoria_id, estado, prioridad, desde_id, tamano,
+                                                             incluir_archivadas, actualizadas_desde)
+            if not total:
+                break
+            # '[{...},{...}]' -> '{...},{...}' para unir las páginas en un solo arreglo
+            yield separador + texto[1:-1].encode("utf-8")
+            separador = b","
+            desde_id = ultimo_id
+            if pendientes is not None:
+                pendientes -= total
+            if total < tamano:
+                break
+        yield b"]" if separador == b"," else b"[]"
+
+    @staticmethod
+    def get_by_id_with_categoria(tarea_id, incluir_archivadas=False):
+        """Devuelve una tarea con el nombre de su categoría (columna `categoria`) o None."""
+        vista = "vista_tareas_todas" if incluir_archivadas else "vista_tareas"
+        return query_one(
+            f"""SELECT id, nombre, fecha_creacion, fecha_limite, prioridad, estado, tiempo_estimado,
+                      completado_en, id_categoria, fecha_actualizacion, categoria
+               FROM {vista} WHERE id = ?""",
+            (tarea_id,),
+        )
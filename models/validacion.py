@@ -0,0 +1,322 @@
+"""Validación de datos de entrada para Tarea (y plantillas recurrentes).
+
+Objetivo: un solo lugar con las reglas de validación, compartido por la API JSON
+y por los formularios HTML (`/crear`, `/editar/<id>`).
+
+- Los formatos de fecha se compilan una sola vez al importar el módulo.
+- Un "esquema" es un diccionario campo -> función validadora; se reutiliza
+  tanto para crear (todos los campos) como para editar (solo los enviados).
+- No se hacen SELECT para verificar categorías por id: los nombres se resuelven
+  con la caché de `Categoria` y la existencia del id la garantiza la llave
+  foránea de SQLite al escribir.
+
+Todas las funciones lanzan ValueError con mensajes orientados al usuario.
+"""
+
+import math
+import re
+from datetime import date, datetime
+
+from .categoria import Categoria
+
+PRIORIDADES = ("baja", "media", "alta")
+ESTADOS = ("pendiente", "en_progreso", "completada")
+REGLAS = ("diaria", "semanal", "mensual")
+# Tope del tiempo estimado (un año en minutos): cabe de sobra en un INTEGER de
+# SQLite y evita el OverflowError al guardar valores enormes como 10**30
+MAX_TIEMPO_ESTIMADO = 366 * 24 * 60
+# Topes de los parámetros de listado (?limite, ?desde_id, ?categoria_id): un
+# número más grande que un INTEGER de SQLite (2**63 - 1) lanzaría OverflowError
+MAX_LIMITE = 1_000_000
+MAX_ID = 2 ** 63 - 1
+# Ventana máxima de ?horas en /api/tareas/proximas (un año)
+MAX_HORAS = 366 * 24
+
+# Formatos aceptados para fecha_limite (compilados una sola vez)
+_FECHA_HORA = re.compile(r"(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2})")
+_SOLO_FECHA = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_MENSAJE_FECHA = "La fecha límite debe tener el formato YYYY-MM-DD o YYYY-MM-DDTHH:MM"
+_HORA = re.compile(r"([01]\d|2[0-3]):([0-5]\d)")
+
+
+def _texto(valor):
+    """Convierte a str sin espacios; None y '' se tratan igual (vacío)."""
+    if valor is None:
+        return ""
+    return str(valor).strip()
+
+# ----------------------------------------------------------------------
+# Validadores por campo
+# ----------------------------------------------------------------------
+def validar_nombre(valor):
+    nombre = _texto(valor)
+    if nombre == "":
+        raise ValueError("El nombre de la tarea es obligatorio")
+    return nombre
+
+def validar_nombre_categoria(valor):
+    categoria = _texto(valor)
+    if categoria == "":
+        raise ValueError("Debes proporcionar una 'categoria' válida")
+    return categoria
+
+def _id_categoria(numero):
+    if not 1 <= numero <= MAX_ID:
+        raise ValueError("Debes seleccionar una categoría válida")
+    return numero
+
+def validar_categoria(valor):
+    """Acepta un id (int o dígitos) o un nombre de categoría y devuelve el id.
+
+    Para ids no se hace SELECT: si no existe, la llave foránea
+    de `tareas.id_categoria` rechazará el INSERT/UPDATE.
+    True/False no son ids (bool es subclase de int) y los ids fuera del rango
+    de un INTEGER de SQLite tampoco.
+    """
+    if isinstance(valor, bool):
+        raise ValueError("Debes seleccionar una categoría válida")
+    if isinstance(valor, int):
+        return _id_categoria(valor)
+    categoria = _texto(valor)
+    if categoria == "":
+        raise ValueError("Debes seleccionar una categoría válida")
+    if categoria.isdigit():
+        return _id_categoria(int(categoria))
+    id_categoria = Categoria.id_en_cache(categoria)
+    if id_categoria is None:
+        row = Categoria.get_by_name(categoria)
+        if not row:
+            raise ValueError("La categoría seleccionada no existe")
+        id_categoria = row["id"]
+    return id_categoria
+
+def validar_fecha_limite(valor):
+    """Devuelve la fecha en formato YYYY-MM-DDTHH:MM, o None si viene vacía.
+
+    Si solo se indica la fecha, se agrega la hora por defecto (23:59).
+    """
+    fecha = _texto(valor)
+    if fecha == "":
+        return None
+    match = _FECHA_HORA.fullmatch(fecha)
+    sufijo = ""
+    if match is None:
+        match = _SOLO_FECHA.fullmatch(fecha)
+        sufijo = "T23:59"
+    if match is None:
+        raise ValueError(_MENSAJE_FECHA)
+    try:
+        datetime(*map(int, match.groups()))  # Verifica rangos (mes 13, día 31 de febrero...)
+    except ValueError:
+        raise ValueError(_MENSAJE_FECHA)
+    return fecha + sufijo
+
+def validar_prioridad(valor):
+    prioridad = _texto(valor).lower()
+    if prioridad == "":
+        return "media"  # valor por defecto
+    if prioridad not in PRIORIDADES:
+        raise ValueError("La prioridad debe ser: baja, media o alta")
+    return prioridad
+
+def validar_tiempo_estimado(valor):
+    if isinstance(valor, bool):
+        raise ValueError("El tiempo estimado debe ser un número entero válido")
+    if isinstance(valor, float) and not math.isfinite(valor):
+        # El JSON puede traer 1e999 (infinito) o NaN: int() lanzaría OverflowError
+        raise ValueError("El tiempo estimado debe ser un número entero válido")
+    if isinstance(valor, (int, float)):
+        minutos = int(valor)
+    else:
+        texto = _texto(valor)
+        if texto == "":
+            return None
+        try:
+            minutos = int(texto)
+        except ValueError:
+            raise ValueError("El tiempo estimado debe ser un número entero válido")
+    if minutos < 0:
+        raise ValueError("El tiempo estimado no puede ser negativo")
+    if minutos > MAX_TIEMPO_ESTIMADO:
+        raise ValueError(f"El tiempo estimado no puede superar {MAX_TIEMPO_ESTIMADO} minutos (un año)")
+    return minutos
+
+def validar_estado(valor):
+    estado = _texto(valor).lower()
+    if estado == "":
+        return "pendiente"
+    if estado not in ESTADOS:
+        raise ValueError("El estado debe ser: pendiente, en_progreso o completada")
+    return estado
+
+def validar_regla(valor):
+    regla = _texto(valor).lower()
+    if regla not in REGLAS:
+        raise ValueError("La regla debe ser: diaria, semanal o mensual")
+    return regla
+
+def validar_intervalo(valor):
+    texto = _texto(valor)
+    if texto == "":
+        return 1
+    if not texto.isdigit() or int(texto) < 1:
+        raise ValueError("El intervalo debe ser un número entero mayor que 0")
+    return int(texto)
+
+def validar_dias_semana(valor):
+    """Acepta una lista [0, 2, 4] o un texto "0,2,4" (0=lunes ... 6=domingo). Devuelve "0,2,4" o None."""
+    if isinstance(valor, (list, tuple)):
+        partes = [_texto(v) for v in valor]
+    else:
+        partes = [p.strip() for p in _texto(valor).split(",") if p.strip()]
+    if not partes:
+        return None
+    if any(not p.isdigit() or int(p) > 6 for p in partes):
+        raise ValueError("Los días de la semana van de 0 (lunes) a 6 (domingo)")
+    return ",".join(str(d) for d in sorted({int(p) for p in partes}))
+
+def validar_hora(valor):
+    hora = _texto(valor)
+    if hora == "":
+        return "23:59"
+    if _HORA.fullmatch(hora) is None:
+        raise ValueError("La hora debe tener el formato HH:MM")
+    return hora
+
+def validar_limite(valor, maximo=MAX_LIMITE, nombre="límite"):
+    """?limite=N de los listados: entero entre 0 y `maximo`, o None si viene vacío (sin límite).
+
+    Un negativo no se deja pasar: en SQLite `LIMIT -1` significa "sin límite".
+    También sirve para ids de los filtros (?desde_id, ?categoria_id) con maximo=MAX_ID.
+    """
+    texto = _texto(valor)
+    if texto == "":
+        return None
+    if not texto.isdigit():
+        raise ValueError(f"El {nombre} debe ser un número entero mayor o igual que 0")
+    numero = int(texto)
+    if numero > maximo:
+        raise ValueError(f"El {nombre} no puede superar {maximo}")
+    return numero
+
+def validar_horas(valor, defecto=24):
+    """?horas=N de /api/tareas/proximas: número finito mayor que 0 y hasta MAX_HORAS.
+
+    float("nan") y float("1e400") no fallan solos: sin este control terminaban
+    en un 500 al sumar la ventana a la fecha actual.
+    """
+    texto = _texto(valor)
+    if texto == "":
+        return defecto
+    try:
+        horas = float(texto)
+    except ValueError:
+        raise ValueError("Las horas deben ser un número mayor que 0")
+    if not math.isfinite(horas) or horas <= 0:
+        raise ValueError("Las horas deben ser un número mayor que 0")
+    if horas > MAX_HORAS:
+        raise ValueError(f"Las horas no pueden superar {MAX_HORAS} (un año)")
+    return horas
+
+def validar_fecha(valor):
+    """Fecha sin hora (YYYY-MM-DD) o None si viene vacía."""
+    fecha = _texto(valor)
+    if fecha == "":
+        return None
+    match = _SOLO_FECHA.fullmatch(fecha)
+    try:
+        if match is None:
+            raise ValueError
+        datetime(*map(int, match.groups()))
+    except ValueError:
+        raise ValueError("La fecha debe tener el formato YYYY-MM-DD")
+    return fecha
+
+# ----------------------------------------------------------------------
+# Esquemas reutilizables
+# ----------------------------------------------------------------------
+# Esquema del modelo: lo que se guarda en la tabla `tareas`
+ESQUEMA_TAREA = {
+    "nombre": validar_nombre,
+    "id_categoria": validar_categoria,
+    "fecha_limite": validar_fecha_limite,
+    "prioridad": validar_prioridad,
+    "tiempo_estimado": validar_tiempo_estimado,
+    "estado": validar_estado,
+}
+
+# Esquema de entrada: lo que llega desde la API JSON o los formularios.
+# La categoría llega por nombre y se resuelve con Categoria.get_or_create.
+ESQUEMA_ENTRADA = {
+    "nombre": validar_nombre,
+    "categoria": validar_nombre_categoria,
+    "fecha_limite": validar_fecha_limite,
+    "prioridad": validar_prioridad,
+    "tiempo_estimado": validar_tiempo_estimado,
+}
+
+# Plantillas recurrentes (POST /api/plantillas); la categoría llega por nombre
+ESQUEMA_PLANTILLA = {
+    "nombre": validar_nombre,
+    "categoria": validar_nombre_categoria,
+    "regla": validar_regla,
+    "intervalo": validar_intervalo,
+    "dias_semana": validar_dias_semana,
+    "hora": validar_hora,
+    "inicio": validar_fecha,
+    "fin": validar_fecha,
+    "prioridad": validar_prioridad,
+    "tiempo_estimado": validar_tiempo_estimado,
+}
+
+# Al editar, estos campos solo se actualizan si vienen con valor
+OPCIONALES_EDICION = ("fecha_limite", "prioridad", "tiempo_estimado")
+
+def validar(datos, esquema=ESQUEMA_TAREA, opcionales=()):
+    """Valida un diccionario contra un esquema y devuelve un diccionario limpio.
+
+    Los campos listados en `opcionales` que lleguen vacíos (o no lleguen)
+    se omiten del resultado en lugar de tomar su valor por defecto.
+    """
+    limpio = {}
+    for campo, validador in esquema.items():
+        valor = datos.get(campo)
+        if campo in opcionales and _texto(valor) == "":
+            continue
+        limpio[campo] = validador(valor)
+    return limpio
+
+def validar_plantilla(datos):
+    """Valida una plantilla con ESQUEMA_PLANTILLA y que `fin` no sea anterior a `inicio`.
+
+    Sin `inicio`, la plantilla empieza hoy (ver Plantilla.create).
+    """
+    limpio = validar(datos, ESQUEMA_PLANTILLA)
+    inicio = limpio["inicio"] or date.today().isoformat()
+    if limpio["fin"] and limpio["fin"] < inicio:  # YYYY-MM-DD se compara bien como texto
+        raise ValueError("La fecha de fin no puede ser anterior a la de inicio")
+    return limpio
+
+def validar_lote(lista_datos, esquema=ESQUEMA_TAREA, opcionales=()):
+    """Valida varios registros. Devuelve (validos, errores).
+
+    `errores` es una lista de (indice, mensaje) para los registros rechazados.
+    """
+    validos = []
+    errores = []
+    for indice, datos in enumerate(lista_datos):
+        try:
+            validos.append(validar(datos, esquema, opcionales))
+        except ValueError as err:
+            errores.append((indice, str(err)))
+    return validos, errores
+
+def datos_desde_formulario(form):
+    """Traduce los campos del formulario HTML a las llaves de ESQUEMA_ENTRADA."""
+    return {
+        "nombre": form.get("title", ""),
+        "categoria": form.get("categoria", ""),
+        "fecha_limite": form.get("fecha_limite", ""),
+        "prioridad": form.get("prioridad", ""),
+        "tiempo_estimado": form.get("tiempo_estimado", ""),
+    }
@@ -0,0 +1,219 @@
+"""Motor de vencimientos: tareas vencidas, próximas a vencer y recordatorios.
+
+Guarda en memoria las fechas límite de las tareas no completadas:
+
+- `_heap`: montículo (heapq) de (fecha_limite, id, version) que todavía no vencen.
+- `_vencidas`: lista ordenada de (fecha_limite, id) que ya vencieron.
+- `_vigentes`: id -> (fecha_limite, version) actual; una entrada del montículo
+  con otra versión es vieja y se ignora (borrado perezoso).
+
+La primera consulta lo carga con un solo SELECT sobre el índice parcial
+`idx_tareas_vencimiento`. Después, los métodos de escritura de Tarea y
+Plantilla llaman a `registrar`/`quitar`, así que no hace falta volver a leer
+la base. Como otros procesos (workers) también escriben, se recarga si pasaron
+más de VIGENCIA segundos.
+
+Costo: entre recargas, cada consulta recorre solo las k entradas que
+devuelve. Pero la consulta que encuentra el índice con más de VIGENCIA
+segundos paga la recarga completa: O(n) en las n tareas con fecha límite
+pendientes (el SELECT ya viene ordenado y `sorted` sobre datos ordenados es
+lineal). Es decir, O(k) por consulta más O(n) cada VIGENCIA segundos.
+
+Las fechas se comparan como texto en el formato de `validar_fecha_limite`
+(YYYY-MM-DDTHH:MM), que ordena igual que las fechas.
+"""
+
+import heapq
+import os
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from itertools import count
+from time import monotonic
+
+from database import query_all
+
+VIGENCIA = 30          # Segundos antes de recargar desde la base (escrituras de otros procesos)
+LIMITE_DEFECTO = 100
+LIMITE_MAXIMO = 1000   # Tareas por respuesta (también acota los parámetros del IN)
+FORMATO = "%Y-%m-%dT%H:%M"
+
+
+def ahora():
+    return datetime.now().strftime(FORMATO)
+
+
+class Vencimiento:
+    """Índice en memoria de fechas límite de las tareas no completadas."""
+
+    _heap = []
+    _vencidas = []
+    _vigentes = {}
+    _cargado_en = None
+    _lock = threading.Lock()
+    _versiones = count(1)  # Distingue dos entradas con la misma fecha e id (0: cargadas de la base)
+
+    # ------------------------------------------------------------------
+    # Carga y mantenimiento
+    # ------------------------------------------------------------------
+    @staticmethod
+    def limpiar():
+        """Descarta todo; la próxima consulta recarga desde la base."""
+        with Vencimiento._lock:
+            Vencimiento._cargado_en = None
+
+    @staticmethod
+    def _cargar():
+        filas = query_all(
+            """SELECT id, fecha_limite FROM tareas
+               WHERE estado != 'completada' AND fecha_limite IS NOT NULL
+               ORDER BY fecha_limite"""
+        )
+        Vencimiento._reconstruir({fila["id"]: (fila["fecha_limite"], 0) for fila in filas})
+        Vencimiento._cargado_en = monotonic()
+
+    @staticmethod
+    def _reconstruir(vigentes):
+        """Vuelve a armar montículo y lista de vencidas a partir de `vigentes` (sin entradas viejas)."""
+        limite = ahora()
+        entradas = sorted((fecha, tarea_id, version) for tarea_id, (fecha, version) in vigentes.items())
+        corte = bisect_left(entradas, (limite,))
+        Vencimiento._vigentes = vigentes
+        Vencimiento._vencidas = [(fecha, tarea_id) for fecha, tarea_id, _ in entradas[:corte]]
+        Vencimiento._heap = entradas[corte:]  # Una lista ordenada ya es un montículo
+
+    @staticmethod
+    def _preparar():
+        """Carga si hace falta y pasa a `_vencidas` lo que venció desde la última consulta."""
+        if Vencimiento._cargado_en is None or monotonic() - Vencimiento._cargado_en > VIGENCIA:
+            Vencimiento._cargar()
+        elif len(Vencimiento._heap) > 2 * len(Vencimiento._vigentes) + 64:
+            Vencimiento._reconstruir(Vencimiento._vigentes)  # Demasiadas entradas viejas
+        limite = ahora()
+        heap, vigentes = Vencimiento._heap, Vencimiento._vigentes
+        while heap and heap[0][0] < limite:
+            fecha, tarea_id, version = heapq.heappop(heap)
+            if vigentes.get(tarea_id) == (fecha, version):
+                insort(Vencimiento._vencidas, (fecha, tarea_id))
+
+    @staticmethod
+    def _quitar_vencida(tarea_id):
+        fecha, _ = Vencimiento._vigentes.get(tarea_id, (None, None))
+        if fecha is None:
+            return
+        vencidas = Vencimiento._vencidas
+        posicion = bisect_left(vencidas, (fecha, tarea_id))
+        if posicion < len(vencidas) and vencidas[posicion] == (fecha, tarea_id):
+            del vencidas[posicion]
+
+    @staticmethod
+    def registrar(tarea_id, fecha_limite, estado="pendiente"):
+        """Actualiza una tarea después de crearla o modificarla.
+
+        Si quedó completada o sin fecha límite, deja de contarse.
+        """
+        with Vencimiento._lock:
+            if Vencimiento._cargado_en is None:
+                return  # Aún no se cargó: la carga la leerá de la base
+            Vencimiento._quitar_vencida(tarea_id)
+            if estado == "completada" or not fecha_limite:
+                Vencimiento._vigentes.pop(tarea_id, None)
+                return
+            version = next(Vencimiento._versiones)
+            Vencimiento._vigentes[tarea_id] = (fecha_limite, version)
+            heapq.heappush(Vencimiento._heap, (fecha_limite, tarea_id, version))
+
+    @staticmethod
+    def quitar(tarea_id):
+        """La tarea se eliminó (o se archivó)."""
+        Vencimiento.registrar(tarea_id, None)
+
+    # ------------------------------------------------------------------
+    # Consultas: O(k) en las k entradas que devuelven (más la recarga O(n)
+    # si el índice venció, ver arriba)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _limite(limite):
+        """None -> LIMITE_DEFECTO; 0 devuelve nada; nunca más de LIMITE_MAXIMO ni menos de 0."""
+        if limite is None:
+            return LIMITE_DEFECTO
+        return max(0, min(limite, LIMITE_MAXIMO))
+
+    @staticmethod
+    def ids_vencidas(limite=None):
+        """Ids de las tareas vencidas, de la más antigua a la más reciente."""
+        with Vencimiento._lock:
+            Vencimiento._preparar()
+            return [tarea_id for _, tarea_id in Vencimiento._vencidas[:Vencimiento._limite(limite)]]
+
+    @staticmethod
+    def ids_proximas(horas=24, limite=None):
+        """Ids de las tareas que vencen en las próximas `horas`, ordenadas por fecha límite.
+
+        Recorre el montículo desde la raíz y solo baja por los nodos dentro
+        del rango: como las vencidas ya salieron, visita O(k) nodos.
+        """
+        hasta = (datetime.now() + timedelta(hours=horas)).strftime(FORMATO)
+        with Vencimiento._lock:
+            Vencimiento._preparar()
+            heap, vigentes = Vencimiento._heap, Vencimiento._vigentes
+            encontradas = []
+            pendientes = [0] if heap else []
+            while pendientes:
+                i = pendientes.pop()
+                fecha, tarea_id, version = heap[i]
+                if fecha >= hasta:
+                    continue  # Sus hijos son aún más tardíos
+                if vigentes.get(tarea_id) == (fecha, version):
+                    encontradas.append((fecha, tarea_id))
+                pendientes.extend(hijo for hijo in (2 * i + 1, 2 * i + 2) if hijo < len(heap))
+        encontradas.sort()
+        return [tarea_id for _, tarea_id in encontradas[:Vencimiento._limite(limite)]]
+
+    @staticmethod
+    def ids_siguientes(limite=5):
+        """Ids de las `limite` próximas fechas límite (sin importar cuán lejos estén).
+
+        Búsqueda "primero el menor" con un montículo auxiliar: O(k log k).
+        """
+        limite = Vencimiento._limite(limite)
+        with Vencimiento._lock:
+            Vencimiento._preparar()
+            heap, vigentes = Vencimiento._heap, Vencimiento._vigentes
+            encontradas = []
+            frontera = [(heap[0], 0)] if heap else []
+            while frontera and len(encontradas) < limite:
+                (fecha, tarea_id, version), i = heapq.heappop(frontera)
+                if vigentes.get(tarea_id) == (fecha, version):
+                    encontradas.append(tarea_id)
+                for hijo in (2 * i + 1, 2 * i + 2):
+                    if hijo < len(heap):
+                        heapq.heappush(frontera, (heap[hijo], hijo))
+        return encontradas
+
+    # ------------------------------------------------------------------
+    # Filas completas (con nombre de categoría) en el orden pedido
+    # ------------------------------------------------------------------
+    @staticmethod
+    def filas(ids):
+        """Devuelve las filas de `vista_tareas` de esos ids, en el mismo orden (una consulta)."""
+        if not ids:
+            return []
+        filas = query_all(
+            f"""SELECT id, nombre, fecha_creacion, fecha_limite, prioridad, estado, tiempo_estimado,
+                      completado_en, id_categoria, fecha_actualizacion, categoria
+               FROM vista_tareas WHERE id IN ({', '.join('?' * len(ids))})""",
+            tuple(ids),
+        )
+        por_id = {fila["id"]: fila for fila in filas}
+        return [por_id[tarea_id] for tarea_id in ids if tarea_id in por_id]
+
+
+def _despues_de_fork():
+    """En un proceso hijo el índice del padre puede estar a medio actualizar: se recarga."""
+    Vencimiento._lock = threading.Lock()
+    Vencimiento._cargado_en = None
+
+
+if hasattr(os, "register_at_fork"):  # No existe en Windows
+    os.register_at_fork(after_in_child=_despues_de_fork)
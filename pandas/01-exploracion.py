@@ -1,19 +1,16 @@
 # Importamos las librerías necesarias para el análisis de datos
-import requests  # Para hacer peticiones HTTP a APIs
 import pandas as pd  # Para manipular y analizar datos estructurados
+from cargador import cargar_tareas  # Descarga las tareas de la API (con caché local)
 
 # PASO 1: CARGAR DATOS DESDE LA API
-# Hacemos una petición GET a la API de nuestra aplicación Flask
-resp = requests.get("http://localhost:5000/api/tareas")
+# cargador.py descarga las tareas de la API de nuestra aplicación Flask y las
+# guarda en una caché local (pandas/.cache/): la próxima vez solo pide las que cambiaron.
 
 # Usamos try-except para manejar posibles errores de conexión
 try:
-    # Convertimos la respuesta JSON en un diccionario de Python
-    datos = resp.json()
-    
     # Creamos un DataFrame de pandas con los datos obtenidos
     # Un DataFrame es como una tabla de Excel pero programáticamente
-    df = pd.DataFrame(datos)
+    df = cargar_tareas()
     
     # Mostramos información básica sobre los datos cargados
     print("Datos cargados correctamente")
@@ -1,16 +1,8 @@
-import requests
-import pandas as pd
+from cargador import cargar_tareas  # Sesión HTTP compartida + caché local incremental
 
-url = "http://localhost:5000/api/tareas"
-resp = requests.get(url)
+df_ext = cargar_tareas()
 
-print(resp.status_code)
-
-datos = resp.json()
-
-print(type(datos), len(datos))
-
-df_ext = pd.DataFrame(datos)
+print(type(df_ext), len(df_ext))
 print(df_ext.head())
 
 print(df_ext.info())
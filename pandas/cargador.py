@@ -0,0 +1,253 @@
+# Cargador compartido de datos para los scripts de pandas
+"""
+Carga las tareas en un DataFrame desde la API (con caché local) o directo desde SQLite.
+
+Antes, cada script hacía su propio `requests.get(".../api/tareas")` al
+importarse: sin sesión, sin timeout y bajando todas las tareas cada vez.
+Ahora todos llaman a `cargar_tareas()`:
+
+  1. Primera vez: baja todas las tareas por páginas (?desde_id=...&limite=...)
+     en formato por columnas y las guarda en `pandas/.cache/tareas.pkl`.
+  2. Siguientes veces: solo pide las tareas con `fecha_actualizacion` igual
+     o posterior a la más reciente de la caché (?actualizadas_desde=...),
+     reemplaza esas filas y vuelve a guardar. Si el total no coincide con
+     `total_tareas` del servidor (hubo eliminaciones o archivado), baja todo
+     de nuevo.
+  3. Si la API no responde, usa la caché (con un aviso) si existe.
+
+Para análisis locales o por lotes, `origen="sqlite"` (o TAREAS_ORIGEN=sqlite)
+lee del snapshot de solo lectura de la base (`database.crear_snapshot`, que se
+renueva si tiene más de DB_SNAPSHOT_SEGUNDOS): no compite con las lecturas y
+escrituras de la app. Sin
+jsonify ni resp.json(), por trozos con `pd.read_sql_query`, con el nombre de
+la categoría ya unido en la consulta y las fechas convertidas a segundos
+(epoch) por SQLite, que pandas pasa a datetime sin analizar texto.
+
+Ambos orígenes devuelven el mismo esquema (COLUMNAS, TIPOS y COLUMNAS_FECHA
+como datetime64), así `limpiar_datos_basicos` y el resto funcionan igual.
+
+Las peticiones usan una sola `requests.Session` (reutiliza la conexión TCP),
+con timeout y reintentos ante errores 502/503/504.
+
+Uso en los scripts:
+    from cargador import cargar_tareas
+    df = cargar_tareas()              # forzar=True para ignorar la caché
+    df = cargar_tareas(origen="sqlite")
+
+Nota: renombrar una categoría no cambia `fecha_actualizacion` de sus tareas;
+después de hacerlo conviene `cargar_tareas(forzar=True)`.
+"""
+import os
+import sqlite3
+import sys
+from time import time
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+URL_API = os.environ.get("TAREAS_API", "http://localhost:5000/api/tareas")
+ORIGEN = os.environ.get("TAREAS_ORIGEN", "api")  # "api" o "sqlite"
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Carpeta de app.py y database.py
+CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "tareas.pkl")
+TAMANO_PAGINA = 50000   # Tareas por petición (API) o por trozo (SQLite)
+TIMEOUT = (3.05, 120)   # (conectar, leer) en segundos
+
+# Esquema común de ambos orígenes (mismo orden que /api/tareas)
+COLUMNAS = ["id", "nombre", "fecha_creacion", "fecha_limite", "prioridad", "estado", "tiempo_estimado",
+            "completado_en", "id_categoria", "fecha_actualizacion", "categoria"]
+COLUMNAS_FECHA = ["fecha_creacion", "fecha_limite", "completado_en", "fecha_actualizacion"]
+TIPOS = {"id": "int64", "nombre": "object", "prioridad": "object", "estado": "object",
+         "tiempo_estimado": "float64", "id_categoria": "int64", "categoria": "object"}
+
+_sesion = None
+
+
+def sesion():
+    """Sesión HTTP compartida: conexiones reutilizadas, reintentos y Basic Auth opcional."""
+    global _sesion
+    if _sesion is None:
+        _sesion = requests.Session()
+        reintentos = Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+                           allowed_methods=("GET",))
+        _sesion.mount("http://", HTTPAdapter(pool_maxsize=4, max_retries=reintentos))
+        _sesion.mount("https://", HTTPAdapter(pool_maxsize=4, max_retries=reintentos))
+        if os.environ.get("USERNAME") and os.environ.get("PASSWORD"):
+            _sesion.auth = (os.environ["USERNAME"], os.environ["PASSWORD"])  # Producción
+    return _sesion
+
+
+def normalizar(df):
+    """Aplica el esquema común: columnas en orden, TIPOS y fechas como datetime64."""
+    if df.empty:
+        return pd.DataFrame({col: pd.Series(dtype=TIPOS.get(col, "datetime64[ns]")) for col in COLUMNAS})
+    df = df[COLUMNAS].astype(TIPOS)
+    for col in COLUMNAS_FECHA:
+        if df[col].dtype != "datetime64[ns]":
+            df[col] = pd.to_datetime(df[col], format="ISO8601", errors="coerce").astype("datetime64[ns]")
+    return df
+
+
+def _paginas(url, **filtros):
+    """Generador: pide una página por vez y devuelve (DataFrame crudo, total_tareas o None)."""
+    ultimo_id = 0
+    while True:
+        params = {"formato": "columnas", "desde_id": ultimo_id, "limite": TAMANO_PAGINA, **filtros}
+        resp = sesion().get(url, params=params, timeout=TIMEOUT)
+        resp.raise_for_status()
+        datos = resp.json()
+        if not datos["total"]:
+            yield pd.DataFrame(), datos.get("total_tareas")
+            return
+        pagina = pd.DataFrame(datos["columnas"])
+        yield pagina, datos.get("total_tareas")
+        if datos["total"] < params["limite"]:
+            return
+        ultimo_id = int(pagina["id"].iloc[-1])
+
+
+def _descargar(url, **filtros):
+    """Baja todas las páginas que cumplen `filtros`. Devuelve (DataFrame, total_tareas o None)."""
+    partes = []
+    total_tareas = None
+    for pagina, total in _paginas(url, **filtros):
+        total_tareas = total if total is not None else total_tareas
+        if not pagina.empty:
+            partes.append(pagina)
+    df = normalizar(pd.concat(partes, ignore_index=True) if partes else pd.DataFrame())
+    return df, total_tareas
+
+
+def _leer_cache(url):
+    try:
+        cache = pd.read_pickle(CACHE)
+    except (FileNotFoundError, EOFError, ValueError):
+        return None
+    return cache if cache.get("url") == url else None
+
+
+def _guardar_cache(url, df):
+    os.makedirs(os.path.dirname(CACHE), exist_ok=True)
+    temporal = CACHE + ".tmp"
+    pd.to_pickle({"url": url, "df": df}, temporal)
+    os.replace(temporal, CACHE)  # Nunca queda una caché a medio escribir
+
+
+# -----------------------------------------------------------------------------
+# Origen SQLite: lectura directa del archivo de la app
+# -----------------------------------------------------------------------------
+def ruta_db():
+    """Archivo SQLite que usa la app (database.DATABASE_NAME, relativo a la raíz del proyecto)."""
+    if RAIZ not in sys.path:
+        sys.path.append(RAIZ)  # Al final: la carpeta pandas/ de RAIZ no debe tapar a la librería
+    import database
+    return os.path.join(RAIZ, database.DATABASE_NAME)
+
+
+def ruta_snapshot():
+    """Snapshot de la base de la app; lo crea (o lo renueva si es viejo) antes de leerlo."""
+    origen = ruta_db()
+    import database  # ruta_db() deja RAIZ en sys.path
+    destino = os.path.join(RAIZ, database.ruta_snapshot())
+    try:
+        edad = time() - os.path.getmtime(destino)
+    except OSError:
+        edad = None
+    if edad is None or edad > database.SNAPSHOT_SEGUNDOS:
+        database.crear_snapshot(destino, origen=origen)
+    return destino
+
+
+def trozos_sqlite(ruta=None, incluir_archivadas=False, tamano_trozo=TAMANO_PAGINA):
+    """Lee las tareas de SQLite (solo lectura) de a `tamano_trozo` filas.
+
+    Por defecto lee el snapshot (ruta_snapshot()), no la base principal.
+    Es un generador: cada trozo ya tiene el esquema común (`normalizar`) y no
+    se lee el siguiente hasta que se pide, así la memoria no depende del total.
+    """
+    ruta = ruta or ruta_snapshot()
+    tabla = "tareas"
+    if incluir_archivadas:
+        columnas = ", ".join(col for col in COLUMNAS if col != "categoria")
+        tabla = f"(SELECT {columnas} FROM tareas UNION ALL SELECT {columnas} FROM tareas_archivo)"
+    # strftime('%s') -> segundos desde 1970 (NULL si la fecha no es válida)
+    fechas = ", ".join(f"CAST(strftime('%s', t.{col}) AS INTEGER) AS {col}" for col in COLUMNAS_FECHA)
+    sql = f"""SELECT t.id, t.nombre, t.prioridad, t.estado, t.tiempo_estimado, t.id_categoria,
+                     c.nombre AS categoria, {fechas}
+              FROM {tabla} t LEFT JOIN categorias c ON c.id = t.id_categoria
+              ORDER BY t.id"""
+    tipos = {**TIPOS, **{col: "float64" for col in COLUMNAS_FECHA}}
+    conn = sqlite3.connect(f"file:{os.path.abspath(ruta)}?mode=ro", uri=True)
+    try:
+        for trozo in pd.read_sql_query(sql, conn, chunksize=tamano_trozo, dtype=tipos):
+            for col in COLUMNAS_FECHA:
+                trozo[col] = pd.to_datetime(trozo[col], unit="s").astype("datetime64[ns]")
+            yield normalizar(trozo)
+    finally:
+        conn.close()
+
+
+def leer_sqlite(ruta=None, incluir_archivadas=False, tamano_trozo=TAMANO_PAGINA, informar=print):
+    """Lee todas las tareas directo de SQLite (solo lectura) con el esquema de la API."""
+    ruta = ruta or ruta_snapshot()
+    partes = list(trozos_sqlite(ruta, incluir_archivadas, tamano_trozo))
+    df = normalizar(pd.concat(partes, ignore_index=True) if partes else pd.DataFrame())
+    informar(f"Lectura directa de {ruta}: {len(df)} tareas")
+    return df
+
+
+# -----------------------------------------------------------------------------
+# Punto de entrada de los scripts
+# -----------------------------------------------------------------------------
+def cargar_por_trozos(origen=None, url=URL_API, tamano_trozo=TAMANO_PAGINA):
+    """Generador de DataFrames de a `tamano_trozo` tareas, sin juntarlas nunca en memoria.
+
+    Para datos más grandes que la RAM (ver por_trozos.py). No usa ni actualiza la caché.
+    """
+    if (origen or ORIGEN) == "sqlite":
+        yield from trozos_sqlite(tamano_trozo=tamano_trozo)
+        return
+    for pagina, _ in _paginas(url, limite=tamano_trozo):
+        if not pagina.empty:
+            yield normalizar(pagina)
+
+
+def cargar_tareas(forzar=False, url=URL_API, informar=print, origen=None):
+    """Devuelve un DataFrame con todas las tareas.
+
+    origen="api" (por defecto, o TAREAS_ORIGEN): usa y actualiza la caché local.
+    origen="sqlite": lee directo del archivo de la base, sin caché.
+    """
+    if (origen or ORIGEN) == "sqlite":
+        return leer_sqlite(informar=informar)
+    cache = None if forzar else _leer_cache(url)
+    try:
+        if cache is None or cache["df"].empty:
+            df, _ = _descargar(url)
+            informar(f"Descarga completa: {len(df)} tareas")
+        else:
+            df = normalizar(cache["df"])
+            # Mismo formato que `fecha_actualizacion` en SQLite
+            desde = df["fecha_actualizacion"].max().strftime("%Y-%m-%d %H:%M:%S")
+            cambios, total_tareas = _descargar(url, actualizadas_desde=desde)
+            anteriores = df[df["id"].isin(cambios["id"])] if not cambios.empty else df.iloc[:0]
+            if len(anteriores) == len(cambios) and anteriores.reset_index(drop=True).equals(cambios):
+                cambios = cambios.iloc[:0]  # Solo volvieron las del último segundo, ya guardadas
+            if not cambios.empty:
+                df = pd.concat([df[~df["id"].isin(cambios["id"])], cambios], ignore_index=True)
+                df = df.sort_values("id", ignore_index=True)
+            if total_tareas is not None and total_tareas != len(df):
+                df, _ = _descargar(url)  # Hubo eliminaciones: se baja todo
+                informar(f"Caché desactualizada, descarga completa: {len(df)} tareas")
+            else:
+                informar(f"Caché local: {len(df)} tareas ({len(cambios)} nuevas o modificadas desde {desde})")
+                if cambios.empty:
+                    return df.copy()  # Nada que volver a escribir
+    except requests.RequestException as e:
+        if cache is None:
+            raise
+        informar(f"Aviso: no se pudo actualizar desde la API ({e}); se usan los datos de la caché")
+        return normalizar(cache["df"])
+    _guardar_cache(url, df)
+    return df.copy()
@@ -0,0 +1,256 @@
+# Gráficos de tareas: agregados compartidos y renderizado por lotes sin pantalla
+"""
+Los nueve gráficos de 03-visualizacion.py, separados en dos partes:
+
+  1. `agregados(df)` calcula una sola vez todo lo que necesitan los gráficos
+     (conteos, top de nombres, tablas cruzadas). El resultado es chico: unos
+     cientos de números aunque el DataFrame tenga millones de filas.
+  2. Cada función de GRAFICOS dibuja en un `Axes` de matplotlib usando solo
+     esos agregados.
+
+`renderizar_todos` dibuja los nueve en paralelo (un proceso por núcleo) con
+el backend "Agg", que no necesita pantalla, y guarda PNG/SVG en una carpeta:
+
+    python pandas/graficos.py --salida graficos/ --formatos png svg
+    TAREAS_ORIGEN=sqlite python pandas/graficos.py --salida /var/www/tablero/
+
+03-visualizacion.py usa las mismas funciones para mostrarlos en pantalla.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+PUNTOS_DISPERSION = 5000  # Muestra para el gráfico de dispersión (millones de puntos no aportan)
+COLORES_ESTADO = ["#ff9999", "#66b3ff", "#99ff99"]
+
+# -----------------------------------------------------------------------------
+# Agregados (se calculan una sola vez)
+# -----------------------------------------------------------------------------
+def agregados(df):
+    """Devuelve un diccionario con los datos que usan los nueve gráficos."""
+    import procesamiento  # Tipos correctos: fechas, estado/prioridad como category
+
+    df = procesamiento.preparar(df)
+    creada = df["fecha_creacion"]
+    # value_counts de `nombre` una sola vez (antes se repetía en tres gráficos)
+    nombres = df["nombre"].value_counts()
+    top30 = df[df["nombre"].isin(nombres.head(30).index)]
+    top20 = top30[top30["nombre"].isin(nombres.head(20).index)]
+    top3 = top20[top20["nombre"].isin(nombres.head(3).index)]
+    dispersion = df[["tiempo_estimado", "prioridad"]].dropna()
+    if len(dispersion) > PUNTOS_DISPERSION:
+        dispersion = dispersion.sample(PUNTOS_DISPERSION, random_state=0)
+
+    return {
+        "por_prioridad": df["prioridad"].value_counts().sort_index(),
+        "por_dia": df.groupby(creada.dt.normalize()).size(),
+        "por_estado": df["estado"].value_counts().loc[lambda conteo: conteo > 0],
+        "dispersion": dispersion.assign(prioridad=dispersion["prioridad"].astype(str)),
+        "semana_prioridad": (df.groupby([creada.dt.to_period("W-MON").dt.start_time.rename("semana_fecha"),
+                                         "prioridad"], observed=True)
+                             .size().unstack(fill_value=0).sort_index()),
+        "top10": nombres.head(10),
+        "estado_top20": top20.groupby(["nombre", "estado"], observed=True).size().unstack(fill_value=0),
+        "mensual_top3": (top3.groupby([top3["fecha_creacion"].dt.to_period("M").rename("mes"), "nombre"])
+                         .size().unstack(fill_value=0)),
+        "categoria_estado": (top30.assign(categoria=top30["categoria"].astype(object).fillna("Sin categoría"))
+                             .groupby(["categoria", "estado"], observed=True).size().unstack(fill_value=0)),
+    }
+
+# -----------------------------------------------------------------------------
+# Los nueve gráficos: cada uno dibuja en `ax` con los agregados
+# -----------------------------------------------------------------------------
+def _sin_datos(ax, tabla, titulo):
+    """Si no hay nada que dibujar, deja un aviso en el gráfico (matplotlib falla con datos vacíos)."""
+    if not tabla.empty:
+        return False
+    ax.set_title(titulo)
+    ax.text(0.5, 0.5, "Sin datos", ha="center", va="center", transform=ax.transAxes)
+    ax.set_axis_off()
+    return True
+
+def barras_prioridad(ax, datos):
+    """¿Qué categoría de prioridad domina?"""
+    if _sin_datos(ax, datos["por_prioridad"], "Tareas por prioridad"):
+        return
+    datos["por_prioridad"].plot(kind="bar", ax=ax)
+    ax.set_title("Tareas por prioridad")
+    ax.set_xlabel("Prioridad")
+    ax.set_ylabel("No de Tareas")
+    ax.tick_params(axis="x", rotation=0)
+    ax.grid(axis="y", linestyle="--", alpha=0.4)
+
+def lineas_creadas_por_dia(ax, datos):
+    """¿Cómo cambia la productividad en el tiempo?"""
+    if _sin_datos(ax, datos["por_dia"], "Tareas creadas por día"):
+        return
+    datos["por_dia"].plot(kind="line", ax=ax)
+    ax.set_title("Tareas creadas por día")
+    ax.set_xlabel("Fecha")
+    ax.set_ylabel("Tareas creadas")
+    ax.grid(True, linestyle="--", alpha=0.9)
+
+def pastel_estado(ax, datos):
+    """¿Qué proporción ocupa cada estado?"""
+    if _sin_datos(ax, datos["por_estado"], "Distribución por estado"):
+        return
+    datos["por_estado"].plot(kind="pie", autopct="%1.1f%%", ax=ax)
+    ax.set_title("Distribución por estado")
+    ax.set_ylabel("")
+
+def dispersion_tiempo_vs_prioridad(ax, datos):
+    """¿Existe correlación entre duración y prioridad?"""
+    if _sin_datos(ax, datos["dispersion"], "Duración estimada vs Prioridad"):
+        return
+    puntos = datos["dispersion"]
+    ax.scatter(puntos["tiempo_estimado"], puntos["prioridad"], alpha=0.6)
+    ax.set_title("Duración estimada vs Prioridad")
+    ax.set_xlabel("Minutos estimados")
+    ax.set_ylabel("Prioridad")
+    ax.grid(True, linestyle="--", alpha=0.3)
+
+def lineas_semana_por_prioridad(ax, datos):
+    """¿Cómo cambia la distribución de prioridades en el tiempo?"""
+    if _sin_datos(ax, datos["semana_prioridad"], "Tareas creadas por semana y prioridad"):
+        return
+    datos["semana_prioridad"].plot(kind="line", marker="o", ax=ax)
+    ax.set_title("Tareas creadas por semana y prioridad")
+    ax.set_xlabel("Semana (fecha de inicio)")
+    ax.set_ylabel("Cantidad de tareas")
+    ax.grid(True, linestyle="--", alpha=0.4)
+    ax.legend(title="Prioridad")
+    ax.tick_params(axis="x", rotation=45)
+
+def top_tareas_mas_repetidas(ax, datos):
+    """¿Cuáles son las tareas más comunes?"""
+    if _sin_datos(ax, datos["top10"], "Top 10 Tareas Más Repetidas"):
+        return
+    datos["top10"].plot(kind="bar", ax=ax)
+    ax.set_title("Top 10 Tareas Más Repetidas")
+    ax.set_xlabel("Nombre de la Tarea")
+    ax.set_ylabel("Frecuencia")
+    ax.tick_params(axis="x", rotation=45)
+    ax.grid(axis="y", linestyle="--", alpha=0.3)
+
+def estado_de_top_tareas(ax, datos):
+    """¿En qué estado están las tareas más comunes?"""
+    if _sin_datos(ax, datos["estado_top20"], "Estado de las 20 Tareas Más Repetidas"):
+        return
+    datos["estado_top20"].plot(kind="bar", stacked=True, color=COLORES_ESTADO, ax=ax)
+    ax.set_title("Estado de las 20 Tareas Más Repetidas")
+    ax.set_xlabel("Nombre de la Tarea")
+    ax.set_ylabel("Cantidad")
+    ax.tick_params(axis="x", rotation=45)
+    ax.legend(title="Estado")
+    ax.grid(axis="y", linestyle="--", alpha=0.3)
+
+def evolucion_mensual_top3(ax, datos):
+    """¿Cómo cambia la frecuencia de las tareas más comunes en el tiempo?"""
+    if _sin_datos(ax, datos["mensual_top3"], "Evolución Mensual de las 3 Tareas Más Repetidas"):
+        return
+    datos["mensual_top3"].plot(kind="line", marker="o", linewidth=2, ax=ax)
+    ax.set_title("Evolución Mensual de las 3 Tareas Más Repetidas")
+    ax.set_xlabel("Mes")
+    ax.set_ylabel("Cantidad de Tareas")
+    ax.tick_params(axis="x", rotation=45)
+    ax.legend(title="Tarea")
+    ax.grid(True, linestyle="--", alpha=0.3)
+
+def heatmap_categoria_vs_estado(ax, datos):
+    """¿Cómo se distribuyen las tareas por categoría y estado?"""
+    if _sin_datos(ax, datos["categoria_estado"], "Heatmap: Categoría vs Estado\n(Tareas Repetidas)"):
+        return
+    tabla = datos["categoria_estado"]
+    im = ax.imshow(tabla.values, cmap="YlOrRd", aspect="auto")
+    ax.set_title("Heatmap: Categoría vs Estado\n(Tareas Repetidas)")
+    ax.set_xlabel("Estado")
+    ax.set_ylabel("Categoría")
+    ax.set_xticks(range(len(tabla.columns)))
+    ax.set_xticklabels(tabla.columns, rotation=45, ha="right")
+    ax.set_yticks(range(len(tabla.index)))
+    ax.set_yticklabels(tabla.index)
+    # Valor numérico en cada celda
+    for i in range(len(tabla.index)):
+        for j in range(len(tabla.columns)):
+            ax.text(j, i, tabla.iloc[i, j], ha="center", va="center", color="black", fontweight="bold")
+    ax.figure.colorbar(im, ax=ax, shrink=0.8)
+
+# Nombre del archivo -> función (en el orden de 03-visualizacion.py)
+GRAFICOS = {
+    "01-barras-prioridad": barras_prioridad,
+    "02-creadas-por-dia": lineas_creadas_por_dia,
+    "03-pastel-estado": pastel_estado,
+    "04-dispersion-tiempo-prioridad": dispersion_tiempo_vs_prioridad,
+    "05-semana-por-prioridad": lineas_semana_por_prioridad,
+    "06-top-tareas-repetidas": top_tareas_mas_repetidas,
+    "07-estado-top-tareas": estado_de_top_tareas,
+    "08-evolucion-mensual-top3": evolucion_mensual_top3,
+    "09-heatmap-categoria-estado": heatmap_categoria_vs_estado,
+}
+
+# -----------------------------------------------------------------------------
+# Renderizado por lotes
+# -----------------------------------------------------------------------------
+def _iniciar_proceso():
+    matplotlib.use("Agg")  # Sin pantalla: cada proceso dibuja directo a archivo
+
+def figura(dibujar, datos):
+    """Dibuja con `dibujar(ax, datos)` en una figura nueva y la devuelve.
+
+    Usa `Figure` directamente (sin pyplot): no hay estado global ni ventanas.
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 5))
+    dibujar(fig.add_subplot(), datos)
+    fig.tight_layout()
+    return fig
+
+def renderizar(nombre, datos, directorio, formatos=("png",)):
+    """Dibuja un gráfico y lo guarda como `directorio/nombre.<formato>`. Devuelve las rutas."""
+    fig = figura(GRAFICOS[nombre], datos)
+    rutas = []
+    for formato in formatos:
+        ruta = os.path.join(directorio, f"{nombre}.{formato}")
+        fig.savefig(ruta, format=formato, dpi=110)
+        rutas.append(ruta)
+    return rutas
+
+def renderizar_todos(df, directorio, formatos=("png",), procesos=None, informar=print):
+    """Calcula los agregados una vez y dibuja los nueve gráficos en un pool de procesos."""
+    os.makedirs(directorio, exist_ok=True)
+    datos = agregados(df)
+    with ProcessPoolExecutor(max_workers=procesos or os.cpu_count(), initializer=_iniciar_proceso) as pool:
+        futuros = {nombre: pool.submit(renderizar, nombre, datos, directorio, tuple(formatos))
+                   for nombre in GRAFICOS}
+        rutas = []
+        for nombre, futuro in futuros.items():
+            rutas.extend(futuro.result())
+            if informar:
+                informar(f" * {nombre}")
+    return rutas
+
+
+def main(argv=None):
+    from time import perf_counter
+    from cargador import cargar_tareas
+
+    parser = argparse.ArgumentParser(description="Genera los gráficos de tareas como archivos (sin pantalla)")
+    parser.add_argument("--salida", default="graficos", help="Carpeta de destino")
+    parser.add_argument("--formatos", nargs="+", default=["png"], choices=["png", "svg"])
+    parser.add_argument("--procesos", type=int, default=None, help="Por defecto, uno por núcleo")
+    parser.add_argument("--origen", choices=["api", "sqlite"], default=None, help="Ver cargador.py")
+    args = parser.parse_args(argv)
+
+    inicio = perf_counter()
+    df = cargar_tareas(origen=args.origen)
+    rutas = renderizar_todos(df, args.salida, args.formatos, args.procesos)
+    print(f"{len(rutas)} archivos en {args.salida} ({perf_counter() - inicio:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+# Pipeline de análisis: etapas con dependencias explícitas y caché en disco
+"""
+Ejecuta la carga, la limpieza, las columnas derivadas, los análisis y los
+gráficos como etapas de un pipeline, sin los efectos al importar de los
+scripts 01/02/03:
+
+    python pandas/pipeline.py                      # Todas las etapas
+    python pandas/pipeline.py rendimiento por_mes  # Solo esas (y lo que necesiten)
+    python pandas/pipeline.py --listar
+    python pandas/pipeline.py --forzar derivar     # Ignora la caché de esa etapa
+    python pandas/pipeline.py --salida graficos/ --origen sqlite
+
+Cada etapa es una función pura (de procesamiento.py o graficos.py) con sus
+dependencias en ETAPAS. El resultado se guarda en `pandas/.cache/pipeline/`
+con una llave que combina:
+
+  - la huella (hash) del resultado de cada dependencia, y
+  - el código fuente de la función de la etapa (y de las funciones que recibe).
+
+Si los datos no cambiaron, volver a correr después de modificar un gráfico
+solo vuelve a dibujar ese gráfico: las demás etapas se leen de la caché (o ni
+siquiera se leen, si nadie las necesita). Los cambios en funciones auxiliares
+que la etapa llama por dentro no se detectan: para esos casos está --forzar.
+
+`cargar` no tiene dependencias: se ejecuta siempre (cargador.py ya usa su
+propia caché incremental) y su huella decide qué etapas hay que recalcular.
+"""
+import argparse
+import hashlib
+import inspect
+import io
+import json
+import os
+import pickle
+import sys
+from functools import partial
+from time import perf_counter
+
+import pandas as pd
+
+import graficos
+import procesamiento
+from cargador import cargar_tareas
+
+CARPETA = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "pipeline")
+INDICE = os.path.join(CARPETA, "indice.json")  # llave de etapa -> huella de su resultado
+
+# -----------------------------------------------------------------------------
+# Etapas
+# -----------------------------------------------------------------------------
+def cargar(origen=None):
+    return cargar_tareas(origen=origen)
+
+
+def imagen(dibujar, datos):
+    """Un gráfico de graficos.py como bytes PNG (la etapa guarda bytes, no archivos)."""
+    salida = io.BytesIO()
+    graficos.figura(dibujar, datos).savefig(salida, format="png", dpi=110)
+    return salida.getvalue()
+
+
+# nombre -> (función, dependencias); la función recibe los resultados de las dependencias en orden
+ETAPAS = {
+    "cargar": (cargar, ()),
+    "limpiar": (procesamiento.preparar, ("cargar",)),
+    "derivar": (procesamiento.derivar, ("limpiar",)),
+    "inconsistencias": (procesamiento.inconsistencias, ("limpiar",)),
+    "rendimiento": (procesamiento.rendimiento, ("derivar",)),
+    "por_prioridad": (procesamiento.por_prioridad, ("derivar",)),
+    "por_mes": (procesamiento.por_mes, ("derivar",)),
+    "por_semana": (procesamiento.por_semana, ("derivar",)),
+    "por_dia": (procesamiento.por_dia, ("derivar",)),
+    "agregados": (graficos.agregados, ("limpiar",)),
+}
+for _nombre, _dibujar in graficos.GRAFICOS.items():
+    ETAPAS[f"grafico-{_nombre}"] = (partial(imagen, _dibujar), ("agregados",))
+
+# -----------------------------------------------------------------------------
+# Huellas y caché
+# -----------------------------------------------------------------------------
+def huella(valor):
+    """Hash del contenido de un resultado (DataFrame, Series, dict, bytes, números...)."""
+    h = hashlib.sha1()
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        h.update(pd.util.hash_pandas_object(valor, index=True).values.tobytes())
+        h.update(repr(list(valor.columns) if isinstance(valor, pd.DataFrame) else valor.name).encode())
+        h.update(repr(valor.dtypes).encode())
+    elif isinstance(valor, dict):
+        for llave in sorted(valor, key=str):
+            h.update(f"{llave}={huella(valor[llave])};".encode())
+    elif isinstance(valor, bytes):
+        h.update(valor)
+    else:
+        h.update(pickle.dumps(valor))
+    return h.hexdigest()
+
+
+def codigo(funcion):
+    """Código fuente de la etapa: la función y, si es un partial, las funciones que recibe."""
+    if isinstance(funcion, partial):
+        partes = [codigo(funcion.func)]
+        partes += [codigo(arg) if callable(arg) else repr(arg) for arg in funcion.args]
+        return "\n".join(partes)
+    try:
+        return inspect.getsource(funcion)
+    except (OSError, TypeError):
+        return repr(funcion)
+
+
+def _ruta(nombre, llave):
+    return os.path.join(CARPETA, f"{nombre}-{llave}.pkl")
+
+
+def _escribir(ruta, escribir):
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as archivo:
+        escribir(archivo)
+    os.replace(temporal, ruta)  # Nunca queda un archivo a medio escribir
+
+
+class Pipeline:
+    """Una ejecución: resuelve dependencias, usa la caché y mide cada etapa."""
+
+    def __init__(self, origen=None, forzar=()):
+        self.origen = origen
+        self.forzar = set(forzar)
+        self.huellas = {}      # etapa -> huella de su resultado
+        self.llaves = {}       # etapa -> llave de caché
+        self.valores = {}      # etapa -> resultado ya en memoria
+        self.tiempos = []      # (etapa, "calculada" | "caché", segundos)
+        try:
+            with open(INDICE, encoding="utf-8") as archivo:
+                self.indice = json.load(archivo)
+        except (FileNotFoundError, ValueError):
+            self.indice = {}
+
+    def actualizar(self, nombre):
+        """Deja la etapa al día (calculándola o no) y devuelve la huella de su resultado."""
+        if nombre in self.huellas:
+            return self.huellas[nombre]
+        funcion, dependencias = ETAPAS[nombre]
+        entradas = [self.actualizar(dependencia) for dependencia in dependencias]
+        llave = hashlib.sha1("\n".join([nombre, codigo(funcion), *entradas]).encode()).hexdigest()[:16]
+        self.llaves[nombre] = llave
+        if (dependencias and nombre not in self.forzar and llave in self.indice
+                and os.path.exists(_ruta(nombre, llave))):
+            self.tiempos.append((nombre, "caché", 0.0))
+            self.huellas[nombre] = self.indice[llave]
+            return self.huellas[nombre]
+
+        argumentos = [self.valor(dependencia) for dependencia in dependencias]
+        inicio = perf_counter()
+        if dependencias:
+            resultado = funcion(*argumentos)
+        else:
+            resultado = funcion(self.origen)
+        segundos = perf_counter() - inicio
+        self.valores[nombre] = resultado
+        self.huellas[nombre] = huella(resultado)
+        self.tiempos.append((nombre, "calculada", segundos))
+        if dependencias:  # La carga ya tiene su propia caché (cargador.py)
+            self._guardar(nombre, llave, resultado)
+        return self.huellas[nombre]
+
+    def valor(self, nombre):
+        """Resultado de una etapa ya actualizada: de memoria o de la caché en disco."""
+        if nombre not in self.valores:
+            self.valores[nombre] = pd.read_pickle(_ruta(nombre, self.llaves[nombre]))
+        return self.valores[nombre]
+
+    def _guardar(self, nombre, llave, resultado):
+        os.makedirs(CARPETA, exist_ok=True)
+        _escribir(_ruta(nombre, llave), lambda archivo: pickle.dump(resultado, archivo, pickle.HIGHEST_PROTOCOL))
+        self.indice[llave] = self.huellas[nombre]
+        # Solo se conserva la última versión de cada etapa
+        for archivo in os.listdir(CARPETA):
+            if archivo.startswith(f"{nombre}-") and archivo.endswith(".pkl") and archivo != f"{nombre}-{llave}.pkl":
+                self.indice.pop(archivo[len(nombre) + 1:-len(".pkl")], None)
+                os.remove(os.path.join(CARPETA, archivo))
+        _escribir(INDICE, lambda archivo: archivo.write(json.dumps(self.indice).encode()))
+
+    def ejecutar(self, objetivos):
+        for nombre in objetivos:
+            self.actualizar(nombre)
+        return {nombre: self.valor(nombre) for nombre in objetivos}
+
+    def reporte(self):
+        lineas = [f"  {nombre:<40} {estado:<10} {segundos:8.3f}s" for nombre, estado, segundos in self.tiempos]
+        total = sum(segundos for _, _, segundos in self.tiempos)
+        return "\n".join(lineas + [f"  {'total':<40} {'':<10} {total:8.3f}s"])
+
+# -----------------------------------------------------------------------------
+# Línea de comandos
+# -----------------------------------------------------------------------------
+def finales():
+    """Etapas de las que no depende ninguna otra (el objetivo por defecto)."""
+    usadas = {dependencia for _, dependencias in ETAPAS.values() for dependencia in dependencias}
+    return [nombre for nombre in ETAPAS if nombre not in usadas]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline de análisis de tareas con caché por etapa")
+    parser.add_argument("etapas", nargs="*", help="Etapas a ejecutar (por defecto, todas las finales)")
+    parser.add_argument("--forzar", nargs="+", default=[], metavar="ETAPA", help="Recalcular aunque estén en caché")
+    parser.add_argument("--salida", default="graficos", help="Carpeta para los PNG de las etapas grafico-*")
+    parser.add_argument("--origen", choices=["api", "sqlite"], default=None, help="Ver cargador.py")
+    parser.add_argument("--listar", action="store_true", help="Mostrar las etapas y sus dependencias")
+    args = parser.parse_args(argv)
+
+    if args.listar:
+        for nombre, (_, dependencias) in ETAPAS.items():
+            print(f"{nombre:<40} <- {', '.join(dependencias) or '(origen de datos)'}")
+        return 0
+    desconocidas = [nombre for nombre in args.etapas + args.forzar if nombre not in ETAPAS]
+    if desconocidas:
+        parser.error(f"etapas desconocidas: {', '.join(desconocidas)} (ver --listar)")
+
+    pipeline = Pipeline(origen=args.origen, forzar=args.forzar)
+    resultados = pipeline.ejecutar(args.etapas or finales())
+    for nombre, resultado in resultados.items():
+        if nombre.startswith("grafico-"):
+            os.makedirs(args.salida, exist_ok=True)
+            with open(os.path.join(args.salida, f"{nombre[len('grafico-'):]}.png"), "wb") as archivo:
+                archivo.write(resultado)
+        else:
+            print(f"\n== {nombre} ==\n{resultado}")
+    print("\nEtapas:")
+    print(pipeline.reporte())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
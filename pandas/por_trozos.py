@@ -0,0 +1,168 @@
+# Análisis por trozos: para historiales más grandes que la memoria
+"""
+Calcula los mismos resultados que `procesamiento.resumen(df)` sin tener
+nunca todas las tareas en un DataFrame:
+
+  1. `cargador.cargar_por_trozos()` entrega las tareas de a N filas.
+  2. `parcial(trozo)` procesa un trozo y lo reduce a agregados que se pueden
+     combinar: conteos, sumas y, para la desviación, (n, suma, M2) donde M2
+     es la suma de los cuadrados de las diferencias con la media del trozo.
+  3. `combinar` junta los parciales y `resultados` calcula promedios,
+     porcentajes y desviación a partir de los totales.
+
+Conteos, sumas y promedios salen iguales que en memoria: `tiempo_estimado` y
+`dias_retraso` son enteros y sus sumas en float64 son exactas sin importar el
+orden. La desviación no se calcula como `suma_cuadrados - suma**2 / n` (con
+números grandes esa resta pierde casi todos los dígitos), sino juntando los M2
+de cada trozo (fórmula de Chan et al.); coincide con `df.std()` salvo
+redondeo en los últimos dígitos. `benchmarks/comparar_trozos.py` compara las
+dos versiones sobre datos generados.
+
+El resultado no depende de cuántos procesos se usen (`procesos=4` reparte
+los trozos en un pool). La memoria máxima es la de unos pocos trozos, no la
+del historial completo.
+
+    from por_trozos import analizar
+    from cargador import cargar_por_trozos
+    resumen = analizar(cargar_por_trozos(origen="sqlite", tamano_trozo=100000), procesos=4)
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+import procesamiento
+from cargador import normalizar
+
+EN_VUELO_POR_PROCESO = 2  # Trozos enviados al pool sin terminar, por proceso (acota la memoria)
+
+# -----------------------------------------------------------------------------
+# Agregados parciales (uno por trozo)
+# -----------------------------------------------------------------------------
+def parcial(trozo):
+    """Procesa un trozo (preparar + derivar) y devuelve sus agregados sumables."""
+    df = procesamiento.procesar(trozo)
+    tiempo = df["tiempo_estimado"]
+    retraso = df["dias_retraso"]
+    retrasadas = retraso > 0
+    por_prioridad = df.groupby("prioridad", observed=False)
+    return {
+        "filas": len(df),
+        "tiempo": _momentos(tiempo),
+        "rendimiento": pd.Series({
+            "evaluables": df["cumplimiento"].count(),
+            "cumplidas": df["cumplimiento"].sum(),
+            "fuera_de_plazo": retrasadas.sum(),
+            "suma_retraso": retraso[retrasadas].sum(),
+        }),
+        "por_prioridad": pd.DataFrame({
+            "n_tiempo": por_prioridad["tiempo_estimado"].count(),
+            "suma_tiempo": tiempo.groupby(df["prioridad"], observed=False).sum(),
+            "completadas": por_prioridad["completado_en"].count(),
+        }),
+        "por_mes": procesamiento.por_mes(df),
+        "por_semana": procesamiento.por_semana(df),
+        "por_dia": procesamiento.por_dia(df),
+    }
+
+
+def _momentos(valores):
+    """(n, suma, M2) de una Serie, sin contar los vacíos. M2 = suma de (x - media)²."""
+    n = valores.count()
+    suma = valores.sum()
+    m2 = ((valores - suma / n) ** 2).sum() if n else 0.0
+    return pd.Series({"n": n, "suma": suma, "m2": m2})
+
+
+def _combinar_momentos(a, b):
+    """Junta dos (n, suma, M2) sin restar números grandes (Chan, Golub y LeVeque)."""
+    if not a["n"]:
+        return b
+    if not b["n"]:
+        return a
+    n = a["n"] + b["n"]
+    delta = b["suma"] / b["n"] - a["suma"] / a["n"]
+    m2 = a["m2"] + b["m2"] + delta ** 2 * a["n"] * b["n"] / n
+    return pd.Series({"n": n, "suma": a["suma"] + b["suma"], "m2": m2})
+
+
+def combinar(a, b):
+    """Junta dos parciales llave por llave.
+
+    Los conteos y sumas se suman (las Series/DataFrames se alinean por índice);
+    los momentos de `tiempo` se combinan con `_combinar_momentos`.
+    """
+    if a is None:
+        return b
+    resultado = {}
+    for llave in a:
+        if llave == "filas":
+            resultado[llave] = a[llave] + b[llave]
+        elif llave == "tiempo":
+            resultado[llave] = _combinar_momentos(a[llave], b[llave])
+        else:
+            resultado[llave] = a[llave].add(b[llave], fill_value=0)
+    return resultado
+
+# -----------------------------------------------------------------------------
+# Resultados finales (mismos tipos que procesamiento.resumen)
+# -----------------------------------------------------------------------------
+def _conteo(serie, referencia):
+    """Conteo combinado con el mismo índice y tipos que la versión en memoria."""
+    serie = serie.astype("int64").sort_index()
+    serie.index = serie.index.astype(referencia.index.dtype)
+    return serie.rename(referencia.name).rename_axis(referencia.index.name)
+
+
+def resultados(total):
+    """Promedios, porcentajes y desviación a partir de los parciales combinados."""
+    referencia = procesamiento.procesar(normalizar(pd.DataFrame()))  # Índices y tipos vacíos de referencia
+    tiempo, rend, prioridad = total["tiempo"], total["rendimiento"], total["por_prioridad"]
+    n = tiempo["n"]
+    varianza = tiempo["m2"] / (n - 1) if n > 1 else np.nan  # Misma corrección (ddof=1) que df.std()
+    return {
+        "filas": total["filas"],
+        "tiempo_promedio": np.float64(tiempo["suma"] / n) if n else np.float64("nan"),
+        "tiempo_desviacion": np.float64(np.sqrt(varianza)),
+        "rendimiento": {
+            "porcentaje_cumplimiento": (float(rend["cumplidas"] / rend["evaluables"] * 100)
+                                        if rend["evaluables"] else 0.0),
+            "fuera_de_plazo": int(rend["fuera_de_plazo"]),
+            "promedio_dias_retraso": (float(rend["suma_retraso"] / rend["fuera_de_plazo"])
+                                      if rend["fuera_de_plazo"] else 0.0),
+        },
+        "por_prioridad": pd.DataFrame({
+            "tiempo_promedio": (prioridad["suma_tiempo"] / prioridad["n_tiempo"].where(prioridad["n_tiempo"] > 0))
+                               .astype("float64"),
+            "completadas": prioridad["completadas"].astype("int64"),
+        }),
+        "por_mes": _conteo(total["por_mes"], procesamiento.por_mes(referencia)),
+        "por_semana": _conteo(total["por_semana"], procesamiento.por_semana(referencia)),
+        "por_dia": _conteo(total["por_dia"], procesamiento.por_dia(referencia)),
+    }
+
+
+def analizar(trozos, procesos=None):
+    """Recorre los trozos (un iterable de DataFrames) y devuelve el resumen completo.
+
+    Con `procesos` > 1 los parciales se calculan en un pool de procesos; como
+    mucho EN_VUELO_POR_PROCESO trozos por proceso esperan en memoria.
+    """
+    total = None
+    if procesos and procesos > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            pendientes = set()
+            for trozo in trozos:
+                pendientes.add(pool.submit(parcial, trozo))
+                if len(pendientes) >= EN_VUELO_POR_PROCESO * procesos:
+                    listos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                    for futuro in listos:
+                        total = combinar(total, futuro.result())
+            for futuro in pendientes:
+                total = combinar(total, futuro.result())
+    else:
+        for trozo in trozos:
+            total = combinar(total, parcial(trozo))
+    if total is None:
+        total = parcial(normalizar(pd.DataFrame()))  # Sin tareas: todo en cero
+    return resultados(total)
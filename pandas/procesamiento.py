@@ -0,0 +1,157 @@
+# Pipeline de procesamiento de tareas (funciones puras, sin DataFrame global)
+"""
+Prepara el DataFrame de tareas en una sola pasada y calcula las columnas
+derivadas una sola vez, para que todos los análisis las reutilicen.
+
+    from procesamiento import procesar
+    df = procesar(cargar_tareas())   # Devuelve un DataFrame nuevo; no modifica el original
+
+Diferencias con la versión anterior de 02-procesamiento.py:
+  - Cada columna de fecha se convierte una sola vez (y ninguna si ya viene
+    como datetime64 desde cargador.py).
+  - No se usa `dropna()` sobre todas las columnas: una tarea pendiente no
+    tiene `completado_en` y antes se descartaba. Solo se quitan filas sin
+    los datos obligatorios (COLUMNAS_OBLIGATORIAS).
+  - estado, prioridad y categoria son `category` (un entero por fila en vez
+    de un texto). Los números que se suman o promedian (`tiempo_estimado`,
+    `dias_retraso`) quedan en float64: en float32 la suma de un millón de
+    filas ya pierde decimales. Solo se achican los que nunca se agregan
+    (ids, `duracion_real`, `tiempo_estimado_horas`).
+  - `duracion_real` se calcula una vez (antes también se calculaba como
+    `dias_entre_creacion_y_entrega`, con el mismo valor).
+  - `atrasada` y `cumplimiento` quedan vacíos (<NA>) si falta alguna de las
+    dos fechas, así los promedios solo cuentan tareas que se pueden evaluar.
+
+Las funciones de análisis reciben el DataFrame procesado y devuelven
+resultados (Series, números o diccionarios); imprimir queda para el script.
+"""
+import pandas as pd
+
+COLUMNAS_FECHA = ["fecha_creacion", "fecha_limite", "completado_en", "fecha_actualizacion"]
+COLUMNAS_OBLIGATORIAS = ["id", "nombre", "estado", "fecha_creacion"]
+ESTADOS = ["pendiente", "en_progreso", "completada"]
+PRIORIDADES = ["baja", "media", "alta"]  # Orden: baja < media < alta
+
+# -----------------------------------------------------------------------------
+# Preparación y columnas derivadas
+# -----------------------------------------------------------------------------
+def _categoria(serie, tipo="category"):
+    """Texto -> category, en minúsculas y sin espacios.
+
+    La limpieza se hace sobre los valores distintos (unos pocos), no fila por fila.
+    """
+    serie = serie.astype("category")
+    limpias = serie.cat.categories.str.lower().str.strip()
+    if not limpias.equals(serie.cat.categories):
+        serie = serie.map(dict(zip(serie.cat.categories, limpias)))
+    return serie.astype(tipo)
+
+
+def preparar(df):
+    """Tipos correctos y livianos. Devuelve un DataFrame nuevo."""
+    df = df.dropna(subset=[col for col in COLUMNAS_OBLIGATORIAS if col in df.columns])
+    columnas = {}
+    for col in df.columns:
+        serie = df[col]
+        if col in COLUMNAS_FECHA:
+            if not pd.api.types.is_datetime64_any_dtype(serie):
+                serie = pd.to_datetime(serie, format="ISO8601", errors="coerce")
+        elif col == "estado":
+            serie = _categoria(serie, pd.CategoricalDtype(ESTADOS))
+        elif col == "prioridad":
+            serie = _categoria(serie, pd.CategoricalDtype(PRIORIDADES, ordered=True))
+        elif col == "categoria":
+            serie = serie.astype("category")
+        elif col in ("id", "id_categoria"):
+            serie = pd.to_numeric(serie, downcast="integer")
+        elif col == "tiempo_estimado":
+            # float64 y no float32: se suma y promedia sobre todo el historial
+            serie = pd.to_numeric(serie, errors="coerce").astype("float64")
+        columnas[col] = serie
+    return pd.DataFrame(columnas, index=df.index).reset_index(drop=True)
+
+
+def derivar(df):
+    """Agrega las columnas derivadas (cada una calculada una sola vez). Devuelve un DataFrame nuevo."""
+    creada, limite, completada = df["fecha_creacion"], df["fecha_limite"], df["completado_en"]
+    sin_plazo = completada.isna() | limite.isna()
+    dias = pd.Timedelta(days=1)
+    derivadas = {
+        "atrasada": (completada > limite).astype("boolean").mask(sin_plazo),
+        "cumplimiento": (completada <= limite).astype("boolean").mask(sin_plazo),
+        "mes": creada.dt.month.astype("Int8"),
+        "semana": completada.dt.isocalendar().week.astype("UInt8"),
+        "duracion_real": ((completada - creada) // dias).astype("float32"),
+        "dias_retraso": ((completada - limite) // dias).astype("float64"),  # Se promedia: float64
+        "tiempo_estimado_horas": (df["tiempo_estimado"] / 60).astype("float32"),
+    }
+    return df.assign(**derivadas)
+
+
+def procesar(df):
+    """preparar + derivar: el DataFrame listo para todos los análisis."""
+    return derivar(preparar(df))
+
+# -----------------------------------------------------------------------------
+# Análisis (reciben el DataFrame procesado)
+# -----------------------------------------------------------------------------
+def inconsistencias(df):
+    """Cuenta datos problemáticos: tiempos negativos, fechas imposibles y valores de prioridad."""
+    return {
+        "tiempos_negativos": int((df["tiempo_estimado"] < 0).sum()),
+        "completadas_antes_de_crearse": int((df["completado_en"] < df["fecha_creacion"]).sum()),
+        "prioridades": df["prioridad"].value_counts(dropna=False),
+    }
+
+
+def rendimiento(df):
+    """Porcentaje de cumplimiento y retrasos (solo tareas con fecha límite y completado)."""
+    retrasadas = df["dias_retraso"] > 0
+    cumplimiento = df["cumplimiento"].mean()  # <NA> si ninguna tarea se puede evaluar
+    return {
+        "porcentaje_cumplimiento": float(cumplimiento * 100) if pd.notna(cumplimiento) else 0.0,
+        "fuera_de_plazo": int(retrasadas.sum()),
+        "promedio_dias_retraso": float(df.loc[retrasadas, "dias_retraso"].mean()) if retrasadas.any() else 0.0,
+    }
+
+
+def por_prioridad(df):
+    """Tiempo estimado promedio y tareas completadas por prioridad."""
+    grupos = df.groupby("prioridad", observed=False)
+    return pd.DataFrame({
+        "tiempo_promedio": grupos["tiempo_estimado"].mean(),
+        "completadas": grupos["completado_en"].count(),  # count() ignora las NaT
+    })
+
+
+def por_mes(df):
+    """Tareas creadas por mes (1-12)."""
+    return df.groupby("mes").size()
+
+
+def por_semana(df):
+    """Tareas completadas por semana ISO del año."""
+    return df.groupby("semana").size()
+
+
+def por_dia(df):
+    """Tareas creadas por día."""
+    return df.groupby(df["fecha_creacion"].dt.normalize()).size()
+
+
+def resumen(df):
+    """Todos los resultados que imprime 02-procesamiento.py, en un diccionario.
+
+    por_trozos.analizar() devuelve lo mismo sin cargar todo el DataFrame (la
+    desviación puede variar en los últimos decimales, ver por_trozos.py).
+    """
+    return {
+        "filas": len(df),
+        "tiempo_promedio": df["tiempo_estimado"].mean(),
+        "tiempo_desviacion": df["tiempo_estimado"].std(),
+        "rendimiento": rendimiento(df),
+        "por_prioridad": por_prioridad(df),
+        "por_mes": por_mes(df),
+        "por_semana": por_semana(df),
+        "por_dia": por_dia(df),
+    }
@@ -0,0 +1,161 @@
+# respuestas.py
+"""
+Respuestas más livianas: compresión negociada, JSON por columnas y un codificador JSON rápido.
+
+- Compresión: si el cliente envía `Accept-Encoding` y el cuerpo supera
+  MINIMO_BYTES, la respuesta se comprime con brotli (si está instalado) o gzip
+  (zlib de la biblioteca estándar). Las respuestas en streaming (exportación
+  NDJSON) se comprimen trozo por trozo.
+- Formato por columnas: `filas_a_columnas` escribe cada llave una sola vez
+  ({"columnas": {"id": [1, 2], "nombre": ["a", "b"]}}) en vez de repetir las
+  diez llaves en cada tarea. Lo piden `?formato=columnas` en /api/tareas,
+  calendario.js y los scripts de pandas.
+- JSON rápido: si `orjson` está instalado, `jsonify` lo usa (3-10x más rápido
+  que el módulo json); si no, se usa el de siempre.
+"""
+import gzip
+import json
+import zlib
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:  # Dependencias opcionales: sin ellas se usan gzip y json
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MINIMO_BYTES = 1024  # Cuerpos más chicos no ganan nada al comprimirse
+NIVEL_GZIP = 6
+COMPRIMIBLES = ("text/", "application/json", "application/x-ndjson", "application/javascript",
+                "image/svg+xml")
+
+# -----------------------------------------------------------------------------
+# JSON
+# -----------------------------------------------------------------------------
+def dumps(datos):
+    """Serializa a JSON compacto (bytes UTF-8), con orjson si está disponible."""
+    if orjson is not None:
+        return orjson.dumps(datos)
+    return json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def filas_a_columnas(filas):
+    """Convierte una lista de filas (sqlite3.Row o dict) al formato por columnas.
+
+    Devuelve {"columnas": {llave: [valores...]}, "total": n}. Con una lista
+    vacía, "columnas" queda vacío.
+    """
+    if not filas:
+        return {"columnas": {}, "total": 0}
+    llaves = list(filas[0].keys())
+    return {
+        "columnas": {llave: [fila[llave] for fila in filas] for llave in llaves},
+        "total": len(filas),
+    }
+
+class ProveedorJSON(DefaultJSONProvider):
+    """Proveedor JSON de Flask que usa orjson para las respuestas compactas."""
+
+    sort_keys = False  # Las llaves salen en el orden de las columnas del SELECT
+
+    def dumps(self, obj, **kwargs):
+        # Con indent (modo debug) o sort_keys se usa el json de siempre
+        if orjson is None or "indent" in kwargs or self.sort_keys:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default).decode("utf-8")
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+
+# -----------------------------------------------------------------------------
+# Compresión
+# -----------------------------------------------------------------------------
+def elegir_codificacion(accept_encoding):
+    """Devuelve "br", "gzip" o None según el encabezado Accept-Encoding del cliente."""
+    aceptadas = {}
+    for parte in (accept_encoding or "").lower().split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        calidad = 1.0
+        if parametros.strip().startswith("q="):
+            try:
+                calidad = float(parametros.strip()[2:])
+            except ValueError:
+                calidad = 0.0
+        aceptadas[nombre.strip()] = calidad
+    if brotli is not None and aceptadas.get("br", 0) > 0:
+        return "br"
+    if aceptadas.get("gzip", aceptadas.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+def comprimir(cuerpo, codificacion):
+    if codificacion == "br":
+        return brotli.compress(cuerpo, quality=4)  # Calidad 4: rápido y mejor que gzip
+    return gzip.compress(cuerpo, NIVEL_GZIP)
+
+class CompresorStream:
+    """Compresor incremental: cada llamada a `comprimir` devuelve bytes listos para enviar."""
+
+    def __init__(self, codificacion):
+        self._br = codificacion == "br"
+        if self._br:
+            self._compresor = brotli.Compressor(quality=4)
+        else:
+            self._compresor = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 31)  # 31: formato gzip
+
+    def comprimir(self, trozo):
+        if isinstance(trozo, str):
+            trozo = trozo.encode("utf-8")
+        if self._br:
+            return self._compresor.process(trozo) + self._compresor.flush()
+        return self._compresor.compress(trozo) + self._compresor.flush(zlib.Z_SYNC_FLUSH)
+
+    def terminar(self):
+        return self._compresor.finish() if self._br else self._compresor.flush()
+
+def comprimir_stream(trozos, codificacion):
+    """Comprime un iterable de trozos sin juntarlo en memoria (cada trozo sale enseguida)."""
+    compresor = CompresorStream(codificacion)
+    for trozo in trozos:
+        salida = compresor.comprimir(trozo)
+        if salida:
+            yield salida
+    yield compresor.terminar()
+
+def es_comprimible(mimetype):
+    return bool(mimetype) and mimetype.startswith(COMPRIMIBLES)
+
+def _comprimir_respuesta(response):
+    response.vary.add("Accept-Encoding")
+    # direct_passthrough: archivos estáticos servidos tal cual (send_file)
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or not es_comprimible(response.mimetype)):
+        return response
+    codificacion = elegir_codificacion(request.headers.get("Accept-Encoding"))
+    if codificacion is None:
+        return response
+
+    if response.is_streamed:
+        response.response = comprimir_stream(response.response, codificacion)
+        response.headers.pop("Content-Length", None)
+    else:
+        cuerpo = response.get_data()
+        if len(cuerpo) < MINIMO_BYTES:
+            return response
+        response.set_data(comprimir(cuerpo, codificacion))
+    response.headers["Content-Encoding"] = codificacion
+    return response
+
+# -----------------------------------------------------------------------------
+# Integración con Flask
+# -----------------------------------------------------------------------------
+def init_respuestas(app):
+    """Activa el JSON rápido y la compresión de respuestas (API y HTML) en `app`."""
+    app.json = ProveedorJSON(app)
+    app.after_request(_comprimir_respuesta)
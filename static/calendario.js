@@ -27,10 +27,20 @@ function obtenerColor(prioridad) {
     return colores[prioridad] || "#007bff"; // Azul por defecto
 }
 
+/**
+ * Fecha y hora local actual como texto YYYY-MM-DDTHH:MM (mismo formato que fecha_limite)
+ */
+function fechaLocalActual() {
+    const d = new Date();
+    const dos = n => String(n).padStart(2, '0');
+    return `${d.getFullYear()}-${dos(d.getMonth() + 1)}-${dos(d.getDate())}T${dos(d.getHours())}:${dos(d.getMinutes())}`;
+}
+
 /**
  * Convierte una tarea en un evento del calendario
+ * @param {string} [ahora] - Resultado de fechaLocalActual(), calculado una vez por carga
  */
-function crearEvento(tarea) {
+function crearEvento(tarea, ahora = fechaLocalActual()) {
     // Determinar qué fecha usar y formatearla correctamente
     let fecha;
     
@@ -47,9 +57,8 @@ function crearEvento(tarea) {
             fecha = fecha + ':00';
         }
         // Si la fecha límite está en el futuro, usar fecha de creación en su lugar
-        const fechaLimite = new Date(fecha);
-        const hoy = new Date();
-        if (fechaLimite > hoy) {
+        // (comparación de texto: el formato ISO ordena igual que las fechas)
+        if (fecha > ahora) {
             // console.log(`DEBUG: Fecha límite ${fecha} está en el futuro, usando fecha de creación`);
             fecha = tarea.fecha_creacion;
         }
@@ -109,14 +118,19 @@ if (el) {
 }
 /**
  * Carga las tareas desde el servidor
+ * @param {string} [hasta] - Último día visible (YYYY-MM-DD): el servidor crea
+ *   hasta esa fecha las repeticiones de las tareas recurrentes
  */
-async function cargarTareas() {
+async function cargarTareas(hasta) {
     try {
         // console.log('DEBUG: Cargando tareas desde /api/tareas');
-        const response = await apiFetch('/api/tareas');
+        // Formato por columnas: cada llave viaja una sola vez (respuesta más chica)
+        const url = '/api/tareas?formato=columnas' + (hasta ? `&hasta=${hasta}` : '');
+        const response = await apiFetch(url);
         // console.log('DEBUG: Respuesta de API:', response);
         
-        const eventos = response.map(tarea => crearEvento(tarea));
+        const ahora = fechaLocalActual();
+        const eventos = filasDesdeColumnas(response).map(tarea => crearEvento(tarea, ahora));
         // console.log('DEBUG: Eventos creados:', eventos);
         
         return eventos;
@@ -159,7 +173,7 @@ function inicializarCalendario() {
         events: async function(info, successCallback, failureCallback) {
             try {
                 // console.log('DEBUG: FullCalendar solicitando eventos para rango:', info.start, 'a', info.end);
-                const eventos = await cargarTareas();
+                const eventos = await cargarTareas(info.endStr.slice(0, 10));
                 // console.log('DEBUG: Enviando eventos a FullCalendar:', eventos);
                 successCallback(eventos);
             } catch (error) {
@@ -67,6 +67,31 @@ async function apiFetch(url, options = {}) {
     }
 }
 
+/**
+ * Convierte una respuesta en formato por columnas (?formato=columnas) a una
+ * lista de objetos, como la que devuelve /api/tareas sin ese parámetro.
+ * Si ya es una lista, la devuelve igual.
+ * @param {Object|Array} datos - {columnas: {id: [...], nombre: [...]}, total: n}
+ * @returns {Array} Lista de objetos (uno por fila)
+ */
+function filasDesdeColumnas(datos) {
+    if (Array.isArray(datos)) {
+        return datos;
+    }
+    const columnas = (datos && datos.columnas) || {};
+    const llaves = Object.keys(columnas);
+    const total = (datos && datos.total) || 0;
+    const filas = new Array(total);
+    for (let i = 0; i < total; i++) {
+        const fila = {};
+        for (const llave of llaves) {
+            fila[llave] = columnas[llave][i];
+        }
+        filas[i] = fila;
+    }
+    return filas;
+}
+
 // =============================================================================
 // FUNCIONES DE INTERFAZ DE USUARIO
 // =============================================================================
@@ -0,0 +1,34 @@
+# Configuración común de las pruebas (pytest la carga sola)
+import os
+import sys
+
+import pytest
+
+# Los módulos de la app (app.py, database.py, models/) están en la raíz del repositorio
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import database  # noqa: E402
+import graficos_web  # noqa: E402
+import metricas  # noqa: E402
+from app import create_app  # noqa: E402
+from models.categoria import Categoria  # noqa: E402
+from models.plantilla import Plantilla  # noqa: E402
+from models.vencimiento import Vencimiento  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """App con PruebasConfig sobre una base nueva en una carpeta temporal."""
+    monkeypatch.setattr(database, "DATABASE_NAME", database.DATABASE_NAME)  # Se restaura al terminar
+    monkeypatch.setattr(graficos_web, "CARPETA", str(tmp_path / "graficos"))
+    Categoria.limpiar_cache()  # Los ids en caché son de la base de la prueba anterior
+    Vencimiento.limpiar()  # Igual con el índice de fechas límite
+    Plantilla.limpiar_cache()  # Y con la última fecha materializada
+    metricas.reiniciar()  # Las métricas son del proceso: cada prueba empieza de cero
+    return create_app("config.PruebasConfig", DATABASE=str(tmp_path / "tareas.sqlite"))
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
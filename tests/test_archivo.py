@@ -0,0 +1,48 @@
+# Tareas archivadas (mantenimiento.py archivar) y migración de `tareas_archivo`
+import sqlite3
+
+import database
+import mantenimiento
+from database import execute, query_all, query_one
+
+
+def test_archivar_conserva_la_plantilla(cliente):
+    plantilla = {"nombre": "Regar", "categoria": "Casa", "regla": "diaria"}
+    assert cliente.post("/api/plantillas", json=plantilla).status_code == 201
+    repeticion = query_one("SELECT id, id_plantilla, ocurrencia FROM tareas ORDER BY ocurrencia LIMIT 1")
+    execute("UPDATE tareas SET estado = 'completada', completado_en = '2000-01-01 09:00:00' WHERE id = ?",
+            (repeticion["id"],))
+
+    assert mantenimiento.archivar(informar=None) == 1
+    archivada = query_one("SELECT id_plantilla, ocurrencia FROM vista_tareas_todas WHERE id = ?",
+                          (repeticion["id"],))
+    assert tuple(archivada) == (repeticion["id_plantilla"], repeticion["ocurrencia"])
+
+    # La API la sigue mostrando con ?include_archived=true
+    assert cliente.get(f"/api/tarea/{repeticion['id']}").status_code == 404
+    respuesta = cliente.get(f"/api/tarea/{repeticion['id']}?include_archived=true")
+    assert respuesta.get_json()["estado"] == "completada"
+
+
+def test_migra_un_archivo_de_la_version_anterior(app):
+    """Una base con `tareas_archivo` sin id_plantilla/ocurrencia (esquema 1) se actualiza."""
+    conn = sqlite3.connect(database.DATABASE_NAME)
+    conn.executescript("""
+        DROP VIEW vista_tareas_todas;
+        DROP TABLE tareas_archivo;
+        CREATE TABLE tareas_archivo (
+            id INTEGER PRIMARY KEY, nombre TEXT NOT NULL, fecha_creacion TEXT NOT NULL,
+            fecha_limite TEXT, prioridad TEXT, estado TEXT NOT NULL, tiempo_estimado INTEGER,
+            completado_en TEXT, id_categoria INTEGER NOT NULL, fecha_actualizacion TEXT NOT NULL,
+            archivado_en TEXT NOT NULL DEFAULT (datetime('now','localtime'))
+        );
+        CREATE VIEW vista_tareas_todas AS SELECT id, nombre FROM tareas_archivo;
+        PRAGMA user_version = 1;
+    """)
+    conn.close()
+
+    assert database.init_db() is True
+    columnas = {fila["name"] for fila in query_all("PRAGMA table_info(tareas_archivo)")}
+    assert {"id_plantilla", "ocurrencia"} <= columnas
+    columnas = {fila["name"] for fila in query_all("PRAGMA table_info(vista_tareas_todas)")}
+    assert {"id_plantilla", "ocurrencia", "categoria"} <= columnas
@@ -0,0 +1,55 @@
+# Arrancar un worker no toca la base hasta la primera petición
+"""
+Cada prueba corre en un intérprete nuevo (como un worker de gunicorn recién
+creado): `import app` y `create_app()` no abren la base, la primera petición
+crea el esquema y, en una base ya al día, revisar el esquema solo lee
+PRAGMA user_version. Los tiempos se miden aparte con benchmarks/arranque.py.
+"""
+import json
+import subprocess
+import sys
+
+from conftest import RAIZ
+
+# Anota cada sentencia de cada conexión SQLite que se abra en el proceso
+PROCESO = r"""
+import json, sqlite3, sys
+sys.path.insert(0, {raiz!r})
+sentencias = []
+_connect = sqlite3.connect
+def connect(*args, **kwargs):
+    conn = _connect(*args, **kwargs)
+    conn.set_trace_callback(sentencias.append)
+    return conn
+sqlite3.connect = connect
+
+import app as modulo_app
+al_importar = list(sentencias)
+app = modulo_app.create_app(DATABASE={ruta!r})
+al_crear_app = sentencias[len(al_importar):]
+del sentencias[:]
+with app.test_request_context():
+    app.preprocess_request()  # Los ganchos before_request de la primera petición
+print(json.dumps({{"importar": al_importar, "crear_app": al_crear_app, "primera_peticion": sentencias}}))
+"""
+
+
+def _arrancar(ruta, carpeta):
+    salida = subprocess.run([sys.executable, "-c", PROCESO.format(raiz=RAIZ, ruta=ruta)], check=True,
+                            capture_output=True, text=True, cwd=carpeta).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def test_arranque_no_toca_la_base(tmp_path):
+    ruta = tmp_path / "arranque.sqlite"
+
+    # Base nueva: nada la abre hasta la primera petición, que crea el esquema
+    primero = _arrancar(str(ruta), str(tmp_path))
+    assert primero["importar"] == [] and primero["crear_app"] == []
+    assert any(sql.strip().startswith("CREATE TABLE") for sql in primero["primera_peticion"])
+    assert ruta.exists()
+
+    # Worker siguiente: base al día, una sola conexión y una sola lectura
+    siguiente = _arrancar(str(ruta), str(tmp_path))
+    assert siguiente["importar"] == [] and siguiente["crear_app"] == []
+    assert siguiente["primera_peticion"] == ["PRAGMA foreign_keys = ON", "PRAGMA user_version"]
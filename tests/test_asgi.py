@@ -0,0 +1,107 @@
+# Modo ASGI (app_asgi.py): rutas nativas con los mismos ganchos que Flask
+"""
+Las rutas nativas (corrutinas) no pasan por los before/after_request de
+Flask; app_asgi.py les aplica el control de admisión, las métricas y el
+presupuesto de consultas por su cuenta. Lo demás se delega a Flask en un
+pool de hilos propio (no en un solo hilo compartido).
+"""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import app_asgi
+from database import PresupuestoConsultasExcedido
+
+
+@pytest.fixture
+def asgi(app, monkeypatch):
+    """app_asgi usando la app de pruebas (base temporal, PruebasConfig)."""
+    monkeypatch.setattr(app_asgi, "flask_app", app)
+    return app_asgi.application
+
+
+def pedir(aplicacion, metodo, ruta, datos=None, query=b""):
+    """Una petición HTTP completa; devuelve (estado, encabezados, cuerpo)."""
+    cuerpo = json.dumps(datos).encode() if datos is not None else b""
+    encabezados = [(b"content-type", b"application/json"), (b"content-length", str(len(cuerpo)).encode())]
+    mensajes = []
+
+    async def recibir():
+        return {"type": "http.request", "body": cuerpo}
+
+    async def enviar(mensaje):
+        mensajes.append(mensaje)
+
+    scope = {"type": "http", "method": metodo, "path": ruta, "query_string": query,
+             "headers": encabezados, "http_version": "1.1"}
+    return _completar(aplicacion(scope, recibir, enviar), mensajes)
+
+
+async def _completar(corrutina, mensajes):
+    await corrutina
+    return mensajes[0]["status"], dict(mensajes[0]["headers"]), b"".join(m.get("body", b"") for m in mensajes[1:])
+
+
+def test_flask_se_atiende_en_varios_hilos(app, asgi):
+    hilos = set()
+
+    @app.before_request
+    def _marcar():
+        hilos.add(threading.get_ident())
+        time.sleep(0.05)  # Una petición lenta: en un solo hilo, 10 tardarían 0,5 s
+
+    async def varias():
+        return await asyncio.gather(*(pedir(asgi, "GET", "/acerca") for _ in range(10)))
+
+    inicio = time.perf_counter()
+    respuestas = asyncio.run(varias())
+    assert {estado for estado, _, _ in respuestas} == {200}
+    assert len(hilos) > 1
+    assert time.perf_counter() - inicio < 0.4
+
+
+def test_rutas_nativas_con_metricas_y_presupuesto(asgi):
+    async def flujo():
+        estado, _, _ = await pedir(asgi, "POST", "/api/tareas", {"nombre": "Nativa", "categoria": "Casa"})
+        assert estado == 201  # Delegada a Flask
+        estado, encabezados, cuerpo = await pedir(asgi, "GET", "/api/tareas")
+        assert estado == 200 and [t["nombre"] for t in json.loads(cuerpo)] == ["Nativa"]
+        assert int(encabezados[b"x-consultas-sql"]) >= 1
+        assert b"server-timing" in encabezados
+        estado, _, _ = await pedir(asgi, "GET", "/api/tarea/1")
+        assert estado == 200
+        return await pedir(asgi, "GET", "/metrics")
+
+    _, _, cuerpo = asyncio.run(flujo())
+    texto = cuerpo.decode()
+    assert 'rutina_http_request_duration_seconds_count{method="GET",route="/api/tareas"} 1' in texto
+    assert 'rutina_http_request_duration_seconds_count{method="GET",route="/api/tarea/<int:id>"} 1' in texto
+
+
+def test_ruta_nativa_respeta_el_presupuesto(app, asgi, monkeypatch):
+    monkeypatch.setitem(app.config["PRESUPUESTO_CONSULTAS"], "tareas.api_tareas_show", 0)
+    with pytest.raises(PresupuestoConsultasExcedido):
+        asyncio.run(pedir(asgi, "GET", "/api/tarea/1"))
+
+
+def test_ruta_nativa_pasa_por_la_admision(asgi, monkeypatch):
+    compuerta = app_asgi.admision.compuertas()["analitica"]
+    monkeypatch.setattr(compuerta, "en_curso", compuerta.limite)
+    monkeypatch.setattr(compuerta, "esperando", compuerta.cola)  # Cola llena: rechazo inmediato
+    estado, encabezados, _ = asyncio.run(pedir(asgi, "GET", "/api/estadisticas"))
+    assert estado == 503
+    assert encabezados[b"retry-after"] == str(compuerta.reintentar_en()).encode()
+
+
+@pytest.mark.parametrize("ruta,query", [
+    ("/api/tareas", b"limite=-1"),
+    ("/api/tareas", b"limite=99999999999999999999&formato=columnas"),
+    ("/api/tareas", b"desde_id=99999999999999999999"),
+    ("/api/tareas/exportar", b"desde_id=99999999999999999999"),
+])
+def test_numeros_invalidos_del_listado(asgi, ruta, query):
+    estado, _, _ = asyncio.run(pedir(asgi, "GET", ruta, query=query))
+    assert estado == 400
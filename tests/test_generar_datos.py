@@ -0,0 +1,23 @@
+# La base sintética de benchmarks/generar_datos.py queda lista para la app
+import os
+import sqlite3
+import sys
+
+import database
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from generar_datos import generar  # noqa: E402
+
+
+def test_base_generada_queda_en_wal(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_NAME", database.DATABASE_NAME)  # generar() lo cambia
+    ruta = str(tmp_path / "sintetica.sqlite")
+    assert generar(ruta, 500, lote=200) == 500
+
+    conn = sqlite3.connect(ruta)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("SELECT COUNT(*) FROM tareas").fetchone()[0] == 500
+    finally:
+        conn.close()
@@ -0,0 +1,65 @@
+# Gráficos de /api/graficos y su caché en disco (graficos_web.py)
+import os
+
+import pytest
+
+import database
+import graficos_web
+import mantenimiento
+from database import execute
+
+pytest.importorskip("matplotlib")
+
+
+@pytest.fixture
+def dibujos(cliente, monkeypatch):
+    """Cuenta las veces que se dibuja un gráfico (las demás salen de la caché)."""
+    assert cliente.post("/api/tareas", json={"nombre": "Informe", "categoria": "Trabajo"}).status_code == 201
+    veces = []
+    dibujar = graficos_web._dibujar
+    monkeypatch.setattr(graficos_web, "_dibujar", lambda *args: veces.append(args[0]) or dibujar(*args))
+    return veces
+
+
+def test_grafico_se_dibuja_una_vez_por_cambio(cliente, dibujos):
+    primera = cliente.get("/api/graficos/prioridad")
+    assert primera.status_code == 200 and primera.mimetype == "image/png"
+    assert cliente.get("/api/graficos/prioridad").get_data() == primera.get_data()
+    assert dibujos == ["prioridad"]
+    assert cliente.get("/api/graficos/prioridad", headers={"If-None-Match": primera.headers["ETag"]}).status_code == 304
+
+    assert cliente.post("/api/tareas", json={"nombre": "Otra", "categoria": "Casa", "prioridad": "alta"}).status_code == 201
+    assert cliente.get("/api/graficos/prioridad").status_code == 200
+    assert dibujos == ["prioridad", "prioridad"]
+    assert len(os.listdir(graficos_web.CARPETA)) == 1  # La versión anterior se borró
+
+
+def test_grafico_parametros_invalidos(cliente):
+    assert cliente.get("/api/graficos/no-existe").status_code == 404
+    assert cliente.get("/api/graficos/prioridad?formato=gif").status_code == 404
+    assert cliente.get("/api/graficos/prioridad?desde=ayer").status_code == 400
+
+
+def test_version_cambia_despues_de_reiniciar_el_wal(cliente, dibujos):
+    """Tras un checkpoint TRUNCATE, la misma escritura deja el -wal igual de grande.
+
+    Aunque las dos escrituras caigan en el mismo tic del reloj (aquí se fuerza
+    con os.utime), la versión tiene que cambiar.
+    """
+    archivos = (database.DATABASE_NAME, database.DATABASE_NAME + "-wal")
+
+    def escribir(prioridad):
+        mantenimiento.checkpoint("TRUNCATE", informar=None)
+        execute("UPDATE tareas SET prioridad = ? WHERE id = 1", (prioridad,))
+
+    assert cliente.get("/api/graficos/prioridad").status_code == 200  # Como un worker que ya sirvió gráficos
+    escribir("alta")
+    antes = database.version_datos()
+    fechas = [os.stat(ruta).st_mtime_ns for ruta in archivos]
+    tamanos = [os.stat(ruta).st_size for ruta in archivos]
+
+    escribir("baja")
+    for ruta, fecha in zip(archivos, fechas):
+        os.utime(ruta, ns=(fecha, fecha))
+    assert [os.stat(ruta).st_size for ruta in archivos] == tamanos
+    assert database.version_datos() != antes
@@ -0,0 +1,79 @@
+# Tareas recurrentes: fechas de cada regla y materialización (models/plantilla.py)
+from datetime import date, timedelta
+
+import pytest
+
+from database import execute, query_all
+from models.plantilla import HORIZONTE_DIAS, Plantilla, ocurrencias
+
+
+def _plantilla(regla, inicio, intervalo=1, dias_semana=None, fin=None):
+    return {"regla": regla, "inicio": inicio, "intervalo": intervalo, "dias_semana": dias_semana, "fin": fin}
+
+
+def _fechas(*textos):
+    return [date.fromisoformat(texto) for texto in textos]
+
+
+@pytest.mark.parametrize("plantilla, desde, hasta, esperadas", [
+    # Diaria cada 3 días; `desde` queda fuera del rango
+    (_plantilla("diaria", "2024-01-01", 3), None, "2024-01-10",
+     _fechas("2024-01-01", "2024-01-04", "2024-01-07", "2024-01-10")),
+    (_plantilla("diaria", "2024-01-01", 3), "2024-01-04", "2024-01-10",
+     _fechas("2024-01-07", "2024-01-10")),
+    # `fin` corta antes de `hasta`
+    (_plantilla("diaria", "2024-01-01", fin="2024-01-03"), None, "2024-02-01",
+     _fechas("2024-01-01", "2024-01-02", "2024-01-03")),
+    # Lunes y jueves, semana por medio (2024-01-01 es lunes)
+    (_plantilla("semanal", "2024-01-01", 2, "0,3"), None, "2024-01-31",
+     _fechas("2024-01-01", "2024-01-04", "2024-01-15", "2024-01-18", "2024-01-29")),
+    # Sin días: el mismo día de la semana que `inicio` (miércoles)
+    (_plantilla("semanal", "2024-01-03"), None, "2024-01-20",
+     _fechas("2024-01-03", "2024-01-10", "2024-01-17")),
+    # Día 31: en meses más cortos, el último día del mes
+    (_plantilla("mensual", "2024-01-31"), None, "2024-05-31",
+     _fechas("2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30", "2024-05-31")),
+    (_plantilla("mensual", "2024-01-15", 2), None, "2024-06-30",
+     _fechas("2024-01-15", "2024-03-15", "2024-05-15")),
+    (_plantilla("mensual", "2024-01-15"), "2024-02-15", "2024-04-14",
+     _fechas("2024-03-15")),
+])
+def test_ocurrencias(plantilla, desde, hasta, esperadas):
+    desde = date.fromisoformat(desde) if desde else None
+    assert ocurrencias(plantilla, desde, date.fromisoformat(hasta)) == esperadas
+
+
+def _repeticiones():
+    return [fila["ocurrencia"] for fila in query_all(
+        "SELECT ocurrencia FROM tareas WHERE id_plantilla IS NOT NULL ORDER BY ocurrencia")]
+
+
+def test_no_materializa_el_pasado(cliente):
+    plantilla = {"nombre": "Regar", "categoria": "Casa", "regla": "diaria", "inicio": "2000-01-01"}
+    assert cliente.post("/api/plantillas", json=plantilla).status_code == 201
+
+    hoy = date.today()
+    esperadas = [(hoy + timedelta(days=n)).isoformat() for n in range(HORIZONTE_DIAS + 1)]
+    assert _repeticiones() == esperadas
+    assert cliente.get("/api/tareas/vencidas").get_json() == []
+
+
+def test_materializar_dos_veces_no_duplica(cliente):
+    plantilla = {"nombre": "Regar", "categoria": "Casa", "regla": "semanal", "dias_semana": [0, 3]}
+    assert cliente.post("/api/plantillas", json=plantilla).status_code == 201
+    antes = _repeticiones()
+    assert antes
+
+    # Como otro proceso que no sabe hasta dónde se llegó
+    Plantilla.limpiar_cache()
+    execute("UPDATE plantillas_recurrentes SET materializado_hasta = NULL")
+    assert Plantilla.materializar() == 0
+    assert _repeticiones() == antes
+
+
+def test_fin_anterior_a_inicio(cliente):
+    plantilla = {"nombre": "Regar", "categoria": "Casa", "regla": "diaria",
+                 "inicio": "2024-05-01", "fin": "2024-04-30"}
+    respuesta = cliente.post("/api/plantillas", json=plantilla)
+    assert respuesta.status_code == 400
+    assert "fin" in respuesta.get_json()["error"]
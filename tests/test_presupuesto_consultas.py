@@ -0,0 +1,137 @@
+# Cada ruta respeta su presupuesto de consultas (PRESUPUESTO_CONSULTAS en config.py)
+"""
+Con PruebasConfig (TESTING=True) el detector de database.py es estricto: si
+una ruta ejecuta más consultas que su presupuesto, la petición lanza
+PresupuestoConsultasExcedido. Estas pruebas recorren todas las rutas con
+datos de ejemplo; si una optimización se pierde (por ejemplo, vuelve un N+1),
+falla la ruta correspondiente.
+"""
+import pytest
+from jinja2 import TemplateNotFound
+
+from database import PresupuestoConsultasExcedido
+
+TAREAS = [
+    {"nombre": "Comprar pan", "categoria": "Casa", "prioridad": "baja", "tiempo_estimado": 15},
+    {"nombre": "Informe mensual", "categoria": "Trabajo", "prioridad": "alta",
+     "fecha_limite": "2000-01-01T09:00", "tiempo_estimado": 120},
+    {"nombre": "Llamar al banco", "categoria": "Trabajo", "estado": "completada"},
+]
+PLANTILLA = {"nombre": "Regar", "categoria": "Casa", "regla": "semanal", "dias_semana": [0, 3], "hora": "09:00"}
+EDICION = {"nombre": "Comprar pan integral", "categoria": "Compras", "prioridad": "media", "tiempo_estimado": 20}
+# Los formularios HTML usan "title" para el nombre (ver datos_desde_formulario)
+FORMULARIO = {"title": "Desde formulario", "categoria": "Casa"}
+FORMULARIO_EDICION = {"title": "Comprar pan integral", "categoria": "Compras", "prioridad": "media",
+                      "tiempo_estimado": "20"}
+
+# (método, url, argumentos del cliente, estado esperado); la tarea 1 y la plantilla 1 existen
+RUTAS = [
+    ("get", "/api/tareas", {}, 200),
+    ("get", "/api/tareas?formato=columnas&actualizadas_desde=2000-01-01", {}, 200),
+    ("get", "/api/tareas?estado=pendiente&limite=2", {}, 200),
+    ("get", "/api/tareas/exportar", {}, 200),
+    ("get", "/api/tareas/vencidas", {}, 200),
+    ("get", "/api/tareas/proximas?horas=48", {}, 200),
+    ("get", "/api/recordatorios", {}, 200),
+    ("get", "/api/estadisticas", {}, 200),
+    ("get", "/api/graficos/prioridad", {}, 200),
+    ("get", "/api/plantillas", {}, 200),
+    ("post", "/api/plantillas", {"json": PLANTILLA}, 201),
+    ("post", "/api/plantillas", {"json": {**PLANTILLA, "categoria": "Jardín"}}, 201),  # Categoría nueva
+    ("delete", "/api/plantilla/1", {}, 204),
+    ("get", "/api/tarea/1", {}, 200),
+    ("put", "/api/tarea/1", {"json": EDICION}, 200),
+    ("delete", "/api/tarea/1", {}, 204),
+    ("post", "/api/tarea/1/toggle-estado", {}, 200),
+    ("post", "/api/tareas", {"json": {"nombre": "Nueva", "categoria": "Categoría nueva"}}, 201),
+    ("get", "/", {}, 200),
+    ("get", "/crear", {}, 200),
+    ("post", "/crear", {"data": FORMULARIO}, 302),
+    ("post", "/crear", {"data": {**FORMULARIO, "categoria": "Categoría nueva"}}, 302),
+    ("get", "/tarea/1", {}, 200),
+    ("post", "/tarea/1/toggle-estado", {}, 302),
+    ("get", "/editar/1", {}, 200),
+    ("post", "/editar/1", {"data": FORMULARIO_EDICION}, 302),
+    ("get", "/eliminar/1", {}, 302),
+    ("get", "/acerca", {}, 200),
+    pytest.param("get", "/filtrar/casa", {}, 200, marks=pytest.mark.xfail(
+        raises=TemplateNotFound, strict=True, reason="la ruta renderiza tareas.html, que no existe")),
+    ("get", "/metrics", {}, 200),
+]
+
+
+@pytest.fixture
+def cliente_con_datos(cliente):
+    for tarea in TAREAS:
+        respuesta = cliente.post("/api/tareas", json=tarea)
+        assert respuesta.status_code == 201, respuesta.get_data(as_text=True)
+    assert cliente.post("/api/plantillas", json=PLANTILLA).status_code == 201
+    return cliente
+
+
+def _ruta(parametro):
+    return parametro.values if hasattr(parametro, "values") else parametro
+
+
+@pytest.mark.parametrize("metodo,url,argumentos,estado", RUTAS,
+                         ids=[f"{_ruta(p)[0].upper()} {_ruta(p)[1]}" for p in RUTAS])
+def test_ruta_dentro_del_presupuesto(app, cliente_con_datos, metodo, url, argumentos, estado):
+    try:
+        respuesta = getattr(cliente_con_datos, metodo)(url, **argumentos)
+        respuesta.get_data()  # Consume las respuestas en streaming (listado, exportación)
+    except PresupuestoConsultasExcedido as exc:
+        pytest.fail(f"{metodo.upper()} {url}: {exc}")
+    assert respuesta.status_code == estado, respuesta.get_data(as_text=True)
+
+
+def test_formularios_guardan_los_datos(cliente_con_datos):
+    """Un formulario con errores también redirige (a sí mismo): hay que mirar a dónde."""
+    respuesta = cliente_con_datos.post("/crear", data=FORMULARIO)
+    assert respuesta.headers["Location"] == "/"
+    nombres = [tarea["nombre"] for tarea in cliente_con_datos.get("/api/tareas").get_json()]
+    assert FORMULARIO["title"] in nombres
+
+    respuesta = cliente_con_datos.post("/editar/1", data=FORMULARIO_EDICION)
+    assert respuesta.headers["Location"] == "/tarea/1"
+    tarea = cliente_con_datos.get("/api/tarea/1").get_json()
+    assert (tarea["nombre"], tarea["prioridad"], tarea["tiempo_estimado"]) == ("Comprar pan integral", "media", 20)
+
+
+def test_todas_las_rutas_estan_cubiertas(app):
+    """Una ruta nueva tiene que agregarse a RUTAS (y quizás a PRESUPUESTO_CONSULTAS)."""
+    probadas = {_ruta(p)[1].split("?")[0].replace("/1", "/<int:id>") for p in RUTAS}
+    probadas = {url.replace("/prioridad", "/<nombre>").replace("/casa", "/<filtro>") for url in probadas}
+    reglas = {regla.rule for regla in app.url_map.iter_rules() if regla.endpoint != "static"}
+    assert reglas - probadas == set()
+
+
+def test_listado_en_streaming_cuenta_sus_paginas(app, cliente_con_datos, monkeypatch):
+    """Las consultas del cuerpo en streaming (una por página) también cuentan."""
+    from models import tarea
+    monkeypatch.setattr(tarea, "TAMANO_PAGINA_JSON", 1)  # Una página por tarea
+    monkeypatch.setitem(app.config["PRESUPUESTO_CONSULTAS"], "tareas.api_tareas_index", 3)
+    respuesta = cliente_con_datos.get("/api/tareas")
+    with pytest.raises(PresupuestoConsultasExcedido):
+        respuesta.get_data()
+
+
+@pytest.mark.parametrize("query", [
+    "limite=-1",
+    "limite=abc",
+    "limite=99999999999999999999&formato=columnas",
+    "limite=99999999999999999999",
+    "desde_id=99999999999999999999",
+    "categoria_id=99999999999999999999",
+])
+def test_numeros_invalidos_del_listado(cliente_con_datos, query):
+    respuesta = cliente_con_datos.get(f"/api/tareas?{query}")
+    assert respuesta.status_code == 400, respuesta.get_data(as_text=True)
+
+
+def test_exportar_desde_id_enorme(cliente_con_datos):
+    assert cliente_con_datos.get("/api/tareas/exportar?desde_id=99999999999999999999").status_code == 400
+
+
+def test_limite(cliente_con_datos):
+    assert cliente_con_datos.get("/api/tareas?limite=0").get_json() == []
+    assert len(cliente_con_datos.get("/api/tareas?limite=2").get_json()) == 2
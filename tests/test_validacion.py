@@ -0,0 +1,110 @@
+# Validadores de models/validacion.py y categorías que ya no existen
+import pytest
+
+from database import execute
+from models.categoria import Categoria
+from models.validacion import (
+    MAX_ID, MAX_TIEMPO_ESTIMADO, validar, validar_categoria, validar_dias_semana, validar_estado,
+    validar_fecha, validar_fecha_limite, validar_hora, validar_horas, validar_intervalo, validar_limite,
+    validar_lote, validar_plantilla, validar_prioridad, validar_tiempo_estimado,
+)
+
+
+@pytest.mark.parametrize("validador, valor, esperado", [
+    (validar_categoria, 3, 3),
+    (validar_categoria, " 7 ", 7),
+    (validar_fecha_limite, "2024-02-29", "2024-02-29T23:59"),
+    (validar_fecha_limite, "2024-02-29T08:30", "2024-02-29T08:30"),
+    (validar_fecha_limite, "", None),
+    (validar_fecha, "2024-12-31", "2024-12-31"),
+    (validar_prioridad, "ALTA", "alta"),
+    (validar_prioridad, None, "media"),
+    (validar_estado, "", "pendiente"),
+    (validar_tiempo_estimado, "30", 30),
+    (validar_tiempo_estimado, 12.0, 12),
+    (validar_tiempo_estimado, "", None),
+    (validar_intervalo, "", 1),
+    (validar_dias_semana, [3, 0, 3], "0,3"),
+    (validar_dias_semana, "", None),
+    (validar_hora, "", "23:59"),
+    (validar_limite, "0", 0),
+    (validar_limite, "", None),
+    (validar_horas, "1.5", 1.5),
+    (validar_horas, None, 24),
+])
+def test_valores_validos(validador, valor, esperado):
+    assert validador(valor) == esperado
+
+
+@pytest.mark.parametrize("validador, valor", [
+    (validar_categoria, True),
+    (validar_categoria, False),
+    (validar_categoria, 0),
+    (validar_categoria, -1),
+    (validar_categoria, MAX_ID + 1),
+    (validar_categoria, str(MAX_ID + 1)),
+    (validar_categoria, ""),
+    (validar_fecha_limite, "2024-02-30"),
+    (validar_fecha_limite, "31/12/2024"),
+    (validar_fecha, "2024-01-01T10:00"),
+    (validar_prioridad, "urgente"),
+    (validar_estado, "archivada"),
+    (validar_tiempo_estimado, True),
+    (validar_tiempo_estimado, float("inf")),
+    (validar_tiempo_estimado, -1),
+    (validar_tiempo_estimado, MAX_TIEMPO_ESTIMADO + 1),
+    (validar_intervalo, "0"),
+    (validar_dias_semana, [7]),
+    (validar_hora, "24:00"),
+    (validar_limite, "-1"),
+    (validar_horas, "nan"),
+])
+def test_valores_invalidos(validador, valor):
+    with pytest.raises(ValueError):
+        validador(valor)
+
+
+def test_validar_opcionales_y_lote():
+    esquema = {"nombre": validar_prioridad, "tiempo_estimado": validar_tiempo_estimado}
+    assert validar({"nombre": "baja", "tiempo_estimado": ""}, esquema, opcionales=("tiempo_estimado",)) == {
+        "nombre": "baja"}
+    validos, errores = validar_lote([{"nombre": "alta"}, {"nombre": "x"}], esquema)
+    assert validos == [{"nombre": "alta", "tiempo_estimado": None}]
+    assert [indice for indice, _ in errores] == [1]
+
+
+def test_validar_plantilla_fin_antes_de_inicio():
+    datos = {"nombre": "Regar", "categoria": "Casa", "regla": "diaria", "inicio": "2024-05-01"}
+    assert validar_plantilla({**datos, "fin": "2024-05-01"})["fin"] == "2024-05-01"
+    with pytest.raises(ValueError):
+        validar_plantilla({**datos, "fin": "2024-04-30"})
+
+
+@pytest.fixture
+def categoria_borrada(cliente):
+    """Tarea 1 en "Trabajo" y el id de "Casa" en caché, pero "Casa" ya no está en la base."""
+    assert cliente.post("/api/tareas", json={"nombre": "Informe", "categoria": "Trabajo"}).status_code == 201
+    casa = Categoria.get_or_create("Casa")
+    execute("DELETE FROM categorias WHERE id = ?", (casa,))
+    assert Categoria.id_en_cache("Casa") == casa
+    return cliente
+
+
+def test_editar_con_categoria_borrada(categoria_borrada):
+    edicion = {"nombre": "Informe", "categoria": "Casa"}
+    respuesta = categoria_borrada.put("/api/tarea/1", json=edicion)
+    assert respuesta.status_code == 400
+    # La caché se vació: el segundo intento crea la categoría de nuevo
+    respuesta = categoria_borrada.put("/api/tarea/1", json=edicion)
+    assert respuesta.status_code == 200, respuesta.get_data(as_text=True)
+
+
+def test_formulario_con_categoria_borrada(categoria_borrada):
+    respuesta = categoria_borrada.post("/editar/1", data={"title": "Informe", "categoria": "Casa"})
+    assert respuesta.headers["Location"] == "/editar/1"
+
+
+def test_plantilla_con_categoria_borrada(categoria_borrada):
+    plantilla = {"nombre": "Regar", "categoria": "Casa", "regla": "diaria"}
+    assert categoria_borrada.post("/api/plantillas", json=plantilla).status_code == 400
+    assert categoria_borrada.post("/api/plantillas", json=plantilla).status_code == 201
@@ -0,0 +1,95 @@
+# Tareas vencidas, próximas y recordatorios (models/vencimiento.py)
+"""
+El índice en memoria de fechas límite se actualiza con cada escritura de
+Tarea; estas pruebas revisan que las tres rutas devuelvan lo que dice la base
+también después de completar, editar o eliminar una tarea, y que los
+parámetros inválidos respondan 400 en vez de 500.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def _fecha(**delta):
+    return (datetime.now() + timedelta(**delta)).strftime("%Y-%m-%dT%H:%M")
+
+
+@pytest.fixture
+def ids(cliente):
+    """Crea una tarea de cada tipo y devuelve {tipo: id}."""
+    tareas = {
+        "vencida": {"nombre": "Pagar luz", "categoria": "Casa", "fecha_limite": "2000-01-01T09:00"},
+        "proxima": {"nombre": "Entregar informe", "categoria": "Trabajo", "fecha_limite": _fecha(hours=2)},
+        "lejana": {"nombre": "Renovar pasaporte", "categoria": "Trámites", "fecha_limite": _fecha(days=10)},
+        "sin_fecha": {"nombre": "Leer un libro", "categoria": "Casa"},
+        "completada": {"nombre": "Llamar al banco", "categoria": "Trabajo",
+                       "fecha_limite": "2000-01-02T09:00", "estado": "completada"},
+    }
+    creadas = {}
+    for tipo, tarea in tareas.items():
+        respuesta = cliente.post("/api/tareas", json=tarea)
+        assert respuesta.status_code == 201, respuesta.get_data(as_text=True)
+        creadas[tipo] = respuesta.get_json()["id"]
+    return creadas
+
+
+def _ids(cliente, url):
+    respuesta = cliente.get(url)
+    assert respuesta.status_code == 200, respuesta.get_data(as_text=True)
+    return [tarea["id"] for tarea in respuesta.get_json()]
+
+
+def test_vencidas_proximas_y_recordatorios(cliente, ids):
+    assert _ids(cliente, "/api/tareas/vencidas") == [ids["vencida"]]
+    assert _ids(cliente, "/api/tareas/proximas?horas=24") == [ids["proxima"]]
+    assert _ids(cliente, "/api/tareas/proximas?horas=720") == [ids["proxima"], ids["lejana"]]
+
+    recordatorios = cliente.get("/api/recordatorios").get_json()
+    assert [t["id"] for t in recordatorios["vencidas"]] == [ids["vencida"]]
+    assert [t["id"] for t in recordatorios["siguientes"]] == [ids["proxima"], ids["lejana"]]
+
+
+def test_completar_y_reabrir(cliente, ids):
+    cliente.post(f"/api/tarea/{ids['vencida']}/toggle-estado")
+    assert _ids(cliente, "/api/tareas/vencidas") == []
+    cliente.post(f"/api/tarea/{ids['vencida']}/toggle-estado")
+    assert _ids(cliente, "/api/tareas/vencidas") == [ids["vencida"]]
+
+
+def test_editar_fecha_limite(cliente, ids):
+    edicion = {"nombre": "Entregar informe", "categoria": "Trabajo", "fecha_limite": "2000-01-03T09:00"}
+    assert cliente.put(f"/api/tarea/{ids['proxima']}", json=edicion).status_code == 200
+    assert _ids(cliente, "/api/tareas/vencidas") == [ids["vencida"], ids["proxima"]]
+    assert _ids(cliente, "/api/tareas/proximas?horas=24") == []
+
+
+def test_eliminar(cliente, ids):
+    assert cliente.delete(f"/api/tarea/{ids['vencida']}").status_code == 204
+    assert cliente.delete(f"/api/tarea/{ids['proxima']}").status_code == 204
+    assert _ids(cliente, "/api/tareas/vencidas") == []
+    assert _ids(cliente, "/api/tareas/proximas?horas=24") == []
+
+
+def test_limite(cliente, ids):
+    assert _ids(cliente, "/api/tareas/proximas?horas=720&limite=0") == []
+    assert _ids(cliente, "/api/tareas/proximas?horas=720&limite=1") == [ids["proxima"]]
+    assert cliente.get("/api/recordatorios?limite=0").get_json() == {"vencidas": [], "siguientes": []}
+
+
+@pytest.mark.parametrize("url", [
+    "/api/tareas/proximas?horas=nan",
+    "/api/tareas/proximas?horas=inf",
+    "/api/tareas/proximas?horas=1e400",
+    "/api/tareas/proximas?horas=0",
+    "/api/tareas/proximas?horas=-1",
+    "/api/tareas/proximas?horas=99999",
+    "/api/tareas/proximas?horas=abc",
+    "/api/tareas/proximas?limite=-5",
+    "/api/tareas/vencidas?limite=-5",
+    "/api/tareas/vencidas?limite=99999999999999999999",
+    "/api/recordatorios?limite=-5",
+])
+def test_parametros_invalidos(cliente, url):
+    respuesta = cliente.get(url)
+    assert respuesta.status_code == 400
+    assert "error" in respuesta.get_json()